@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the blogging package.
+
+They are plain scripts, run from the project root, e.g.
+
+    python -m benchmarks.startup
+"""
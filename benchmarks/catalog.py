@@ -0,0 +1,47 @@
+"""
+Synthetic blog catalogs for the benchmarks.
+
+Everything is drawn from a seeded random generator, so the same size and
+seed always give the same catalog and runs on different commits work on
+identical data.
+"""
+
+import random
+
+
+# a small vocabulary, so searches hit a predictable share of the catalog
+WORDS = [
+    "journey", "trip", "travel", "road", "coffee", "python", "garden",
+    "music", "winter", "summer", "mountain", "river", "city", "kitchen",
+    "recipe", "notes", "daily", "weekly", "review", "story", "photo",
+    "short", "long", "boring", "happy", "quiet", "night", "morning",
+]
+
+# search strings used by the retrieve benchmarks: common words, rare
+# combinations, pieces of words and strings that match nothing
+QUERIES = ["journey", "trip", "cof", "river city", "ing", "zzz", "python notes", "1234"]
+
+FIRST_ID = 1000000000
+
+
+def blog_id(i):
+    return FIRST_ID + i
+
+
+def generate_blogs(n, seed=0):
+    """Yield (id, name, url, email) for n blogs."""
+    rng = random.Random(seed)
+    for i in range(n):
+        words = rng.sample(WORDS, 2)
+        name = " ".join(w.capitalize() for w in words)
+        slug = "_".join(words)
+        yield blog_id(i), name, f"http://{slug}_{i}.blog", f"{slug}{i}@mail.com"
+
+
+def generate_posts(n, seed=0, words_per_post=40):
+    """Yield (title, text) for n posts."""
+    rng = random.Random(seed + 1)
+    for _ in range(n):
+        title = " ".join(rng.choices(WORDS, k=3)).capitalize()
+        text = " ".join(rng.choices(WORDS, k=words_per_post))
+        yield title, text
@@ -0,0 +1,47 @@
+"""
+Compare two benchmarks.suite result files.
+
+    python -m benchmarks.compare before.json after.json
+
+Prints us/op of both runs and their ratio for every operation the two
+files share (after / before: below 1.0 is faster).
+"""
+
+import json
+import sys
+
+
+def _key(record):
+    return (record["op"], record["size"], record["autosave"],
+            record.get("backend"), record.get("post_storage"))
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return {_key(r): r for r in json.load(f)["results"]}
+
+
+def compare(before, after):
+    """Return (key, before us/op, after us/op, ratio) for the shared keys."""
+    rows = []
+    for key in sorted(set(before) & set(after), key=lambda k: (k[1], k[2], k[0], str(k[3:]))):
+        old = before[key]["us_per_op"]
+        new = after[key]["us_per_op"]
+        rows.append((key, old, new, new / old if old else float("inf")))
+    return rows
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print(__doc__.strip())
+        return 2
+    rows = compare(load(argv[0]), load(argv[1]))
+    print(f"{'operation':<16}{'size':>9}{'autosave':>10}{'before us':>14}{'after us':>14}{'ratio':>8}")
+    for (op, size, autosave, _, _), old, new, ratio in rows:
+        print(f"{op:<16}{size:>9}{'on' if autosave else 'off':>10}{old:>14.1f}{new:>14.1f}{ratio:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
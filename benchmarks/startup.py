@@ -0,0 +1,115 @@
+"""
+Startup-time benchmark for the entry points.
+
+Runs a fresh interpreter with `-X importtime` for each entry point,
+reports how long importing the blogging modules takes (median of
+several runs) and fails if an entry point
+
+- imports a forbidden module (PyQt6 on the CLI path), or
+- takes longer than its import budget
+
+    python -m benchmarks.startup [--runs 5] [--budget-ms 150] [--json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+# entry point -> statement that imports what `python -m blogging <name>` loads
+ENTRY_POINTS = {
+    "cli": "import blogging.__main__, blogging.cli.blogging_cli",
+}
+
+# modules an entry point must never load
+FORBIDDEN = {
+    "cli": ("PyQt6",),
+}
+
+
+def import_profile(statement, python=None):
+    """
+    Run statement in a new interpreter with -X importtime.
+    Returns a list of (module, self_us, cumulative_us, depth), in the
+    order the imports finished.
+    """
+    proc = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"'{statement}' failed:\n{proc.stderr}")
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def blogging_import_us(modules):
+    """Cumulative time of the top-level imports of blogging modules."""
+    top = min((m[3] for m in modules), default=0)
+    return sum(m[2] for m in modules if m[3] == top and m[0].split(".")[0] == "blogging")
+
+
+def forbidden_imports(modules, forbidden):
+    return sorted({m[0] for m in modules if m[0].split(".")[0] in forbidden})
+
+
+def run(entry, runs=5, top=10):
+    """Measure one entry point; returns a JSON-friendly dict."""
+    statement = ENTRY_POINTS[entry]
+    totals = []
+    profile = []
+    for _ in range(runs):
+        profile = import_profile(statement)
+        totals.append(blogging_import_us(profile))
+    slowest = sorted(profile, key=lambda m: m[1], reverse=True)[:top]
+    return {
+        "entry": entry,
+        "statement": statement,
+        "runs": runs,
+        "median_ms": statistics.median(totals) / 1000,
+        "min_ms": min(totals) / 1000,
+        "modules": len(profile),
+        "forbidden": forbidden_imports(profile, FORBIDDEN.get(entry, ())),
+        "slowest_self_ms": [(name, self_us / 1000) for name, self_us, _, _ in slowest],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=150.0,
+                        help="fail if the median import time is above this")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = [run(entry, args.runs) for entry in ENTRY_POINTS]
+    failed = False
+    for result in results:
+        result["budget_ms"] = args.budget_ms
+        result["ok"] = not result["forbidden"] and result["median_ms"] <= args.budget_ms
+        failed = failed or not result["ok"]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"{result['entry']}: {result['median_ms']:.1f} ms median "
+                  f"({result['min_ms']:.1f} ms min, {result['modules']} modules, "
+                  f"budget {result['budget_ms']:.0f} ms)")
+            for name, ms in result["slowest_self_ms"]:
+                print(f"    {ms:8.2f} ms  {name}")
+            if result["forbidden"]:
+                print(f"    FORBIDDEN: {', '.join(result['forbidden'])}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
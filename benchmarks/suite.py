@@ -0,0 +1,214 @@
+"""
+Benchmark suite for the DAO and controller layers.
+
+For every catalog size, with autosave off and on, it builds a catalog
+through the Controller in a scratch folder and times
+
+    create_blog, search_blog, retrieve_blogs,
+    create_post, retrieve_posts, list_posts, cold_start
+
+(cold_start - a new Controller logging in and opening the post list of
+the blog - is only measured with autosave on: without autosave the DAOs
+start empty and never read the saved files, so there is nothing to load;
+the report lists it under "skipped"). Results are written as
+JSON, one record per (size, autosave, operation), so runs on different
+commits can be compared with benchmarks.compare.
+
+    python -m benchmarks.suite --sizes 1000,10000 --output before.json
+    python -m benchmarks.suite --sizes 1000,10000 --backend sqlite --no-fsync
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from benchmarks.catalog import QUERIES, blog_id, generate_blogs, generate_posts
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+
+
+USER = ("user", "123456")
+
+# why cold_start is not timed with autosave off; written to the report
+COLD_START_SKIPPED = ("autosave off: the DAOs start empty and never read the saved "
+                      "files, so a new Controller has no catalog to load")
+
+# Configuration attributes the suite changes and restores
+_SETTINGS = ("autosave", "blogs_file", "records_path", "sqlite_file",
+             "storage_backend", "post_storage", "fsync")
+
+
+@contextmanager
+def scratch_configuration(**settings):
+    """Point every storage file into a temp folder while the block runs."""
+    old = {name: getattr(Configuration, name) for name in _SETTINGS}
+    tmp_dir = tempfile.mkdtemp(prefix="blogging-bench-")
+    try:
+        Configuration.blogs_file = os.path.join(tmp_dir, "blogs.json")
+        Configuration.records_path = os.path.join(tmp_dir, "records")
+        Configuration.sqlite_file = os.path.join(tmp_dir, "blogs.db")
+        for name, value in settings.items():
+            setattr(Configuration, name, value)
+        yield tmp_dir
+    finally:
+        _close_sqlite()
+        for name, value in old.items():
+            setattr(Configuration, name, value)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _close_sqlite():
+    # only touch the sqlite module if a run has loaded it
+    store = sys.modules.get("blogging.dao.sqlite_store")
+    if store is not None:
+        store.close_stores()
+
+
+def _flush(controller):
+    # deferred (group-commit) writes belong to the operation that made them
+    for dao in (controller.blog_dao, getattr(controller.current_blog, "post_dao", None)):
+        if dao is not None and hasattr(dao, "flush"):
+            dao.flush()
+
+
+class Timer:
+    """Collects one result record per timed operation."""
+
+    def __init__(self, size, autosave, meta):
+        self.size = size
+        self.autosave = autosave
+        self.meta = meta
+        self.records = []
+
+    @contextmanager
+    def time(self, op, count):
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        self.records.append({
+            "op": op,
+            "size": self.size,
+            "autosave": self.autosave,
+            "count": count,
+            "seconds": seconds,
+            "us_per_op": seconds / count * 1e6 if count else 0.0,
+            **self.meta,
+        })
+
+
+def run_size(size, autosave, posts, lookups, seed, meta):
+    """Run every benchmark for one catalog size; returns the records."""
+    timer = Timer(size, autosave, meta)
+    rng = random.Random(seed)
+
+    controller = Controller(autosave)
+    controller.login(*USER)
+
+    blogs = list(generate_blogs(size, seed))
+    with timer.time("create_blog", size):
+        for b in blogs:
+            controller.create_blog(*b)
+        _flush(controller)
+
+    keys = [blog_id(rng.randrange(size)) for _ in range(lookups)]
+    with timer.time("search_blog", lookups):
+        for key in keys:
+            controller.search_blog(key)
+
+    with timer.time("retrieve_blogs", len(QUERIES)):
+        for q in QUERIES:
+            controller.retrieve_blogs(q)
+
+    controller.set_current_blog(blog_id(0))
+    post_data = list(generate_posts(posts, seed))
+    with timer.time("create_post", posts):
+        for title, text in post_data:
+            controller.create_post(title, text)
+        _flush(controller)
+
+    with timer.time("retrieve_posts", len(QUERIES)):
+        for q in QUERIES:
+            controller.retrieve_posts(q)
+
+    with timer.time("list_posts", 3):
+        for _ in range(3):
+            controller.list_posts()
+
+    if autosave:
+        _close_sqlite()
+        with timer.time("cold_start", 1):
+            cold = Controller(autosave)
+            cold.login(*USER)
+            cold.set_current_blog(blog_id(0))
+            cold.list_posts_page(limit=Configuration.page_size)
+
+    return timer.records
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the DAO and controller layers.")
+    parser.add_argument("--sizes", default="1000,10000",
+                        help="comma separated catalog sizes (blogs; posts default to the same)")
+    parser.add_argument("--posts", type=int, default=None,
+                        help="posts created in one blog (default: the catalog size)")
+    parser.add_argument("--lookups", type=int, default=1000, help="search_blog calls per size")
+    parser.add_argument("--autosave", choices=("off", "on", "both"), default="both")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default=Configuration.storage_backend)
+    parser.add_argument("--post-storage", choices=("pickle", "segment"), default=Configuration.post_storage)
+    parser.add_argument("--no-fsync", action="store_true", help="skip fsync (much faster on large sizes)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    modes = {"off": [False], "on": [True], "both": [False, True]}[args.autosave]
+    meta = {"backend": args.backend, "post_storage": args.post_storage, "fsync": not args.no_fsync}
+
+    records = []
+    for size in sizes:
+        for autosave in modes:
+            with scratch_configuration(autosave=autosave, storage_backend=args.backend,
+                                       post_storage=args.post_storage, fsync=not args.no_fsync):
+                posts = size if args.posts is None else args.posts
+                records.extend(run_size(size, autosave, posts, args.lookups, args.seed, meta))
+            print(f"size {size}, autosave {'on' if autosave else 'off'}: done", file=sys.stderr)
+    if False in modes:
+        print(f"cold_start skipped with {COLD_START_SKIPPED}", file=sys.stderr)
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": records,
+    }
+    if False in modes:
+        report["skipped"] = [{"op": "cold_start", "autosave": False, "reason": COLD_START_SKIPPED}]
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,48 @@
 import os
 import sys
-from blogging.cli.blogging_cli import BloggingCLI
-import blogging.gui.blogging_gui
+
+from blogging.profiling import profile_options, run_profiled
+
+# the interfaces are imported when chosen: the CLI must not pay for
+# loading PyQt6 and the Qt libraries
 
 def main():
 	# You can run either a command-line interface (CLI) 
 	# or a graphical user interface (GUI) to your bloggingJSON system.
-	if len(sys.argv) != 2:
+	# --profile[=DIR] / --profile-stacks (or BLOGGING_PROFILE) run the
+	# session under blogging.profiling
+	argv, profile = profile_options(sys.argv[1:])
+	if not argv or (argv[0] != 'export' and len(argv) != 1):
 		print('ERROR: wrong number of arguments')
-		print('\nCorrect Command usage:')
-		print('python -m bloggingJSON option')
-		print('where option is either cli or gui')
+		print_usage()
 		sys.exit()
 
-	if sys.argv[1] == 'cli':
-		BloggingCLI()
-	elif sys.argv[1] == 'gui':
-		blogging.gui.blogging_gui.main()
+	if argv[0] == 'export':
+		# python -m blogging export [FILE] [--user NAME]
+		from blogging.cli.export_cli import export_main
+		session = lambda: sys.exit(export_main(argv[1:]))
+	elif argv[0] == 'cli':
+		from blogging.cli.blogging_cli import BloggingCLI
+		session = BloggingCLI
+	elif argv[0] == 'gui':
+		from blogging.gui.blogging_gui import main as gui_main
+		session = gui_main
 	else:
 		print('ERROR: Wrong argument')
-		print('\nCorrect Command usage:')
-		print('python -m bloggingJSON option')
-		print('where option is either cli or gui')
+		print_usage()
+		return
+
+	if profile is None:
+		session()
+	else:
+		run_profiled(argv[0], session, **profile)
+
 
+def print_usage():
+	print('\nCorrect Command usage:')
+	print('python -m blogging option [--profile[=DIR]] [--profile-stacks]')
+	print('where option is either cli or gui')
+	print('or: python -m blogging export [FILE] [--user NAME]')
 
 if __name__ == '__main__':
 	main()
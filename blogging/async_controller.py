@@ -0,0 +1,213 @@
+"""
+asyncio access to the blogging system.
+
+This is a controller-level wrapper, not async versions of the DAOs on a
+bounded I/O pool. Blog.post_dao, the post collection cache and the DAOs
+keep shared state without locks, so all calls, post loads included, run
+one at a time on a single thread. What this gives is an event loop that
+never blocks on file I/O, and one load for concurrent requests of the
+same blog's posts. Loads of different blogs do not overlap. Async DAOs
+on their own pool would first need those objects to be thread-safe.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+
+
+def _take(iterator, count):
+    # the next count items of iterator (fewer at its end)
+    items = []
+    for item in iterator:
+        items.append(item)
+        if len(items) >= count:
+            break
+    return items
+
+
+class AsyncController:
+    """
+    asyncio front end of a Controller.
+
+    - every operation has an `async def` twin that runs the controller
+      call on a thread, so DAO file I/O never blocks the event loop
+    - calls run one at a time, in the order they were made, on a single
+      thread: the controller and its DAOs are not meant to be used from
+      several threads at once (the dashboard's Worker does the same)
+    - before a post operation, the current blog's post file is loaded as
+      a call of its own, on the same thread (Blog.post_dao and the post
+      cache are not thread-safe either); concurrent loads of the same
+      blog share one load instead of reading the .dat file once each
+    """
+
+    def __init__(self, controller=None):
+        self.controller = Controller() if controller is None else controller
+        self._calls = ThreadPoolExecutor(max_workers=1, thread_name_prefix="controller")
+        # blog id -> future of the post load in progress
+        self._loads = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Wait for running calls and stop the threads."""
+        self._calls.shutdown(wait=True)
+
+    # ---------- helpers ----------
+
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._calls, functools.partial(fn, *args, **kwargs))
+
+    async def load_posts(self, blog):
+        """Open blog's posts on the call thread; concurrent calls share one load."""
+        if blog.posts_loaded():
+            return
+        future = self._loads.get(blog.id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._calls, lambda: blog.post_dao)
+            self._loads[blog.id] = future
+            future.add_done_callback(lambda _: self._loads.pop(blog.id, None))
+        # one waiter being cancelled must not cancel the shared load
+        await asyncio.shield(future)
+
+    async def _post_call(self, fn, *args, **kwargs):
+        blog = self.controller.current_blog
+        if blog is not None:
+            await self.load_posts(blog)
+        return await self._call(fn, *args, **kwargs)
+
+    # ---------- login / logout ----------
+
+    async def login(self, username, password):
+        return await self._call(self.controller.login, username, password)
+
+    async def logout(self):
+        return await self._call(self.controller.logout)
+
+    # ---------- blog operations ----------
+
+    async def create_blog(self, id, name, url, email):
+        return await self._call(self.controller.create_blog, id, name, url, email)
+
+    async def search_blog(self, id):
+        return await self._call(self.controller.search_blog, id)
+
+    async def retrieve_blogs(self, key):
+        return await self._call(self.controller.retrieve_blogs, key)
+
+    async def list_blogs(self):
+        return await self._call(self.controller.list_blogs)
+
+    async def retrieve_blogs_page(self, key, offset=0, limit=None, cursor=None):
+        return await self._call(self.controller.retrieve_blogs_page, key, offset, limit, cursor)
+
+    async def list_blogs_page(self, offset=0, limit=None, cursor=None):
+        return await self._call(self.controller.list_blogs_page, offset, limit, cursor)
+
+    async def update_blog(self, old_id, new_id, new_name, new_url, new_email):
+        return await self._call(self.controller.update_blog, old_id, new_id, new_name, new_url, new_email)
+
+    async def delete_blog(self, id):
+        return await self._call(self.controller.delete_blog, id)
+
+    # ---------- current blog ----------
+
+    async def set_current_blog(self, id):
+        return await self._call(self.controller.set_current_blog, id)
+
+    async def unset_current_blog(self):
+        return await self._call(self.controller.unset_current_blog)
+
+    async def get_current_blog(self):
+        return await self._call(self.controller.get_current_blog)
+
+    # ---------- post operations ----------
+
+    async def create_post(self, title, text):
+        return await self._post_call(self.controller.create_post, title, text)
+
+    async def search_post(self, code):
+        return await self._post_call(self.controller.search_post, code)
+
+    async def retrieve_posts(self, key):
+        return await self._post_call(self.controller.retrieve_posts, key)
+
+    async def retrieve_posts_page(self, key, offset=0, limit=None, cursor=None):
+        return await self._post_call(self.controller.retrieve_posts_page, key, offset, limit, cursor)
+
+    async def update_post(self, code, new_title, new_text):
+        return await self._post_call(self.controller.update_post, code, new_title, new_text)
+
+    async def delete_post(self, code):
+        return await self._post_call(self.controller.delete_post, code)
+
+    async def list_posts(self):
+        return await self._post_call(self.controller.list_posts)
+
+    async def list_posts_page(self, offset=0, limit=None, cursor=None):
+        return await self._post_call(self.controller.list_posts_page, offset, limit, cursor)
+
+    # ---------- batches, import / export ----------
+
+    @asynccontextmanager
+    async def batch(self):
+        # Controller.batch() entered and left on the call thread; calls
+        # made by other tasks meanwhile are part of the batch too
+        context = self.controller.batch()
+        await self._call(context.__enter__)
+        try:
+            yield self
+        except BaseException as e:
+            await self._call(context.__exit__, type(e), e, e.__traceback__)
+            raise
+        await self._call(context.__exit__, None, None, None)
+
+    async def import_blogs(self, records, chunk_size=None):
+        return await self._call(self.controller.import_blogs, records, chunk_size)
+
+    async def import_posts(self, records, chunk_size=None):
+        return await self._call(self.controller.import_posts, records, chunk_size)
+
+    async def export(self):
+        """
+        Async iterator over the NDJSON lines of Controller.export(),
+        handed over Configuration.export_batch_size lines at a time.
+        Calls made by other tasks run between two chunks: every line is
+        a whole record, but the export is not a snapshot, so their
+        changes may or may not be part of it.
+        """
+        lines = await self._call(self.controller.export)
+        while True:
+            chunk = await self._call(_take, lines, Configuration.export_batch_size)
+            if not chunk:
+                return
+            for line in chunk:
+                yield line
+
+    # ---------- performance statistics ----------
+
+    async def stats(self):
+        return await self._call(self.controller.stats)
+
+    async def stats_report(self):
+        return await self._call(self.controller.stats_report)
+
+    async def post_cache_stats(self):
+        return await self._call(self.controller.post_cache_stats)
+
+    async def stats_enabled(self):
+        return self.controller.stats_enabled()
+
+    async def collect_stats(self, enabled):
+        return await self._call(self.controller.collect_stats, enabled)
+
+    async def reset_stats(self):
+        return await self._call(self.controller.reset_stats)
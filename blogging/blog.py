@@ -1,16 +1,55 @@
-from blogging.dao.post_dao_pickle import PostDAOPickle
+from blogging.dao.post_collection_cache import POST_CACHE
+from blogging.dao.post_dao_factory import create_post_dao
 from blogging.configuration import Configuration
 
 class Blog:
 
+    __slots__ = ("id", "name", "url", "email", "autosave", "_post_dao")
+
     def __init__(self, id, name, url, email):
         self.id = id
         self.name = name
         self.url = url
         self.email = email
-        self.dao = PostDAOPickle(self)
-        autosave = Configuration.autosave
-        self.post_dao = PostDAOPickle(self, autosave)
+        # the post DAO (and the .dat file behind it) is only opened the
+        # first time this blog's posts are used, so building a Blog for
+        # every catalog entry stays cheap
+        self.autosave = Configuration.autosave
+        self._post_dao = None
+
+    @property
+    def post_dao(self):
+        if self._post_dao is None:
+            self._post_dao = create_post_dao(self, self.autosave)
+            if self.autosave:
+                POST_CACHE.loaded(self, self._post_dao)
+        elif self.autosave:
+            # may unload the posts of blogs not used for a while; without
+            # autosave the posts exist nowhere else, so they are not listed
+            POST_CACHE.used(self, self._post_dao)
+        return self._post_dao
+
+    @property
+    def posts(self):
+        return self.post_dao.list_posts()
+
+    def posts_loaded(self):
+        return self._post_dao is not None
+
+    def posts_generation(self):
+        # generation of the loaded posts, or None; unlike post_dao this
+        # neither opens the posts nor counts as a use of them
+        return self._post_dao.generation if self._post_dao is not None else None
+
+    def unload_posts(self):
+        # write out and drop the post DAO; it is opened again on next use.
+        # Returns False, keeping it, during a batch or if the write fails
+        if self._post_dao is not None:
+            if self._post_dao.busy() or not self._post_dao.flush():
+                return False
+            self._post_dao = None
+            POST_CACHE.discard(self)
+        return True
 
     def add_post(self, post):
         return self.post_dao.create_post(post)
@@ -0,0 +1,36 @@
+import json
+
+
+# Every line of an export is one JSON object: a blog record followed by
+# the records of its posts. The post records carry blog_id, title, text,
+# creation and update, so Controller.import_posts reads them back.
+
+def blog_record(blog):
+    return {"type": "blog", "id": blog.id, "name": blog.name, "url": blog.url, "email": blog.email}
+
+
+def post_record(blog_id, post):
+    return {
+        "type": "post",
+        "blog_id": blog_id,
+        "code": post.code,
+        "title": post.title,
+        "text": post.text,
+        "creation": post.creation.isoformat(),
+        "update": post.update.isoformat(),
+    }
+
+
+def to_line(record):
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def export_lines(blogs, posts_of):
+    """
+    Yield the NDJSON lines of blogs, each followed by its posts.
+    posts_of(blog) must return an iterator over the blog's posts.
+    """
+    for blog in blogs:
+        yield to_line(blog_record(blog))
+        for post in posts_of(blog):
+            yield to_line(post_record(blog.id, post))
@@ -0,0 +1,99 @@
+import csv
+import json
+import os
+from datetime import datetime
+
+from blogging.blog import Blog
+from blogging.post import Post
+
+
+# ---------- file readers ----------
+
+def read_csv(path):
+    """Yield one dict per row of a CSV file with a header line."""
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield row
+
+
+def read_jsonl(path):
+    """Yield one dict per non-empty line of a JSON Lines file."""
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {number}: {e}")
+            if not isinstance(record, dict):
+                raise ValueError(f"line {number}: expected a JSON object")
+            yield record
+
+
+def read_records(path):
+    """Pick the reader from the file extension (.csv, .jsonl or .ndjson)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return read_csv(path)
+    if ext in (".jsonl", ".ndjson"):
+        return read_jsonl(path)
+    raise ValueError(f"unsupported import file type: {ext or path}")
+
+
+# ---------- record conversion ----------
+
+def _field(record, name, required=True):
+    value = record.get(name)
+    if isinstance(value, str):
+        value = value.strip()
+    if required and (value is None or value == ""):
+        raise ValueError(f"missing {name}")
+    return value
+
+
+def _timestamp(record, name):
+    value = _field(record, name, required=False)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"bad {name}: {value!r}")
+
+
+def to_blog(record):
+    """Blog from a Blog or a dict with id, name, url and email."""
+    if isinstance(record, Blog):
+        return record
+    try:
+        id = int(_field(record, "id"))
+    except (TypeError, ValueError):
+        raise ValueError(f"bad id: {record.get('id')!r}")
+    return Blog(id, _field(record, "name"), _field(record, "url"), _field(record, "email"))
+
+
+def post_blog_id(record):
+    """The blog a post record belongs to, or None for the current blog."""
+    if isinstance(record, Post):
+        return None
+    value = _field(record, "blog_id", required=False)
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"bad blog_id: {value!r}")
+
+
+def to_post(record):
+    """
+    Post from a Post or a dict with title and text, and optionally
+    creation / update as ISO dates. Codes are assigned by the DAO.
+    """
+    if isinstance(record, Post):
+        return record
+    title = _field(record, "title")
+    text = _field(record, "text", required=False) or ""
+    return Post(0, title, text, _timestamp(record, "creation"), _timestamp(record, "update"))
@@ -1,3 +1,4 @@
+from blogging.configuration import Configuration
 from blogging.controller import Controller
 from blogging.exception.illegal_access_exception import IllegalAccessException
 from blogging.exception.no_current_blog_exception import NoCurrentBlogException
@@ -68,11 +69,11 @@ class EditingBlogMenuCLI():
         print('RETRIEVE POSTS FROM BLOG BY TEXT:')
         try:
             search_string = input('Search for: ')
-            found_posts = self.controller.retrieve_posts(search_string)
-            if found_posts:
+            page = self.controller.retrieve_posts_page(search_string, limit=Configuration.page_size)
+            if page:
                 print('\nPosts found for %s:\n' % search_string)
-                for post in found_posts:
-                    self.print_post_data(post)
+                self.print_pages(page, lambda cursor: self.controller.retrieve_posts_page(
+                    search_string, limit=Configuration.page_size, cursor=cursor))
             else:
                 print('\nNo posts found for: %s\n' % search_string)
         except IllegalAccessException:
@@ -87,6 +88,17 @@ class EditingBlogMenuCLI():
         print('\nTitle: %s\n' % post.title)
         print('%s\n' % post.text)
 
+    # helper method to print posts one page at a time
+    def print_pages(self, page, next_page):
+        while True:
+            for post in page:
+                self.print_post_data(post)
+            if page.next_cursor is None:
+                return
+            if input('Type ENTER for more posts, or q to stop: ').lower() == 'q':
+                return
+            page = next_page(page.next_cursor)
+
     def update_post(self):
         print('CHANGE POST FROM BLOG:')
         try:
@@ -132,10 +144,10 @@ class EditingBlogMenuCLI():
     def list_full_blog_contents(self):
         print('LIST FULL BLOG CONTENTS:\n')
         try:
-            posts = self.controller.list_posts()
-            if posts:
-                for post in posts:
-                    self.print_post_data(post)
+            page = self.controller.list_posts_page(limit=Configuration.page_size)
+            if page:
+                self.print_pages(page, lambda cursor: self.controller.list_posts_page(
+                    limit=Configuration.page_size, cursor=cursor))
             else:
                 print('\nBlog is empty.\n')
         except IllegalAccessException:
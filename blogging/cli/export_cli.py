@@ -0,0 +1,50 @@
+import argparse
+import sys
+from getpass import getpass
+
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.exception.invalid_login_exception import InvalidLoginException
+
+
+def export_main(args):
+    # python -m blogging export [FILE] [--user NAME]: writes every blog and
+    # its posts as NDJSON to FILE, or to stdout so it can be piped into
+    # gzip, jq, ...; prompts and messages go to stderr / the terminal
+    parser = argparse.ArgumentParser(prog='python -m blogging export',
+                                     description='Export all blogs and posts as newline-delimited JSON.')
+    parser.add_argument('output', nargs='?', default='-', help='output file (default: stdout)')
+    parser.add_argument('--user', help='user name (asked for when missing)')
+    options = parser.parse_args(args)
+
+    Configuration.autosave = True
+    controller = Controller()
+    try:
+        if options.user is None:
+            print('Username: ', end='', file=sys.stderr, flush=True)
+            username = sys.stdin.readline().strip()
+        else:
+            username = options.user
+        controller.login(username, getpass('Password: '))
+    except InvalidLoginException:
+        print('LOGIN INCORRECT.', file=sys.stderr)
+        return 1
+
+    count = 0
+    try:
+        if options.output == '-':
+            out = sys.stdout.buffer
+            for line in controller.export():
+                out.write(line.encode('utf-8'))
+                count += 1
+            out.flush()
+        else:
+            with open(options.output, 'w', encoding='utf-8', newline='\n') as out:
+                for line in controller.export():
+                    out.write(line)
+                    count += 1
+    except BrokenPipeError:
+        # the reader went away (e.g. piped into head); not an error
+        return 0
+    print('exported %d records' % count, file=sys.stderr)
+    return 0
@@ -1,3 +1,4 @@
+from blogging.configuration import Configuration
 from blogging.controller import Controller
 from blogging.exception.invalid_logout_exception import InvalidLogoutException
 from blogging.exception.illegal_access_exception import IllegalAccessException
@@ -42,12 +43,15 @@ class MainMenuCLI():
                 self.start_editing_blog()
                 input('Type ENTER to continue.')
             elif response == 8:
+                self.show_stats()
+                input('Type ENTER to continue.')
+            elif response == 9:
                 if self.logout():
                     print('\nLOGGED OUT.')
                     input('Type ENTER to continue.')
                     break
             else:
-                print('\nWRONG CHOICE. Please pick a choice between 1 and 8.')
+                print('\nWRONG CHOICE. Please pick a choice between 1 and 9.')
                 input('Type ENTER to continue.')
         return
 
@@ -60,7 +64,8 @@ class MainMenuCLI():
         print('5 - Remove blog')
         print('6 - List all blogs')
         print('7 - Edit blog')
-        print('8 - Log out')
+        print('8 - Show performance statistics')
+        print('9 - Log out')
 
     def create_blog(self):
         print('ADD NEW BLOG:')
@@ -98,15 +103,26 @@ class MainMenuCLI():
         print('Email: %s' % blog.email)
         print()
 
+    # helper method to print blogs one page at a time
+    def print_pages(self, page, next_page):
+        while True:
+            for blog in page:
+                print(blog)
+            if page.next_cursor is None:
+                return
+            if input('\nType ENTER for more blogs, or q to stop: ').lower() == 'q':
+                return
+            page = next_page(page.next_cursor)
+
     def retrieve_blogs_by_name(self):
         print('RETRIEVE BLOGS BY NAME:')
         try:
             search_string = input('Search for: ')
-            found_blogs = self.controller.retrieve_blogs(search_string)
-            if found_blogs:
+            page = self.controller.retrieve_blogs_page(search_string, limit=Configuration.page_size)
+            if page:
                 print('\nBlogs found with name %s:\n' % search_string)
-                for blog in found_blogs:
-                    print(blog)
+                self.print_pages(page, lambda cursor: self.controller.retrieve_blogs_page(
+                    search_string, limit=Configuration.page_size, cursor=cursor))
             else:
                 print('\nNo blogs found with name: %s\n' % search_string)
         except IllegalAccessException:
@@ -177,10 +193,10 @@ class MainMenuCLI():
     def list_all_blogs(self):
         print('LIST ALL BLOGS:\n')
         try:
-            blogs = self.controller.list_blogs()
-            if blogs:
-                for blog in blogs:
-                    print(blog)
+            page = self.controller.list_blogs_page(limit=Configuration.page_size)
+            if page:
+                self.print_pages(page, lambda cursor: self.controller.list_blogs_page(
+                    limit=Configuration.page_size, cursor=cursor))
             else:
                 print('\nNo blogs registered in the system.\n')
         except IllegalAccessException:
@@ -200,6 +216,23 @@ class MainMenuCLI():
             print('\nERROR STARTING EDITING BLOG.') 
             print('There is no blog registered with ID %d.' % id)
 
+    def show_stats(self):
+        print('PERFORMANCE STATISTICS:')
+        try:
+            if not self.controller.stats_enabled():
+                print('\nStatistics collection is off.')
+                if input('Turn it on? (y/n) ').strip().lower() == 'y':
+                    self.controller.collect_stats(True)
+                    print('\nSTATISTICS COLLECTION TURNED ON.')
+                return
+            print()
+            print(self.controller.stats_report())
+            if input('\nType r to reset the statistics, or ENTER to keep them: ').strip().lower() == 'r':
+                self.controller.reset_stats()
+                print('\nSTATISTICS RESET.')
+        except IllegalAccessException:
+            print('\nMUST LOGIN FIRST.')
+
     def logout(self):
         try:
             self.controller.logout()
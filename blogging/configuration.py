@@ -8,5 +8,50 @@ class Configuration():
     blogs_file = "bloggingJSON/blogs.json"
     records_path = "blogging/records"
     records_extension = ".dat"
+    # journaled blog storage: mutations are appended to a log next to
+    # blogs_file and folded back into it once the log gets long enough
+    blogs_journal = True
+    journal_extension = ".journal"
+    journal_compact_threshold = 1000
     
-
+    # post storage engine: "pickle" rewrites one .dat list per blog,
+    # "segment" appends records to a per-blog log (see PostDAOSegment)
+    post_storage = "pickle"
+    segment_compact_ratio = 0.5
+    segment_compact_min_bytes = 64 * 1024
+    # durability: fsync files before renaming them into place, and merge
+    # mutations arriving within this many seconds into one flush
+    # (0 flushes every mutation immediately)
+    fsync = True
+    group_commit_window = 0.0
+    # blogs whose posts stay loaded: at most this many blogs, holding at
+    # most this many posts in memory; the least recently used are
+    # unloaded and read again when needed (0 = no limit)
+    post_cache_max_blogs = 64
+    post_cache_max_posts = 200000
+    # processes sharing the files: writes hold an advisory lock file, and
+    # a DAO looks for changes made by others before every write and at
+    # most this often (seconds) before reads
+    file_locking = True
+    change_check_interval = 0.5
+    # storage backend: "json" (blogs_file + records_path files) or
+    # "sqlite" (blogs and posts in one sqlite3 database)
+    storage_backend = "json"
+    sqlite_file = "bloggingJSON/blogs.db"
+    # number of blogs / posts the CLI and GUI fetch and show at a time
+    page_size = 20
+    # the dashboard searches once typing has paused for this long
+    search_debounce_ms = 250
+    # bulk imports store this many blogs / posts per blog with one
+    # write (0: everything at the end)
+    import_chunk_size = 10000
+    # blogs read at a time by exports
+    export_batch_size = 500
+    # record call counts, latencies and file I/O (see blogging/stats.py)
+    collect_stats = False
+    # profiling runs (python -m blogging cli --profile, see blogging/profiling.py):
+    # where reports go, how many allocation sites they list, and how
+    # often the stack sampler looks at the running threads (seconds)
+    profile_dir = "profiles"
+    profile_top_allocations = 25
+    profile_sample_interval = 0.005
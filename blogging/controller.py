@@ -1,11 +1,15 @@
+from contextlib import contextmanager
 from datetime import datetime
 import hashlib
 import os
 from blogging.blog import Blog
 from blogging.post import Post
 from blogging.configuration import Configuration
+from blogging.bulk_export import export_lines
+from blogging.bulk_import import post_blog_id, to_blog, to_post
 
-from blogging.dao.blog_dao_json import BlogDAOJSON
+from blogging.dao.blog_dao_factory import create_blog_dao
+from blogging.dao.post_collection_cache import POST_CACHE
 
 from blogging.exception.invalid_login_exception import InvalidLoginException
 from blogging.exception.duplicate_login_exception import DuplicateLoginException
@@ -13,6 +17,7 @@ from blogging.exception.invalid_logout_exception import InvalidLogoutException
 from blogging.exception.illegal_access_exception import IllegalAccessException
 from blogging.exception.illegal_operation_exception import IllegalOperationException
 from blogging.exception.no_current_blog_exception import NoCurrentBlogException
+from blogging.stats import STATS, timed
 
 
 class Controller:
@@ -26,9 +31,11 @@ class Controller:
         self.logged_in = False
         self.current_user = None
         self.current_blog = None
+        # DAOs taking part in the open batch (see batch()), or None
+        self._batch = None
 
         # DAOs know whether persistence is enabled
-        self.blog_dao = BlogDAOJSON(self.autosave)
+        self.blog_dao = create_blog_dao(self.autosave)
 
         # load users (username, sha256(password)) from config file
         self.users = self._load_users(cfg.__class__.users_file)
@@ -61,8 +68,22 @@ class Controller:
         if self.current_blog is None:
             raise NoCurrentBlogException("no current blog")
 
+    def _enlist(self, dao):
+        # inside a batch, a DAO starts its undo log the first time it is used
+        if self._batch is not None and not any(d is dao for d in self._batch):
+            dao.begin()
+            self._batch.append(dao)
+
+    def _page(self, fetch, *args, **kwargs):
+        # bad cursors and windows are reported like other illegal requests
+        try:
+            return fetch(*args, **kwargs)
+        except ValueError as e:
+            raise IllegalOperationException(str(e))
+
     # ---------- login / logout ----------
 
+    @timed
     def login(self, username, password):
         if self.logged_in:
             raise DuplicateLoginException()
@@ -86,72 +107,95 @@ class Controller:
 
     # ---------- blog operations ----------
 
+    @timed
     def create_blog(self, id, name, url, email):
         self._ensure_logged_in()
 
-        # cannot have duplicate id
-        if self.blog_dao.search_blog(id):
-            raise IllegalOperationException("duplicate id")
+        # the checks and the write see the same data, even with other
+        # processes writing the same files
+        with self.blog_dao.locked():
+            # cannot have duplicate id
+            if self.blog_dao.search_blog(id):
+                raise IllegalOperationException("duplicate id")
 
-        blog = Blog(id, name, url, email)
-        self.blog_dao.create_blog(blog)
-        return blog
+            blog = Blog(id, name, url, email)
+            self.blog_dao.create_blog(blog)
+            return blog
 
+    @timed
     def search_blog(self, id):
         self._ensure_logged_in()
         return self.blog_dao.search_blog(id)
 
+    @timed
     def retrieve_blogs(self, key):
         self._ensure_logged_in()
         return self.blog_dao.retrieve_blogs(key)
 
+    @timed
     def list_blogs(self):
         self._ensure_logged_in()
         return self.blog_dao.list_blogs()
 
+    @timed
+    def retrieve_blogs_page(self, key, offset=0, limit=None, cursor=None):
+        # skip `offset` blogs and return at most `limit`, starting right
+        # after the page that handed out `cursor`
+        self._ensure_logged_in()
+        return self._page(self.blog_dao.blogs_page, key, offset, limit, cursor)
+
+    @timed
+    def list_blogs_page(self, offset=0, limit=None, cursor=None):
+        self._ensure_logged_in()
+        return self._page(self.blog_dao.blogs_page, None, offset, limit, cursor)
+
+    @timed
     def update_blog(self, old_id, new_id, new_name, new_url, new_email):
         self._ensure_logged_in()
 
-        # cannot update if there are no blogs at all
-        if len(self.blog_dao.list_blogs()) == 0:
-            raise IllegalOperationException("cannot update blog when no blogs are registered")
+        with self.blog_dao.locked():
+            # cannot update if there are no blogs at all
+            if self.blog_dao.count_blogs() == 0:
+                raise IllegalOperationException("cannot update blog when no blogs are registered")
 
-        # cannot update a blog that does not exist
-        blog = self.blog_dao.search_blog(old_id)
-        if blog is None:
-            raise IllegalOperationException("cannot update blog with an ID that is not registered")
+            # cannot update a blog that does not exist
+            blog = self.blog_dao.search_blog(old_id)
+            if blog is None:
+                raise IllegalOperationException("cannot update blog with an ID that is not registered")
 
-        #cannot update current blog
-        if self.current_blog is not None and self.current_blog.id == old_id:
-            raise IllegalOperationException("cannot update the current blog")
+            #cannot update current blog
+            if self.current_blog is not None and self.current_blog.id == old_id:
+                raise IllegalOperationException("cannot update the current blog")
 
-        # new id must be unused (unless unchanged)
-        if new_id != old_id and self.blog_dao.search_blog(new_id):
-            raise IllegalOperationException("cannot update blog with a duplicated ID")
+            # new id must be unused (unless unchanged)
+            if new_id != old_id and self.blog_dao.search_blog(new_id):
+                raise IllegalOperationException("cannot update blog with a duplicated ID")
 
-        return self.blog_dao.update_blog(old_id, new_id, new_name, new_url, new_email)
+            return self.blog_dao.update_blog(old_id, new_id, new_name, new_url, new_email)
 
+    @timed
     def delete_blog(self, id):
         self._ensure_logged_in()
 
-        blogs = self.blog_dao.list_blogs()
-        if len(blogs) == 0:
-            # no blogs at all
-            raise IllegalOperationException("cannot delete blog when no blogs are registered")
+        with self.blog_dao.locked():
+            if self.blog_dao.count_blogs() == 0:
+                # no blogs at all
+                raise IllegalOperationException("cannot delete blog when no blogs are registered")
 
-        blog = self.blog_dao.search_blog(id)
-        if blog is None:
-            # id not registered
-            raise IllegalOperationException("cannot delete blog with an ID that is not registered")
+            blog = self.blog_dao.search_blog(id)
+            if blog is None:
+                # id not registered
+                raise IllegalOperationException("cannot delete blog with an ID that is not registered")
 
-        #ensure blog deletion is not current blog
-        if self.current_blog is not None and self.current_blog.id == id:
-            raise IllegalOperationException("cannot delete the current blog")
+            #ensure blog deletion is not current blog
+            if self.current_blog is not None and self.current_blog.id == id:
+                raise IllegalOperationException("cannot delete the current blog")
 
-        return self.blog_dao.delete_blog(id)
+            return self.blog_dao.delete_blog(id)
 
     # ---------- current blog ----------
 
+    @timed
     def set_current_blog(self, id):
         self._ensure_logged_in()
         blog = self.blog_dao.search_blog(id)
@@ -172,56 +216,273 @@ class Controller:
 
     # ---------- post operations ----------
 
+    @timed
     def create_post(self, title, text):
         self._ensure_logged_in()
         self._ensure_current_blog()
 
+        self._enlist(self.current_blog.post_dao)
         post = Post(0, title, text, datetime.now(), datetime.now())
         # controller_test + integration_test only ever use one blog for posts,
         # so the DAO does not need the blog id here.
         self.current_blog.add_post(post)
         return post
 
+    @timed
     def search_post(self, code):
         self._ensure_logged_in()
         self._ensure_current_blog()
         return self.current_blog.get_post(code)
 
+    @timed
     def retrieve_posts(self, key):
         self._ensure_logged_in()
         self._ensure_current_blog()
 
-        posts = self.current_blog.retrieve_post(key)
-        # tests expect ascending order of codes for retrieve_posts
-        posts.sort(key=lambda p: p.code)
-        return posts
+        # the DAO already returns them in ascending order of codes
+        return self.current_blog.retrieve_post(key)
 
+    @timed
+    def retrieve_posts_page(self, key, offset=0, limit=None, cursor=None):
+        # ascending by code, like retrieve_posts
+        self._ensure_logged_in()
+        self._ensure_current_blog()
+        return self._page(self.current_blog.post_dao.posts_page, key, offset, limit, cursor)
+
+    @timed
     def update_post(self, code, new_title, new_text):
         self._ensure_logged_in()
         self._ensure_current_blog()
 
         # cannot update if there are no posts for that blog in the system
-        if len(self.current_blog.list_posts()) == 0:
+        if self.current_blog.post_dao.count_posts() == 0:
             return False
 
         # Delegate the actual update (and persistence) to the DAO
+        self._enlist(self.current_blog.post_dao)
         return self.current_blog.post_dao.update_post(code, new_title, new_text)
 
+    @timed
     def delete_post(self, code):
         self._ensure_logged_in()
         self._ensure_current_blog()
 
         # if there are no posts at all, we just return False
-        if len(self.current_blog.list_posts()) == 0:
+        if self.current_blog.post_dao.count_posts() == 0:
             return False
 
+        self._enlist(self.current_blog.post_dao)
         return self.current_blog.remove_post(code)
 
+    @timed
     def list_posts(self):
         self._ensure_logged_in()
         self._ensure_current_blog()
 
-        posts = self.current_blog.list_posts()
-        # Tests expect list_posts in descending order of code
-        posts.sort(key=lambda p: p.code, reverse=True)
-        return posts
+        # Tests expect list_posts in descending order of code; the DAO
+        # keeps posts ordered, so this is a walk, not a sort
+        return list(self.current_blog.post_dao.iter_posts(reverse=True))
+
+    @timed
+    def list_posts_page(self, offset=0, limit=None, cursor=None):
+        # descending by code, like list_posts
+        self._ensure_logged_in()
+        self._ensure_current_blog()
+        return self._page(self.current_blog.post_dao.posts_page, None, offset, limit, cursor, reverse=True)
+
+    # ---------- batches ----------
+
+    @contextmanager
+    def batch(self):
+        # with controller.batch(): ... keeps the block's changes in memory
+        # and writes every touched file once when it ends; an exception
+        # undoes them instead. A nested batch is part of the outer one
+        self._ensure_logged_in()
+        if self._batch is not None:
+            yield self
+            return
+
+        self._batch = []
+        current_blog = self.current_blog
+        try:
+            self._enlist(self.blog_dao)
+            yield self
+        except BaseException:
+            daos, self._batch = self._batch, None
+            self._end_batches(daos[::-1], "rollback")
+            self.current_blog = current_blog
+            raise
+        daos, self._batch = self._batch, None
+        error = self._end_batches(daos, "commit")
+        if error is not None:
+            raise error
+
+    def _end_batches(self, daos, end):
+        # every DAO ends its batch (and releases its file lock) even if
+        # another one failed to; the first error is returned
+        error = None
+        for dao in daos:
+            try:
+                getattr(dao, end)()
+            except Exception as e:
+                error = error or e
+        return error
+
+    # ---------- bulk import ----------
+
+    @timed
+    def import_blogs(self, records, chunk_size=None):
+        # records: Blog objects or dicts (see blogging/bulk_import.py),
+        # stored chunk_size at a time with one write per chunk; a bad
+        # record stops the import, the records before it are kept
+        self._ensure_logged_in()
+        chunk_size = Configuration.import_chunk_size if chunk_size is None else chunk_size
+
+        seen = set()
+        chunk = []
+        count = 0
+        try:
+            for number, record in enumerate(records, 1):
+                try:
+                    blog = to_blog(record)
+                except ValueError as e:
+                    raise IllegalOperationException(f"record {number}: {e}")
+                if blog.id in seen or self.blog_dao.search_blog(blog.id):
+                    raise IllegalOperationException(f"record {number}: duplicate id {blog.id}")
+                seen.add(blog.id)
+                chunk.append(blog)
+                if chunk_size and len(chunk) >= chunk_size:
+                    # taken before storing, so a failed write is not
+                    # stored a second time below
+                    stored, chunk = chunk, []
+                    count += self.blog_dao.create_blogs(stored)
+        finally:
+            # only a chunk left over by a bad record (or the end) is stored
+            if chunk:
+                stored, chunk = chunk, []
+                count += self.blog_dao.create_blogs(stored)
+        return count
+
+    @timed
+    def import_posts(self, records, chunk_size=None):
+        # records: Post objects or dicts; a dict's blog_id picks the blog,
+        # the current blog is used otherwise. Posts are buffered per blog
+        # and each buffer is stored with one write once it holds
+        # chunk_size posts and at the end; codes are given by the DAOs
+        self._ensure_logged_in()
+        chunk_size = Configuration.import_chunk_size if chunk_size is None else chunk_size
+
+        # blog id -> (blog, posts waiting to be stored)
+        buffers = {}
+        count = 0
+
+        def store(blog, posts):
+            # the buffer is emptied first, so posts whose write failed are
+            # not stored again by the finally clause below
+            stored = posts[:]
+            del posts[:]
+            self._enlist(blog.post_dao)
+            created = blog.post_dao.create_posts(stored)
+            if len(created) != len(stored):
+                raise IllegalOperationException(f"could not store the posts of blog {blog.id}")
+            return len(created)
+
+        try:
+            for number, record in enumerate(records, 1):
+                try:
+                    blog_id = post_blog_id(record)
+                    post = to_post(record)
+                except ValueError as e:
+                    raise IllegalOperationException(f"record {number}: {e}")
+
+                if blog_id is None:
+                    self._ensure_current_blog()
+                    blog_id = self.current_blog.id
+                entry = buffers.get(blog_id)
+                if entry is None:
+                    if self.current_blog is not None and self.current_blog.id == blog_id:
+                        blog = self.current_blog
+                    else:
+                        blog = self.blog_dao.search_blog(blog_id)
+                    if blog is None or blog.id != blog_id:
+                        raise IllegalOperationException(f"record {number}: no blog with id {blog_id}")
+                    entry = buffers[blog_id] = (blog, [])
+
+                entry[1].append(post)
+                if chunk_size and len(entry[1]) >= chunk_size:
+                    count += store(*entry)
+        finally:
+            for blog, posts in buffers.values():
+                if posts:
+                    count += store(blog, posts)
+        return count
+
+    # ---------- export ----------
+
+    def export(self):
+        # NDJSON lines of every blog and its posts (see
+        # blogging/bulk_export.py), produced as they are read; changes
+        # made while the lines are consumed may or may not be in them
+        self._ensure_logged_in()
+        return export_lines(self._export_blogs(), self._export_posts)
+
+    def _export_blogs(self):
+        # walk the blogs a page at a time, so the sqlite backend never
+        # holds the whole table
+        cursor = None
+        while True:
+            page = self.blog_dao.blogs_page(limit=Configuration.export_batch_size, cursor=cursor)
+            yield from page
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def _export_posts(self, blog):
+        # read a page at a time like the blogs, so calls made between two
+        # pages (AsyncController.export) never change what is being
+        # walked. Posts of a blog that was not open before are dropped
+        # again afterwards, so only one blog's posts are held at a time
+        loaded = blog.posts_loaded()
+        cursor = None
+        try:
+            while True:
+                page = blog.post_dao.posts_page(limit=Configuration.export_batch_size, cursor=cursor)
+                yield from page
+                if page.next_cursor is None:
+                    return
+                cursor = page.next_cursor
+        finally:
+            if not loaded:
+                blog.unload_posts()
+
+    # performance statistics (see blogging/stats.py); they are process-wide,
+    # not per user, and only recorded while collection is on
+
+    def stats(self):
+        # operation name -> counters
+        self._ensure_logged_in()
+        return STATS.snapshot()
+
+    def stats_report(self):
+        self._ensure_logged_in()
+        return f"{STATS.report()}\n\n{POST_CACHE.report()}"
+
+    def post_cache_stats(self):
+        # hits, misses, evictions and what is loaded (see post_collection_cache.py)
+        self._ensure_logged_in()
+        return POST_CACHE.stats()
+
+    def stats_enabled(self):
+        return STATS.enabled
+
+    def collect_stats(self, enabled):
+        self._ensure_logged_in()
+        if enabled:
+            STATS.enable()
+        else:
+            STATS.disable()
+
+    def reset_stats(self):
+        self._ensure_logged_in()
+        STATS.reset()
+        POST_CACHE.reset()
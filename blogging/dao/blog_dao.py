@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from blogging.dao.page import decode_cursor, make_page
 class BlogDAO(ABC):
+    # changes with every create/update/delete (see generation.py)
+    generation = 0
     @abstractmethod
     def search_blog(self, key):
         pass
@@ -18,4 +22,36 @@ class BlogDAO(ABC):
     @abstractmethod
     def list_blogs(self):
         pass
-
+    def create_blogs(self, blogs):
+        # bulk insert; engines override this to persist once
+        count = 0
+        for blog in blogs:
+            self.create_blog(blog)
+            count += 1
+        return count
+    # batches: begin() starts an undo log and holds persistence back,
+    # commit() writes what changed once, rollback() undoes the changes
+    @abstractmethod
+    def begin(self):
+        pass
+    @abstractmethod
+    def commit(self):
+        pass
+    @abstractmethod
+    def rollback(self):
+        pass
+    def locked(self):
+        # hold the store's write lock, up to date with other processes'
+        # writes; engines whose files can be shared override it
+        return nullcontext()
+    def count_blogs(self):
+        return len(self.list_blogs())
+    def iter_blogs(self, search_string=None, after=None):
+        # (position, blog) pairs in listing order, after the given position
+        blogs = self.retrieve_blogs(search_string) if search_string else self.list_blogs()
+        start = 0 if after is None else after + 1
+        return ((i, blogs[i]) for i in range(start, len(blogs)))
+    def blogs_page(self, search_string=None, offset=0, limit=None, cursor=None):
+        scope = ["blogs", search_string or ""]
+        after = decode_cursor(cursor, scope)
+        return make_page(self.iter_blogs(search_string, after), offset, limit, scope)
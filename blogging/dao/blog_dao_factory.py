@@ -0,0 +1,12 @@
+from blogging.configuration import Configuration
+
+
+def create_blog_dao(autosave=True):
+    """Return the blog DAO selected by Configuration.storage_backend."""
+    # backends are imported on first use, so sqlite3 is only loaded
+    # when it is actually configured
+    if Configuration.storage_backend == "sqlite":
+        from blogging.dao.blog_dao_sqlite import BlogDAOSQLite
+        return BlogDAOSQLite(autosave)
+    from blogging.dao.blog_dao_json import BlogDAOJSON
+    return BlogDAOJSON(autosave)
@@ -1,11 +1,22 @@
+import bisect
 import json
 import os
+import shutil
+import time
+import zlib
+from contextlib import contextmanager
 
 from blogging.blog import Blog
 from blogging.configuration import Configuration
 from blogging.dao.blog_dao import BlogDAO
 from blogging.dao.blog_encoder import BlogEncoder
 from blogging.dao.blog_decoder import BlogDecoder
+from blogging.dao.blog_stream import BlogStream
+from blogging.dao.durable_file import GroupCommit, atomic_write, durable_append
+from blogging.dao.file_lock import file_lock, signature
+from blogging.dao.generation import next_generation
+from blogging.dao.trigram_index import TrigramIndex, blog_fields
+from blogging.stats import count_io, timed
 
 class BlogDAOJSON(BlogDAO):
     """
@@ -16,16 +27,70 @@ class BlogDAOJSON(BlogDAO):
         * we ignore any existing blogs.json on disk
     - If autosave == True:
         * blogs are loaded from blogs.json in the constructor
-        * every create/update/delete writes the whole list back to file
+        * without the journal, every create/update/delete writes the
+          whole list back to file
+        * with the journal (Configuration.blogs_journal), every mutation
+          appends one small record to blogs.json.journal instead; the
+          journal is replayed on top of blogs.json when loading and is
+          folded back into a fresh blogs.json once it reaches
+          Configuration.journal_compact_threshold records
+        * files are replaced through a temp file + fsync + rename, and
+          mutations arriving within Configuration.group_commit_window
+          seconds are flushed together
+        * several processes can share the files: writes hold the
+          blogs.json.lock file lock, and before a write (and at most every
+          Configuration.change_check_interval seconds before a read) the
+          DAO picks up what others wrote - only the new journal records
+          while blogs.json is unchanged, a full reload otherwise
     """
 
     def __init__(self, autosave=True):
         cfg = Configuration()
         self.autosave = autosave
         self.file_path = cfg.__class__.blogs_file
+        self.journal = cfg.__class__.blogs_journal
+        self.journal_path = self.file_path + cfg.__class__.journal_extension
+        self.compact_threshold = cfg.__class__.journal_compact_threshold
 
-        # in-memory list of Blog objects
-        self._blogs = []
+        # in-memory Blog objects keyed by an insertion sequence number;
+        # dicts keep insertion order, so iterating gives the list order
+        self._blogs = {}
+        self._next_seq = 0
+        # the sequence numbers in order, so paging can bisect to a cursor
+        self._order = []
+        # new number on every change of the list
+        self.generation = next_generation()
+
+        # exact-match indexes: id / name / url -> sorted list of sequence
+        # numbers, so search_blog still returns the earliest match
+        self._by_id = {}
+        self._by_name = {}
+        self._by_url = {}
+        # substring index for retrieve_blogs, built on the first search
+        self._trigrams = None
+
+        # number of records currently sitting in the journal
+        self._journal_records = 0
+        # checksum of the blogs.json the journal was started against
+        self._snapshot_crc = None
+
+        # what was last read or written, to spot other processes' writes:
+        # signature of blogs.json, inode of the journal and how many of
+        # its bytes are applied
+        self._lock = file_lock(self.file_path + ".lock")
+        self._snapshot_sig = None
+        self._journal_ino = None
+        self._journal_offset = 0
+        self._checked_at = 0.0
+
+        # journal records / full rewrite waiting for the next flush
+        self._pending = []
+        self._dirty = False
+        # error of the last write that failed
+        self.write_error = None
+        self._commit = GroupCommit(self._flush)
+        # inside a batch: in-memory changes to undo on rollback
+        self._undo = None
 
         if self.autosave:
             # make sure the directory exists
@@ -33,109 +98,553 @@ class BlogDAOJSON(BlogDAO):
             if dir_name and not os.path.exists(dir_name):
                 os.makedirs(dir_name, exist_ok=True)
 
-            # if file exists, load it; otherwise create empty file
-            if os.path.exists(self.file_path):
-                self._blogs = self._read_all()
-            else:
-                self._write_all([])
+            with self._lock:
+                self._load()
+            self._checked_at = time.monotonic()
 
         # when autosave is False we simply start with an empty list and
         # never touch the file system – controller tests rely on that.
 
     # ---------- internal helpers ----------
 
+    @timed
+    def _load(self):
+        # if file exists, load it; otherwise create empty file
+        if os.path.exists(self.file_path):
+            self._snapshot_sig = signature(self.file_path)
+            for blog in self._read_all():
+                self._add(blog)
+            if self.journal:
+                self._replay_journal()
+        else:
+            # a journal without its snapshot is left over from an
+            # older store and must not be replayed on an empty one
+            self._remove_journal()
+            self._write_all([])
+
     def _read_all(self):
+        """
+        Yield the blogs of blogs.json one by one, parsing the file
+        incrementally so the whole document is never held in memory.
+        """
+        stream = BlogStream(self.file_path)
         try:
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                data = json.load(f, cls=BlogDecoder)
-            # json.load may return a single Blog or a list; normalize to list
-            if isinstance(data, list):
-                return [b for b in data if isinstance(b, Blog)]
-            elif isinstance(data, Blog):
-                return [data]
-            else:
-                return []
-        except (IOError, json.JSONDecodeError):
-            # if something goes wrong, treat as empty collection
-            return []
+            yield from stream
+            self._snapshot_crc = stream.crc
+        except IOError:
+            return
+        except ValueError:
+            # keep the blogs read so far plus a copy of the unreadable
+            # file before the next write replaces it
+            shutil.copyfile(self.file_path, self.file_path + ".corrupt")
+            with open(self.file_path, "rb") as f:
+                self._snapshot_crc = zlib.crc32(f.read())
 
+    @timed
     def _write_all(self, blogs):
         if not self.autosave:
             # in non-persistent mode we never touch the disk
             return
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(blogs, f, cls=BlogEncoder, indent=2)
+        raw = json.dumps(blogs, cls=BlogEncoder, indent=2).encode("utf-8")
+        atomic_write(self.file_path, raw)
+        self._snapshot_crc = zlib.crc32(raw)
+        self._snapshot_sig = signature(self.file_path)
+        self._dirty = False
+        if self.journal:
+            self._start_journal()
+
+    # ---------- journal helpers ----------
+
+    def _start_journal(self):
+        """Start an empty journal tied to the snapshot just written."""
+        self._rewrite_journal([])
+
+    def _rewrite_journal(self, lines):
+        header = json.dumps({"snapshot": self._snapshot_crc})
+        atomic_write(self.journal_path, "".join(l + "\n" for l in [header] + lines).encode("utf-8"))
+        self._journal_records = len(lines)
+        self._mark_journal()
+        # whatever was pending is part of the new snapshot / journal
+        self._pending = []
+
+    def _remove_journal(self):
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._journal_records = 0
+        self._journal_ino = None
+        self._journal_offset = 0
+
+    def _mark_journal(self, offset=None):
+        """Remember the journal file and how far it has been applied (default: all of it)."""
+        st = os.stat(self.journal_path)
+        self._journal_ino = st.st_ino
+        self._journal_offset = st.st_size if offset is None else offset
+
+    @timed
+    def _replay_journal(self):
+        """Apply the journal records on top of the loaded snapshot."""
+        if not os.path.exists(self.journal_path):
+            self._start_journal()
+            return
+
+        with open(self.journal_path, "rb") as f:
+            raw = f.read()
+        count_io(read=len(raw), opens=1)
+        lines = raw.decode("utf-8").splitlines()
+
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            header = {}
+        if not isinstance(header, dict) or header.get("snapshot") != self._snapshot_crc:
+            # the journal belongs to another snapshot (for example a crash
+            # between writing blogs.json and resetting the journal), so its
+            # records are already folded in or not ours to apply
+            self._start_journal()
+            return
+
+        count = 0
+        for line in lines[1:]:
+            try:
+                record = json.loads(line, cls=BlogDecoder)
+            except ValueError:
+                # a torn last line from an interrupted append; drop it so
+                # the next append does not get glued onto it
+                self._rewrite_journal(lines[1:count + 1])
+                break
+            self._apply(record)
+            count += 1
+        else:
+            self._mark_journal(len(raw))
+        self._journal_records = count
+
+        if self._journal_records >= self.compact_threshold:
+            self.compact()
+
+    def _apply(self, record):
+        op = record.get("op")
+        if op == "create":
+            self._add(record["blog"])
+        elif op == "update":
+            self._replace(record["key"], record["blog"])
+        elif op == "delete":
+            self._remove(record["key"])
+
+    @timed
+    def _read_journal_tail(self):
+        """
+        Apply the records other processes appended to the journal since it
+        was last read. Returns False if the journal was replaced or cut
+        instead, so only a full reload can catch up.
+        """
+        try:
+            st = os.stat(self.journal_path)
+        except OSError:
+            return False
+        if st.st_ino != self._journal_ino or st.st_size < self._journal_offset:
+            return False
+        if st.st_size == self._journal_offset:
+            return True
+
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._journal_offset)
+            raw = f.read(st.st_size - self._journal_offset)
+        count_io(read=len(raw), opens=1)
+        # an append still being written has no newline yet
+        end = raw.rfind(b"\n") + 1
+        for line in raw[:end].decode("utf-8").splitlines():
+            try:
+                record = json.loads(line, cls=BlogDecoder)
+            except ValueError:
+                return False
+            self._apply(record)
+            self._journal_records += 1
+        self._journal_offset += end
+        return True
+
+    @timed
+    def _append_journal(self, records):
+        data = "".join(json.dumps(r, cls=BlogEncoder) + "\n" for r in records).encode("utf-8")
+        durable_append(self.journal_path, data)
+        # callers hold the file lock and caught up first, so everything
+        # up to the new end of the journal is applied
+        self._journal_offset += len(data)
+        self._journal_records += len(records)
+
+    def _persist(self, *records):
+        """
+        Queue mutations for the next flush (journal entries or a full
+        rewrite). Raises the write error if an immediate flush fails.
+        """
+        if not self.autosave:
+            return
+        # the records are also kept without the journal, to be applied
+        # again if another process rewrote blogs.json in the meantime
+        self._pending.extend(records)
+        if not self.journal:
+            self._dirty = True
+        if self._undo is None and not self._commit.request():
+            # the changes stay in memory and queued, so a later flush()
+            # can still write them
+            raise self.write_error
+
+    @timed
+    def _flush(self):
+        """Write everything queued since the last flush in one go."""
+        try:
+            with self._lock:
+                records, self._pending = self._pending, []
+                try:
+                    if records:
+                        self._catch_up(records)
+                    if self.journal and records:
+                        self._append_journal(records)
+                    elif self._dirty:
+                        self._write_all(list(self._blogs.values()))
+                except Exception:
+                    # not written: queue them again, ahead of any newer ones
+                    self._pending[:0] = records
+                    raise
+                if self.journal and self._journal_records >= self.compact_threshold:
+                    self.compact()
+            self.write_error = None
+            return True
+
+        except Exception as e:
+            # kept for flush() / commit() callers; a timer flush has no
+            # one to report to
+            self.write_error = e
+            return False
+
+    # ---------- other processes ----------
+
+    def _reload(self):
+        """Read the files again; blogs that did not change keep their Blog object."""
+        old = {b.id: b for b in self._blogs.values()}
+        self._blogs = {}
+        self._order = []
+        self._by_id = {}
+        self._by_name = {}
+        self._by_url = {}
+        self._trigrams = None
+        self._journal_records = 0
+        self._snapshot_sig = None
+        self._load()
+        for seq, blog in self._blogs.items():
+            kept = old.get(blog.id)
+            if kept is not None and kept == blog:
+                # its posts may already be open
+                self._blogs[seq] = kept
+        self.generation = next_generation()
+
+    def _catch_up(self, records=()):
+        """
+        Bring memory up to date with the files; records are changes made
+        here but not written yet, applied again after a full reload.
+        The caller holds the file lock.
+        """
+        self._checked_at = time.monotonic()
+        if signature(self.file_path) == self._snapshot_sig:
+            if not self.journal or self._read_journal_tail():
+                return
+        self._reload()
+        for record in records:
+            self._apply(record)
+
+    def _refresh(self):
+        """Pick up other processes' writes, unless changes made here are still unwritten."""
+        if not self.autosave or self._pending or self._dirty or self._undo is not None:
+            return
+        with self._lock:
+            self._catch_up()
+
+    def _check(self):
+        # reads look at the files at most every change_check_interval seconds
+        if self.autosave and time.monotonic() - self._checked_at >= Configuration.change_check_interval:
+            self._refresh()
+
+    @contextmanager
+    def locked(self):
+        with self._commit.lock, self._lock:
+            self._refresh()
+            yield
+
+    def flush(self):
+        """Write out a flush that is still waiting for its group-commit window."""
+        with self._commit.lock:
+            if (self._pending or self._dirty) and self._undo is None and not self._commit.pending():
+                # a write that failed earlier
+                return self._flush()
+            return self._commit.flush_now()
+
+    @timed
+    def compact(self):
+        """Fold the journal into a fresh blogs.json and reset the journal."""
+        with self._commit.lock, self._lock:
+            self._write_all(list(self._blogs.values()))
+
+    # ---------- index helpers ----------
+
+    @staticmethod
+    def _index_add(index, key, seq):
+        seqs = index.get(key)
+        if seqs is None:
+            index[key] = [seq]
+        elif seq > seqs[-1]:
+            seqs.append(seq)
+        else:
+            bisect.insort(seqs, seq)
+
+    @staticmethod
+    def _index_remove(index, key, seq):
+        seqs = index.get(key)
+        if seqs is None:
+            return
+        i = bisect.bisect_left(seqs, seq)
+        if i < len(seqs) and seqs[i] == seq:
+            del seqs[i]
+        if not seqs:
+            del index[key]
+
+    def _index_blog(self, seq, blog):
+        self._index_add(self._by_id, blog.id, seq)
+        self._index_add(self._by_name, blog.name, seq)
+        self._index_add(self._by_url, blog.url, seq)
+
+    def _unindex_blog(self, seq, blog):
+        self._index_remove(self._by_id, blog.id, seq)
+        self._index_remove(self._by_name, blog.name, seq)
+        self._index_remove(self._by_url, blog.url, seq)
+
+    def _seq_of(self, key):
+        """Sequence number of the first blog whose id == key, or None."""
+        seqs = self._by_id.get(key)
+        return seqs[0] if seqs else None
+
+    # ---------- in-memory mutations ----------
+
+    def _add(self, blog):
+        seq = self._next_seq
+        self._next_seq += 1
+        if self._undo is not None:
+            self._undo.append(("add", seq, None))
+        self._blogs[seq] = blog
+        self._order.append(seq)
+        self._index_blog(seq, blog)
+        if self._trigrams is not None:
+            self._trigrams.add(seq, blog)
+        self.generation = next_generation()
+
+    def _replace(self, key, blog):
+        seq = self._seq_of(key)
+        if seq is None:
+            return False
+        # the blog keeps its position in the list
+        old = self._blogs[seq]
+        if self._undo is not None:
+            self._undo.append(("replace", seq, old))
+        self._unindex_blog(seq, old)
+        self._blogs[seq] = blog
+        self._index_blog(seq, blog)
+        if self._trigrams is not None:
+            self._trigrams.replace(seq, old, blog)
+        self.generation = next_generation()
+        return True
+
+    def _remove(self, key):
+        seq = self._seq_of(key)
+        if seq is None:
+            return False
+        old = self._blogs.pop(seq)
+        del self._order[bisect.bisect_left(self._order, seq)]
+        if self._undo is not None:
+            self._undo.append(("remove", seq, old))
+        self._unindex_blog(seq, old)
+        if self._trigrams is not None:
+            self._trigrams.remove(seq, old)
+        self.generation = next_generation()
+        return True
+
+    # ---------- batches ----------
+
+    def begin(self):
+        """
+        Start a batch: changes are undo-logged and not persisted until
+        commit(). The file lock is held until the batch ends, so other
+        processes see all of it or none of it.
+        """
+        with self._commit.lock:
+            # write out what came before, so the batch's changes are all
+            # that is pending when it ends
+            self._commit.flush_now()
+            if self.autosave:
+                self._lock.acquire()
+                self._catch_up()
+            self._undo = []
+
+    def commit(self):
+        """
+        End the batch and persist its changes with one flush.
+        Raises the write error if that write fails.
+        """
+        with self._commit.lock:
+            try:
+                self._undo = None
+                if (self._pending or self._dirty) and not self._commit.request():
+                    # the changes stay in memory and queued, so a later
+                    # flush() can still write them
+                    raise self.write_error
+            finally:
+                if self.autosave:
+                    self._lock.release()
+
+    def rollback(self):
+        """End the batch and undo its changes; nothing was written."""
+        with self._commit.lock:
+            if self.autosave:
+                self._lock.release()
+            undo, self._undo = self._undo or [], None
+            reinserted = False
+            for op, seq, old in reversed(undo):
+                if op == "add":
+                    blog = self._blogs.pop(seq)
+                    del self._order[bisect.bisect_left(self._order, seq)]
+                    self._unindex_blog(seq, blog)
+                    if self._trigrams is not None:
+                        self._trigrams.remove(seq, blog)
+                elif op == "replace":
+                    blog = self._blogs[seq]
+                    self._unindex_blog(seq, blog)
+                    self._blogs[seq] = old
+                    self._index_blog(seq, old)
+                    if self._trigrams is not None:
+                        self._trigrams.replace(seq, blog, old)
+                else:
+                    self._blogs[seq] = old
+                    bisect.insort(self._order, seq)
+                    self._index_blog(seq, old)
+                    if self._trigrams is not None:
+                        self._trigrams.add(seq, old)
+                    reinserted = True
+            if reinserted:
+                # the list order is the sequence order
+                self._blogs = dict(sorted(self._blogs.items()))
+            self._pending = []
+            self._dirty = False
+            self.generation = next_generation()
 
     # ---------- DAO operations ----------
 
+    @timed
     def search_blog(self, key):
         """Return a blog whose id, name or url matches key, or None."""
-        for b in self._blogs:
-            if b.id == key or b.name == key or b.url == key:
-                return b
-        return None
+        self._check()
+        try:
+            candidates = [
+                seqs[0]
+                for seqs in (self._by_id.get(key), self._by_name.get(key), self._by_url.get(key))
+                if seqs
+            ]
+        except TypeError:
+            # unhashable keys cannot match any id, name or url
+            return None
+        if not candidates:
+            return None
+        return self._blogs[min(candidates)]
 
+    @timed
     def create_blog(self, blog):
         """Append a new blog and persist if autosave is enabled."""
-        self._blogs.append(blog)
-        self._write_all(self._blogs)
+        with self.locked():
+            self._add(blog)
+            self._persist({"op": "create", "blog": blog})
         return True
 
+    @timed
+    def create_blogs(self, blogs):
+        """Append several blogs and persist them with one flush."""
+        with self.locked():
+            records = []
+            for blog in blogs:
+                self._add(blog)
+                records.append({"op": "create", "blog": blog})
+            if records:
+                self._persist(*records)
+        return len(records)
+
+    @timed
     def retrieve_blogs(self, search_string):
         """
         Return blogs whose id/name/url/email contains search_string
         (case-insensitive). Empty search_string returns all blogs.
         """
         if not search_string:
-            return list(self._blogs)
+            return self.list_blogs()
+        self._check()
+        return [b for _, b in self.iter_blogs(search_string)]
+
+    def iter_blogs(self, search_string=None, after=None):
+        """
+        Yield (sequence number, blog) in list order, starting after the
+        given sequence number; with a search string only matching blogs
+        are yielded and the trigram hits are checked one at a time.
+        """
+        self._check()
+        if not search_string:
+            if after is None:
+                yield from self._blogs.items()
+                return
+            order = self._order
+            i = bisect.bisect_right(order, after)
+            while i < len(order):
+                seq = order[i]
+                i += 1
+                yield seq, self._blogs[seq]
+            return
 
         s = str(search_string).lower()
-        result = []
-        for b in self._blogs:
-            if (
-                s in str(b.id).lower()
-                or s in b.name.lower()
-                or s in b.url.lower()
-                or s in b.email.lower()
-            ):
-                result.append(b)
-        return result
+        if self._trigrams is None:
+            self._trigrams = TrigramIndex.build(self._blogs.items())
+
+        seqs = self._trigrams.candidates(s)
+        start = 0 if after is None else bisect.bisect_right(seqs, after)
+        for i in range(start, len(seqs)):
+            b = self._blogs[seqs[i]]
+            if any(s in value for value in blog_fields(b)):
+                yield seqs[i], b
 
+    @timed
     def update_blog(self, key, new_id, new_name, new_url, new_email):
         """
         Replace the blog whose id == key with a new Blog.
         Returns True if something was updated, False otherwise.
         """
-        updated = False
-        for i, b in enumerate(self._blogs):
-            if b.id == key:
-                self._blogs[i] = Blog(new_id, new_name, new_url, new_email)
-                updated = True
-                break
-
-        if updated:
-            self._write_all(self._blogs)
+        blog = Blog(new_id, new_name, new_url, new_email)
+        with self.locked():
+            updated = self._replace(key, blog)
+            if updated:
+                self._persist({"op": "update", "key": key, "blog": blog})
         return updated
 
+    @timed
     def delete_blog(self, key):
         """
         Delete the blog whose id == key.
         Returns True if something was deleted, False otherwise.
         """
-        deleted = False
-        new_list = []
-        for b in self._blogs:
-            if not deleted and b.id == key:
-                deleted = True
-                continue
-            new_list.append(b)
-
-        if deleted:
-            self._blogs = new_list
-            self._write_all(self._blogs)
-
+        with self.locked():
+            deleted = self._remove(key)
+            if deleted:
+                self._persist({"op": "delete", "key": key})
         return deleted
 
+    @timed
     def list_blogs(self):
         """Return a shallow copy of the current blog list."""
-        return list(self._blogs)
+        self._check()
+        return list(self._blogs.values())
+
+    def count_blogs(self):
+        """Return the number of blogs without copying the list."""
+        self._check()
+        return len(self._blogs)
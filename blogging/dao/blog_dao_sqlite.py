@@ -0,0 +1,157 @@
+from blogging.blog import Blog
+from blogging.dao.blog_dao import BlogDAO
+from blogging.dao.page import check_window, decode_cursor, make_page
+from blogging.dao.sqlite_store import SQLiteStore, get_store
+from blogging.stats import timed
+
+
+class BlogDAOSQLite(BlogDAO):
+    """
+    Blog DAO backed by the sqlite3 database in Configuration.sqlite_file.
+
+    - If autosave == False:
+        * blogs live in a private in-memory database
+    - If autosave == True:
+        * blogs are rows of the blogs table; id, name and url are indexed
+          and every create/update/delete only touches its own row
+        * the seq column keeps the order blogs were created in
+    """
+
+    _COLUMNS = "id, name, url, email"
+
+    def __init__(self, autosave=True):
+        self.autosave = autosave
+        self.store = get_store() if autosave else SQLiteStore(":memory:")
+
+    @property
+    def generation(self):
+        # any write to the database counts as a change
+        return self.store.generation
+
+    # ---------- internal helpers ----------
+
+    @staticmethod
+    def _to_blog(row):
+        return Blog(row[0], row[1], row[2], row[3])
+
+    def _seq_of(self, key):
+        row = self.store.query_one(
+            "SELECT seq FROM blogs WHERE id = ? ORDER BY seq LIMIT 1", (key,))
+        return row[0] if row else None
+
+    # ---------- batches ----------
+
+    def begin(self):
+        self.store.begin()
+
+    def commit(self):
+        self.store.end(True)
+        return True
+
+    def rollback(self):
+        self.store.end(False)
+
+    # ---------- DAO operations ----------
+
+    @timed
+    def search_blog(self, key):
+        """Return a blog whose id, name or url matches key, or None."""
+        try:
+            row = self.store.query_one(
+                f"SELECT {self._COLUMNS} FROM blogs WHERE id = ? OR name = ? OR url = ? "
+                "ORDER BY seq LIMIT 1", (key, key, key))
+        except Exception:
+            # keys sqlite cannot bind cannot match any id, name or url
+            return None
+        return self._to_blog(row) if row else None
+
+    @timed
+    def create_blog(self, blog):
+        """Insert a new blog row."""
+        self.store.execute(
+            "INSERT INTO blogs (id, name, url, email) VALUES (?, ?, ?, ?)",
+            (blog.id, blog.name, blog.url, blog.email))
+        return True
+
+    @timed
+    def create_blogs(self, blogs):
+        """Insert several blog rows in one transaction."""
+        return self.store.execute_many(
+            "INSERT INTO blogs (id, name, url, email) VALUES (?, ?, ?, ?)",
+            [(b.id, b.name, b.url, b.email) for b in blogs])
+
+    @timed
+    def retrieve_blogs(self, search_string):
+        """
+        Return blogs whose id/name/url/email contains search_string
+        (case-insensitive). Empty search_string returns all blogs.
+        """
+        if not search_string:
+            return self.list_blogs()
+
+        s = str(search_string).lower()
+        rows = self.store.query(
+            f"SELECT {self._COLUMNS} FROM blogs WHERE contains_ci(id, ?) OR contains_ci(name, ?) "
+            "OR contains_ci(url, ?) OR contains_ci(email, ?) ORDER BY seq", (s, s, s, s))
+        return [self._to_blog(r) for r in rows]
+
+    @timed
+    def update_blog(self, key, new_id, new_name, new_url, new_email):
+        """
+        Replace the data of the blog whose id == key, keeping its position.
+        Returns True if something was updated, False otherwise.
+        """
+        seq = self._seq_of(key)
+        if seq is None:
+            return False
+        self.store.execute(
+            "UPDATE blogs SET id = ?, name = ?, url = ?, email = ? WHERE seq = ?",
+            (new_id, new_name, new_url, new_email, seq))
+        return True
+
+    @timed
+    def delete_blog(self, key):
+        """
+        Delete the blog whose id == key.
+        Returns True if something was deleted, False otherwise.
+        """
+        seq = self._seq_of(key)
+        if seq is None:
+            return False
+        self.store.execute("DELETE FROM blogs WHERE seq = ?", (seq,))
+        return True
+
+    @timed
+    def list_blogs(self):
+        """Return every blog in creation order."""
+        rows = self.store.query(f"SELECT {self._COLUMNS} FROM blogs ORDER BY seq")
+        return [self._to_blog(r) for r in rows]
+
+    @timed
+    def blogs_page(self, search_string=None, offset=0, limit=None, cursor=None):
+        """One page of list/retrieve results; sqlite skips and limits the rows."""
+        scope = ["blogs", search_string or ""]
+        after = decode_cursor(cursor, scope)
+        check_window(offset, limit)
+
+        where, params = [], []
+        if search_string:
+            s = str(search_string).lower()
+            where.append("(contains_ci(id, ?) OR contains_ci(name, ?) "
+                         "OR contains_ci(url, ?) OR contains_ci(email, ?))")
+            params += [s, s, s, s]
+        if after is not None:
+            where.append("seq > ?")
+            params.append(after)
+        sql = f"SELECT seq, {self._COLUMNS} FROM blogs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY seq LIMIT ? OFFSET ?"
+        # one extra row tells whether there is a next page
+        params += [-1 if limit is None else limit + 1, offset]
+
+        rows = self.store.query(sql, params)
+        return make_page(((r[0], self._to_blog(r[1:])) for r in rows), 0, limit, scope)
+
+    def count_blogs(self):
+        return self.store.query_one("SELECT COUNT(*) FROM blogs")[0]
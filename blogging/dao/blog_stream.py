@@ -0,0 +1,131 @@
+import codecs
+import json
+import zlib
+
+from blogging.blog import Blog
+from blogging.dao.blog_decoder import BlogDecoder
+from blogging.stats import count_io
+
+
+class BlogStream:
+    """
+    Incremental reader for a blogs.json catalog.
+
+    The top-level array is parsed one element at a time from fixed-size
+    chunks, and every entry is yielded as a Blog as soon as it has been
+    read, so memory use does not depend on the size of the file:
+
+        for blog in BlogStream("bloggingJSON/blogs.json"):
+            ...
+
+    After a complete pass, `crc` holds the crc32 of the raw file bytes
+    (the journal uses it to recognise its snapshot). Malformed input
+    raises ValueError, after the entries read so far have been yielded.
+    """
+
+    def __init__(self, path, chunk_size=64 * 1024):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.crc = None
+
+    def __iter__(self):
+        decoder = BlogDecoder()
+        text_decoder = codecs.getincrementaldecoder("utf-8")()
+        crc = 0
+
+        with open(self.path, "rb") as f:
+            count_io(opens=1)
+            buf = ""
+            pos = 0
+            eof = False
+
+            def more():
+                # append the next chunk to the buffer; False at end of file
+                nonlocal buf, pos, crc, eof
+                if eof:
+                    return False
+                raw = f.read(self.chunk_size)
+                count_io(read=len(raw))
+                crc = zlib.crc32(raw, crc)
+                if not raw:
+                    eof = True
+                    buf += text_decoder.decode(b"", final=True)
+                    return False
+                # drop what has been consumed so the buffer stays small
+                buf = buf[pos:] + text_decoder.decode(raw)
+                pos = 0
+                return True
+
+            def skip_ws():
+                nonlocal pos
+                while True:
+                    while pos < len(buf) and buf[pos] in " \t\r\n":
+                        pos += 1
+                    if pos < len(buf) or not more():
+                        return
+
+            skip_ws()
+            if pos >= len(buf):
+                # empty file
+                raise json.JSONDecodeError("Expecting value", buf, pos)
+
+            if buf[pos] != "[":
+                # not an array: a single value, read it as a whole
+                while more():
+                    pass
+                value = decoder.decode(buf[pos:])
+                if isinstance(value, Blog):
+                    yield value
+                self.crc = crc
+                return
+
+            pos += 1
+            skip_ws()
+            if pos < len(buf) and buf[pos] == "]":
+                self._finish(more)
+                self.crc = crc
+                return
+
+            while True:
+                skip_ws()
+                while True:
+                    try:
+                        value, end = decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        # the element is cut by the end of the buffer
+                        if more():
+                            continue
+                        raise
+                    # a value ending right at the buffer end (e.g. a number)
+                    # may continue in the next chunk
+                    if end == len(buf) and more():
+                        continue
+                    break
+                pos = end
+                if isinstance(value, Blog):
+                    yield value
+
+                skip_ws()
+                if pos >= len(buf):
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+                if buf[pos] == ",":
+                    pos += 1
+                    continue
+                if buf[pos] == "]":
+                    pos += 1
+                    break
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+
+            self._finish(more)
+            self.crc = crc
+
+    @staticmethod
+    def _finish(more):
+        # read to the end so the checksum covers the whole file
+        while more():
+            pass
+
+
+def iter_blogs(path, chunk_size=64 * 1024):
+    """Yield the Blog entries of a blogs.json file one at a time."""
+    return iter(BlogStream(path, chunk_size))
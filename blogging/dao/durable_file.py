@@ -0,0 +1,126 @@
+import atexit
+import os
+import threading
+import weakref
+
+from blogging.configuration import Configuration
+from blogging.stats import count_io
+
+
+def _fsync_dir(dir_name):
+    """Make a rename inside dir_name durable (POSIX only)."""
+    if not Configuration.fsync or os.name != "posix":
+        return
+    fd = os.open(dir_name or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, data):
+    """
+    Replace path with data (bytes) so that readers and crashes only ever
+    see the old or the new contents: write a temp file next to it, fsync
+    it, then rename it over the original.
+    """
+    dir_name = os.path.dirname(path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            if Configuration.fsync:
+                os.fsync(f.fileno())
+        count_io(written=len(data), opens=1)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(dir_name)
+
+
+def durable_append(path, data):
+    """Append data (bytes) to path and fsync it."""
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        if Configuration.fsync:
+            os.fsync(f.fileno())
+    count_io(written=len(data), opens=1)
+
+
+def fsync_file(path):
+    """fsync a file that was written without syncing."""
+    if not Configuration.fsync or not os.path.exists(path):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# commits with a flush still pending, flushed when the interpreter exits
+_pending_commits = weakref.WeakSet()
+
+
+class GroupCommit:
+    """
+    Merges bursts of persistence requests into one flush.
+
+    - window <= 0: every request() flushes right away and returns the
+      flush result
+    - window > 0: the first request() schedules a flush `window` seconds
+      later; requests arriving before it runs ride along with it
+
+    Callers must hold `lock` while they change the data the flush writes,
+    since a deferred flush runs on a timer thread.
+    """
+
+    def __init__(self, flush, window=None):
+        self._flush = flush
+        self.window = Configuration.group_commit_window if window is None else window
+        self.lock = threading.RLock()
+        self._timer = None
+
+    def request(self):
+        if self.window <= 0:
+            with self.lock:
+                return self._flush()
+
+        with self.lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self._run)
+                self._timer.daemon = True
+                self._timer.start()
+                _pending_commits.add(self)
+        return True
+
+    def _run(self):
+        with self.lock:
+            self._timer = None
+            _pending_commits.discard(self)
+            self._flush()
+
+    def pending(self):
+        return self._timer is not None
+
+    def flush_now(self):
+        """Run a scheduled flush immediately; no-op if nothing is pending."""
+        with self.lock:
+            if self._timer is None:
+                return True
+            self._timer.cancel()
+            self._timer = None
+            _pending_commits.discard(self)
+            return self._flush()
+
+
+@atexit.register
+def _flush_pending_commits():
+    for commit in list(_pending_commits):
+        commit.flush_now()
@@ -0,0 +1,108 @@
+import os
+import threading
+
+from blogging.configuration import Configuration
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+def _lock_fd(fd):
+    if os.name == "nt":
+        # LK_LOCK gives up after 10 attempts of one second; keep waiting
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _unlock_fd(fd):
+    if os.name == "nt":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def signature(path):
+    """(inode, size, mtime) of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class FileLock:
+    """
+    Advisory exclusive lock on a lock file, for processes sharing a store.
+
+    - every process that locks the same path waits for the others
+      (flock on POSIX, msvcrt.locking on Windows); processes that do not
+      lock are not stopped
+    - within a process the lock is reentrant and also excludes other
+      threads; use file_lock() so all DAOs of a process share one
+      FileLock per path
+    - Configuration.file_locking = False keeps only the in-process part
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._lock.acquire()
+        if self._depth == 0 and Configuration.file_locking:
+            try:
+                dir_name = os.path.dirname(self.path)
+                if dir_name:
+                    os.makedirs(dir_name, exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    _lock_fd(fd)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self._fd = fd
+            except BaseException:
+                self._lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fd, self._fd = self._fd, None
+            try:
+                _unlock_fd(fd)
+            finally:
+                os.close(fd)
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def file_lock(path):
+    """Return the process-wide FileLock for path."""
+    path = os.path.abspath(path)
+    with _locks_lock:
+        lock = _locks.get(path)
+        if lock is None:
+            lock = _locks[path] = FileLock(path)
+        return lock
@@ -0,0 +1,13 @@
+import itertools
+
+
+_generations = itertools.count(1)
+
+
+def next_generation():
+    """
+    Return a number no DAO has used before. DAOs take a new one whenever
+    their contents change, so (dao generation) identifies one state of the
+    data, e.g. for caching search results.
+    """
+    return next(_generations)
@@ -0,0 +1,88 @@
+import base64
+import binascii
+import json
+from itertools import islice
+
+
+class Page:
+    """
+    One page of a listing.
+
+    - items: the blogs / posts on this page, in listing order
+    - next_cursor: opaque string that continues the listing right after
+      this page, or None if this is the last page
+    """
+
+    __slots__ = ("items", "next_cursor")
+
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def __repr__(self):
+        return f"Page({self.items!r}, next_cursor={self.next_cursor!r})"
+
+
+def encode_cursor(after, scope):
+    """
+    Cursor for the entries after position `after` of the listing `scope`
+    (a JSON value naming the listing, e.g. ["posts", "journey", False]).
+    """
+    raw = json.dumps({"after": after, "scope": scope}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, scope):
+    """
+    Return the position stored in cursor, or None if cursor is None.
+    Raises ValueError if cursor is malformed or was made for another listing.
+    """
+    if cursor is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw.decode("utf-8"))
+        after = data["after"]
+        cursor_scope = data["scope"]
+    except (TypeError, KeyError, UnicodeDecodeError, binascii.Error, json.JSONDecodeError) as e:
+        raise ValueError("malformed cursor") from e
+    # json turns tuples into lists, so compare the encoded forms
+    if json.dumps(cursor_scope) != json.dumps(scope):
+        raise ValueError("cursor belongs to another listing")
+    if not isinstance(after, int) or isinstance(after, bool):
+        raise ValueError("malformed cursor")
+    return after
+
+
+def check_window(offset, limit):
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("offset must be a non-negative integer")
+    if limit is not None and (not isinstance(limit, int) or limit < 1):
+        raise ValueError("limit must be a positive integer")
+
+
+def make_page(entries, offset=0, limit=None, scope=None):
+    """
+    Build a Page from an iterator of (position, item) pairs in listing
+    order. Only offset + limit + 1 entries are consumed; the extra one
+    tells whether a next page exists.
+    """
+    check_window(offset, limit)
+    entries = islice(entries, offset, None)
+    if limit is None:
+        return Page([item for _, item in entries])
+
+    taken = list(islice(entries, limit + 1))
+    if len(taken) <= limit:
+        return Page([item for _, item in taken])
+    del taken[limit:]
+    return Page([item for _, item in taken], encode_cursor(taken[-1][0], scope))
@@ -0,0 +1,74 @@
+import bisect
+
+
+class PostCollection:
+    """
+    Posts of one blog kept in code order.
+
+    - a dict gives the post for a code
+    - a sorted list of codes gives the order; codes handed out by the DAO
+      only grow, so adding a post is normally an append
+    - iteration (forwards or backwards) walks the live structure, so no
+      copy or sort is made; do not mutate the collection while iterating
+    """
+
+    def __init__(self, posts=()):
+        self._by_code = {}
+        self._codes = []
+        for post in posts:
+            self.add(post)
+
+    def add(self, post):
+        """Add post, replacing a post with the same code."""
+        code = post.code
+        if code not in self._by_code:
+            if not self._codes or code > self._codes[-1]:
+                self._codes.append(code)
+            else:
+                bisect.insort(self._codes, code)
+        self._by_code[code] = post
+
+    def remove(self, code):
+        """Remove and return the post with code, or None."""
+        post = self._by_code.pop(code, None)
+        if post is not None:
+            i = bisect.bisect_left(self._codes, code)
+            del self._codes[i]
+        return post
+
+    def get(self, code):
+        try:
+            return self._by_code.get(code)
+        except TypeError:
+            # unhashable keys never match
+            return None
+
+    def max_code(self):
+        return self._codes[-1] if self._codes else 0
+
+    def iter_posts(self, reverse=False):
+        by_code = self._by_code
+        codes = reversed(self._codes) if reverse else self._codes
+        return (by_code[c] for c in codes)
+
+    def iter_entries(self, after=None, reverse=False):
+        """Yield (code, post) in code order, starting past code `after`."""
+        codes = self._codes
+        by_code = self._by_code
+        if reverse:
+            stop = len(codes) if after is None else bisect.bisect_left(codes, after)
+            for i in range(stop - 1, -1, -1):
+                yield codes[i], by_code[codes[i]]
+        else:
+            start = 0 if after is None else bisect.bisect_right(codes, after)
+            for i in range(start, len(codes)):
+                yield codes[i], by_code[codes[i]]
+
+    def __iter__(self):
+        return self.iter_posts()
+
+    def __len__(self):
+        return len(self._codes)
+
+    def __contains__(self, code):
+        return self.get(code) is not None
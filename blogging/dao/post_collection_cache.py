@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+
+from blogging.configuration import Configuration
+
+
+class PostCollectionCache:
+    """
+    LRU list of the blogs whose post DAO is open.
+
+    - Blog.post_dao reports every use: a use of an open DAO is a hit,
+      opening one (reading its file) is a miss
+    - each blog is weighed by the posts its DAO holds in memory
+      (PostDAO.resident_posts()); once more than max_blogs blogs are
+      open, or they hold more than max_posts posts, the least recently
+      used ones are unloaded (flushed first, reloaded on next use)
+    - a DAO in the middle of a batch, or whose flush fails, stays open
+    - the limits default to Configuration.post_cache_max_blogs and
+      post_cache_max_posts; 0 means no limit
+    """
+
+    def __init__(self, max_blogs=None, max_posts=None):
+        self._max_blogs = max_blogs
+        self._max_posts = max_posts
+        # id(blog) -> [blog, weight]; the entry keeps the Blog alive, so
+        # its id() is not reused while it is listed
+        self._entries = OrderedDict()
+        self._posts = 0
+        # AsyncController opens post DAOs on several threads
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_blogs(self):
+        return Configuration.post_cache_max_blogs if self._max_blogs is None else self._max_blogs
+
+    @property
+    def max_posts(self):
+        return Configuration.post_cache_max_posts if self._max_posts is None else self._max_posts
+
+    def loaded(self, blog, dao):
+        """blog's post DAO was just opened."""
+        self.misses += 1
+        self._put(blog, dao)
+
+    def used(self, blog, dao):
+        """blog's open post DAO is being used."""
+        self.hits += 1
+        self._put(blog, dao)
+
+    def _put(self, blog, dao):
+        key = id(blog)
+        weight = dao.resident_posts()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = [blog, weight]
+            else:
+                self._entries.move_to_end(key)
+                self._posts -= entry[1]
+                entry[1] = weight
+            self._posts += weight
+            if self._over_budget():
+                self._evict(blog)
+
+    def discard(self, blog):
+        """Forget blog (its post DAO was dropped)."""
+        with self._lock:
+            entry = self._entries.pop(id(blog), None)
+            if entry is not None:
+                self._posts -= entry[1]
+
+    def _over_budget(self):
+        max_blogs, max_posts = self.max_blogs, self.max_posts
+        return (max_blogs > 0 and len(self._entries) > max_blogs) or (max_posts > 0 and self._posts > max_posts)
+
+    def _evict(self, keep):
+        # least recently used first; the blog in use is never unloaded
+        for blog, _ in list(self._entries.values()):
+            if not self._over_budget():
+                return
+            if blog is not keep and blog.unload_posts():
+                self.evictions += 1
+
+    def clear(self):
+        """Unload every listed blog that can be."""
+        with self._lock:
+            for blog, _ in list(self._entries.values()):
+                blog.unload_posts()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "blogs": len(self._entries), "posts": self._posts}
+
+    def report(self):
+        return (f"post cache: {self.hits} hits, {self.misses} misses, {self.evictions} evictions, "
+                f"{len(self._entries)} blogs / {self._posts} posts loaded")
+
+    def reset(self):
+        """Zero the counters; loaded blogs stay loaded."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+POST_CACHE = PostCollectionCache()
@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
+from blogging.dao.page import decode_cursor, make_page
 class PostDAO(ABC):
+    # changes with every create/update/delete (see generation.py)
+    generation = 0
     @abstractmethod
     def search_post(self, key):
         pass
@@ -18,3 +21,48 @@ class PostDAO(ABC):
     @abstractmethod
     def list_posts(self):
         pass
+    def create_posts(self, posts):
+        # bulk insert; engines override this to persist once
+        created = []
+        for post in posts:
+            post = self.create_post(post)
+            if post is None:
+                break
+            created.append(post)
+        return created
+    def flush(self):
+        # write out anything still buffered; engines that buffer override it
+        return True
+    def busy(self):
+        # True while the DAO must not be dropped (a batch is open)
+        return False
+    def resident_posts(self):
+        # posts held in memory, what the post cache weighs a blog by
+        return 0
+    # batches: begin() starts an undo log and holds persistence back,
+    # commit() writes what changed once, rollback() undoes the changes
+    @abstractmethod
+    def begin(self):
+        pass
+    @abstractmethod
+    def commit(self):
+        pass
+    @abstractmethod
+    def rollback(self):
+        pass
+    def iter_posts(self, reverse=False):
+        posts = self.list_posts()
+        return reversed(posts) if reverse else iter(posts)
+    def count_posts(self):
+        return len(self.list_posts())
+    def iter_post_entries(self, search_string=None, after=None, reverse=False):
+        # (code, post) pairs by code, past the given code
+        posts = self.retrieve_posts(search_string) if search_string else self.list_posts()
+        if reverse:
+            posts = reversed(posts)
+        return ((p.code, p) for p in posts
+                if after is None or (p.code < after if reverse else p.code > after))
+    def posts_page(self, search_string=None, offset=0, limit=None, cursor=None, reverse=False):
+        scope = ["posts", search_string or "", reverse]
+        after = decode_cursor(cursor, scope)
+        return make_page(self.iter_post_entries(search_string, after, reverse), offset, limit, scope)
@@ -0,0 +1,20 @@
+from blogging.configuration import Configuration
+
+
+def create_post_dao(blog, autosave=True):
+    """
+    Return the post DAO for blog: the sqlite backend keeps posts in its
+    database, otherwise Configuration.post_storage picks the file engine.
+    """
+    # engines are imported on first use, so loading blogs does not pay
+    # for pickle / sqlite3 until some blog's posts are opened
+    if autosave and Configuration.storage_backend == "sqlite":
+        from blogging.dao.post_dao_sqlite import PostDAOSQLite
+        return PostDAOSQLite(blog, autosave)
+    if autosave and Configuration.post_storage == "segment":
+        from blogging.dao.post_dao_segment import PostDAOSegment
+        return PostDAOSegment(blog, autosave)
+    # without persistence every engine behaves the same, so the
+    # in-memory pickle DAO is used
+    from blogging.dao.post_dao_pickle import PostDAOPickle
+    return PostDAOPickle(blog, autosave)
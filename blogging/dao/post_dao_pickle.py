@@ -1,9 +1,18 @@
+import bisect
 import os
 import pickle
+import time
+from contextlib import contextmanager
 
 from blogging.configuration import Configuration
+from blogging.dao.durable_file import GroupCommit, atomic_write
+from blogging.dao.file_lock import file_lock, signature
+from blogging.dao.generation import next_generation
+from blogging.dao.post_collection import PostCollection
 from blogging.dao.post_dao import PostDAO
+from blogging.dao.post_text_index import PostTextIndex
 from blogging.post import Post
+from blogging.stats import count_io, timed
 
 
 class PostDAOPickle(PostDAO):
@@ -16,6 +25,17 @@ class PostDAOPickle(PostDAO):
         * each blog is stored in its own .dat file under records_path
         * .dat file contains list of post objects
         * collections are loaded from disk when needed
+        * the .dat file is replaced through a temp file + fsync + rename,
+          and writes requested within Configuration.group_commit_window
+          seconds are merged into one
+        * retrieve_posts goes through an inverted word index that is built
+          on the first search, kept up to date by every mutation and saved
+          next to the .dat file as <blog id>.idx<records_extension>
+        * processes sharing the records folder take the <blog id>.lock
+          file lock around writes; the .dat file is read again only when
+          its signature changed since this DAO last read or wrote it
+    - posts are held in a PostCollection, ordered by code, so listing and
+      searching never sort
     """
 
     def __init__(self, blog, autosave=True):
@@ -25,21 +45,40 @@ class PostDAOPickle(PostDAO):
         self.ext = cfg.__class__.records_extension
         self.blog = blog
 
-        # in-memory list of posts for non-persistent mode
-        self._posts = []
+        # posts of the blog, ordered by code
+        self._posts = PostCollection()
+        # new number on every change of the posts
+        self.generation = next_generation()
+        # word index for retrieve_posts, built on first use
+        self._text_index = None
 
         # code counter
         self._next_code = 1
 
-        os.makedirs(self.path, exist_ok=True)
+        # set when the in-memory list has changes not yet on disk, and
+        # the error of the last write that failed
+        self._dirty = False
+        self.write_error = None
+        self._commit = GroupCommit(self._flush)
+        # inside a batch: changes to undo on rollback, and the code
+        # counter to go back to
+        self._undo = None
+        self._undo_next_code = None
 
         self._file = self._file_name(self.blog.id)
-
-        if self.autosave:
-            if os.path.exists(self._file):
+        self._index_file = os.path.join(self.path, f"{self.blog.id}.idx{self.ext}")
+
+        # signature of the .dat file as last read or written, to spot
+        # writes by other processes
+        self._lock = file_lock(os.path.join(self.path, f"{self.blog.id}.lock"))
+        self._file_sig = None
+        self._checked_at = time.monotonic()
+
+        # a blog without a .dat file simply has no posts yet; the file
+        # (and the records folder) are created by the first write
+        if self.autosave and os.path.exists(self._file):
+            with self._lock:
                 self._load()
-            else:
-                self._write([])
 
     # ---------- internal helpers ----------
 
@@ -47,78 +86,290 @@ class PostDAOPickle(PostDAO):
         """Returns full path to blogs posts file"""
         return os.path.join(self.path, f"{code}{self.ext}")
 
+    @timed
     def _load(self):
         """Load all posts for this blog from its .dat file and update code counter"""
+        self._file_sig = signature(self._file)
         try:
             with open(self._file, "rb") as f:
                 content = pickle.load(f)
+                count_io(read=f.tell(), opens=1)
             if isinstance(content, list):
-                self._posts = [p for p in content if isinstance(p, Post)]
-            else: self._posts = []
+                self._posts = PostCollection(p for p in content if isinstance(p, Post))
+            else: self._posts = PostCollection()
 
         except Exception:
             return None
 
-        if len(self._posts) == 0:
-            self._next_code = 1
-        else:
-            max_code = max((p.code for p in self._posts), default = 0)
-            self._next_code = max_code + 1
-
-    def _load_all_from_disk(self):
-        """Return all posts stored on disk"""
-        return list(self._posts)
+        self._next_code = self._posts.max_code() + 1
 
+    @timed
     def _write(self, posts):
-        """write current post list to blogs .dat file if autosave enabled"""
+        """request a write of the current post list if autosave enabled"""
         if not self.autosave:
             return True
 
+        self._dirty = True
+        if self._undo is not None:
+            # written once, when the batch commits
+            return True
+        return self._commit.request()
+
+    @timed
+    def _flush(self):
+        """atomically replace the blogs .dat file with the current post list"""
+        if not self._dirty:
+            return True
+
         try:
-            with open(self._file, "wb") as f:
-                pickle.dump(self._posts, f)
+            with self._lock:
+                atomic_write(self._file, pickle.dumps(list(self._posts)))
+                self._file_sig = signature(self._file)
+                self._dirty = False
+                # the index must describe this .dat file, not one another
+                # process writes next
+                if self._text_index is not None:
+                    self._save_text_index()
+                elif os.path.exists(self._index_file):
+                    # the saved index describes the previous .dat contents
+                    os.remove(self._index_file)
+            self.write_error = None
             return True
 
-        except Exception:
+        except Exception as e:
+            # kept for flush() / commit() callers; a timer flush has no
+            # one to report to
+            self.write_error = e
             return False
 
+    def flush(self):
+        """Write out a flush that is still waiting for its group-commit window."""
+        with self._commit.lock:
+            if self._dirty and self._undo is None and not self._commit.pending():
+                # a write that failed earlier
+                return self._flush()
+            return self._commit.flush_now()
+
+    def busy(self):
+        return self._undo is not None
+
+    def resident_posts(self):
+        return len(self._posts)
+
+    # ---------- other processes ----------
+
+    def _refresh(self):
+        """Read the .dat file again if another process replaced it, unless changes made here are unwritten."""
+        if not self.autosave or self._dirty or self._undo is not None:
+            return
+        with self._lock:
+            self._catch_up()
+
+    def _catch_up(self):
+        self._checked_at = time.monotonic()
+        if signature(self._file) == self._file_sig:
+            return
+        self._posts = PostCollection()
+        self._text_index = None
+        self._next_code = 1
+        self._file_sig = None
+        if os.path.exists(self._file):
+            self._load()
+        self.generation = next_generation()
+
+    def _check(self):
+        # reads look at the file at most every change_check_interval seconds
+        if self.autosave and time.monotonic() - self._checked_at >= Configuration.change_check_interval:
+            self._refresh()
+
+    @contextmanager
+    def locked(self):
+        # writes: no other process writes the file in between, and the
+        # change starts from its latest contents
+        with self._commit.lock, self._lock:
+            self._refresh()
+            yield
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self._file)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    @timed
+    def _save_text_index(self):
+        """Store the word index together with the .dat version it describes."""
+        data = {"source": self._file_signature(), "tokens": self._text_index.state()}
+        atomic_write(self._index_file, pickle.dumps(data))
+
+    def _get_text_index(self):
+        """Return the word index, loading or building it the first time."""
+        if self._text_index is not None:
+            return self._text_index
+
+        if self.autosave and not self._dirty and os.path.exists(self._index_file):
+            try:
+                with open(self._index_file, "rb") as f:
+                    data = pickle.load(f)
+                    count_io(read=f.tell(), opens=1)
+                if data["source"] == self._file_signature():
+                    self._text_index = PostTextIndex.from_state(data["tokens"])
+            except Exception:
+                # unreadable index, rebuild it below
+                self._text_index = None
+
+        if self._text_index is None:
+            self._text_index = PostTextIndex.build(self._posts)
+            if self.autosave and not self._dirty and os.path.exists(self._file):
+                try:
+                    self._save_text_index()
+                except Exception:
+                    pass
+        return self._text_index
+
+
+    # ---------- batches ----------
+
+    def _log(self, op, key, old):
+        if self._undo is not None:
+            self._undo.append((op, key, old))
+
+    def begin(self):
+        """
+        Start a batch: changes are undo-logged and the .dat file is written
+        at commit(). The file lock is held until the batch ends.
+        """
+        with self._commit.lock:
+            self._commit.flush_now()
+            if self.autosave:
+                self._lock.acquire()
+                self._catch_up()
+            self._undo = []
+            self._undo_next_code = self._next_code
+
+    def commit(self):
+        """
+        End the batch and write the .dat file once if anything changed.
+        Raises the write error if that write fails.
+        """
+        with self._commit.lock:
+            try:
+                self._undo = None
+                if self.autosave and self._dirty and not self._commit.request():
+                    # the changes stay in memory and dirty, so a later
+                    # flush() can still write them
+                    raise self.write_error or OSError(f"could not write {self._file}")
+                return True
+            finally:
+                if self.autosave:
+                    self._lock.release()
+
+    def rollback(self):
+        """End the batch and undo its changes; the .dat file was not written."""
+        with self._commit.lock:
+            if self.autosave:
+                self._lock.release()
+            undo, self._undo = self._undo or [], None
+            for op, key, old in reversed(undo):
+                if op == "put":
+                    self._posts.remove(key)
+                    if old is not None:
+                        self._posts.add(old)
+                elif op == "update":
+                    key.title, key.text, key.update = old
+                else:
+                    self._posts.add(old)
+            self._next_code = self._undo_next_code
+            # rebuilt on the next search
+            self._text_index = None
+            self._dirty = False
+            self.generation = next_generation()
 
     # ---------- DAO operations ----------
 
+    @timed
     def search_post(self, key):
         """Return post with given code, or None if it does not exist."""
-        if not self.autosave:
-            for p in self._posts:
-                if p.code == key:
-                    return p
-            return None
-
-        for p in self._posts:
-            if p.code == key:
-                return p
-        return None
+        self._check()
+        return self._posts.get(key)
 
+    @timed
     def create_post(self, post):
         """Create a new post. Returns True on success."""
         if not isinstance(post, Post):
             return None
 
-        if not getattr(post, "code", None):
-            post.code = self._next_code
-            self._next_code += 1
-        else:
-            if post.code >= self._next_code:
-                self._next_code = post.code + 1
+        with self.locked():
+            if not getattr(post, "code", None):
+                post.code = self._next_code
+                self._next_code += 1
+            else:
+                if post.code >= self._next_code:
+                    self._next_code = post.code + 1
 
-        self._posts.append(post)
+            replaced = self._posts.get(post.code)
+            self._posts.add(post)
+            self._log("put", post.code, replaced)
+            self.generation = next_generation()
+            if self._text_index is not None:
+                self._text_index.add(post)
 
-        if self.autosave:
-            write = self._write(self._posts)
-            if not write:
-                self._posts.pop()
-                return None
+            if self.autosave:
+                write = self._write(self._posts)
+                if not write:
+                    self._posts.remove(post.code)
+                    if self._text_index is not None:
+                        self._text_index.remove(post.code)
+                    if replaced is not None:
+                        self._posts.add(replaced)
+                        if self._text_index is not None:
+                            self._text_index.add(replaced)
+                    self._dirty = False
+                    return None
         return post
 
+    @timed
+    def create_posts(self, posts):
+        """
+        Create several posts and write the .dat file once.
+        Returns the created posts; none are kept if the write fails.
+        """
+        created = []
+        replaced = []
+        with self.locked():
+            next_code = self._next_code
+            for post in posts:
+                if not isinstance(post, Post):
+                    continue
+                if not getattr(post, "code", None):
+                    post.code = next_code
+                    next_code += 1
+                elif post.code >= next_code:
+                    next_code = post.code + 1
+                old = self._posts.get(post.code)
+                if old is not None:
+                    replaced.append(old)
+                self._posts.add(post)
+                self._log("put", post.code, old)
+                created.append(post)
+            if not created:
+                return created
+
+            self._next_code = next_code
+            self.generation = next_generation()
+            # an index update per post would cost more than a rebuild
+            self._text_index = None
+            if self.autosave and not self._write(self._posts):
+                for post in created:
+                    self._posts.remove(post.code)
+                for post in replaced:
+                    self._posts.add(post)
+                self._dirty = False
+                return []
+        return created
+
+    @timed
     def retrieve_posts(self, search_string):
         """
         Return posts whose title or text contain search_string (case-insensitive),
@@ -127,58 +378,79 @@ class PostDAOPickle(PostDAO):
         Integration + controller tests expect retrieve_posts("journey") to
         give [1, 3, 5] in that order.
         """
-        if search_string is None:
-            search_string = ""
-        key = search_string.lower()
+        return [p for _, p in self.iter_post_entries(search_string)]
 
-        if not self.autosave:
-            base = list(self._posts)
+    def iter_post_entries(self, search_string=None, after=None, reverse=False):
+        """
+        Yield (code, post) by code (DESC if reverse), past code `after`,
+        keeping only posts that contain search_string.
+        """
+        self._check()
+        key = (search_string or "").lower()
+        codes = self._get_text_index().candidates(key) if key else None
+        if codes is None:
+            entries = self._posts.iter_entries(after, reverse)
         else:
-            base = self._load_all_from_disk()
-
-        base.sort(key=lambda p: p.code)
-
-        result = []
-        for p in base:
-            if key in p.title.lower() or key in p.text.lower():
-                result.append(p)
-        return result
-
+            # only the index hits need the substring check; codes are sorted
+            if reverse:
+                stop = len(codes) if after is None else bisect.bisect_left(codes, after)
+                codes = codes[stop - 1::-1] if stop else []
+            elif after is not None:
+                codes = codes[bisect.bisect_right(codes, after):]
+            entries = ((c, self._posts.get(c)) for c in codes if c in self._posts)
+
+        for code, p in entries:
+            if not key or key in p.title.lower() or key in p.text.lower():
+                yield code, p
+
+    @timed
     def update_post(self, key, new_title, new_text):
         """Update title/text of a post. Returns True if updated."""
         # find post
-        for p in self._posts:
-
-            if p.code == key:
-                p.update_post(new_title, new_text)
-
-                # persist list
-                if self.autosave:
-                    return self._write(self._posts)
-                return True
-
-        return False
+        with self.locked():
+            p = self._posts.get(key)
+            if p is None:
+                return False
+
+            self._log("update", p, (p.title, p.text, p.update))
+            p.update_post(new_title, new_text)
+            self.generation = next_generation()
+            if self._text_index is not None:
+                self._text_index.update(p)
+
+            # persist list
+            if self.autosave:
+                return self._write(self._posts)
+            return True
 
+    @timed
     def delete_post(self, key):
         """Delete post with given code. Returns True if deleted."""
-        deleted = False
-        new_list = []
-        for p in self._posts:
-            if not deleted and p.code == key:
-                deleted = True
-                continue
-            new_list.append(p)
-
-        if deleted:
-            self._posts = new_list
+        with self.locked():
+            old = self._posts.remove(key)
+            if old is None:
+                return False
+            self._log("delete", key, old)
+            self.generation = next_generation()
+            if self._text_index is not None:
+                self._text_index.remove(key)
             if self.autosave:
                 self._write(self._posts)
-        return deleted
+        return True
 
+    @timed
     def list_posts(self):
         """
-        Return all posts for the current blog.
-        For determinism we return them sorted by code ASC;
-        the controller will sort DESC where needed.
+        Return all posts for the current blog, sorted by code ASC.
         """
-        return sorted(self._posts, key = lambda p: p.code)
+        self._check()
+        return list(self._posts)
+
+    def iter_posts(self, reverse=False):
+        """Iterate over the posts by code (DESC if reverse) without copying."""
+        self._check()
+        return self._posts.iter_posts(reverse)
+
+    def count_posts(self):
+        self._check()
+        return len(self._posts)
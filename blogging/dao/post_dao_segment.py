@@ -0,0 +1,477 @@
+import glob
+import os
+import pickle
+import shutil
+import struct
+import time
+from contextlib import contextmanager
+
+from blogging.configuration import Configuration
+from blogging.dao.durable_file import GroupCommit, fsync_file
+from blogging.dao.file_lock import file_lock
+from blogging.dao.generation import next_generation
+from blogging.dao.post_dao import PostDAO
+from blogging.post import Post
+from blogging.stats import count_io, timed
+
+
+class PostDAOSegment(PostDAO):
+    """
+    Log-structured post DAO.
+
+    - each blog has one segment file under records_path, named
+      <blog id>.<generation>.seg<records_extension>
+    - every create/update appends a record holding the pickled post and
+      every delete appends a tombstone, so a mutation only writes the
+      post it touches instead of the whole collection
+    - an in-memory index maps post code -> (offset, length) of the live
+      record; post bodies are read from disk on demand
+    - once dead records (overwritten posts and tombstones) take up more
+      than segment_compact_ratio of the file, the live records are copied
+      into a segment of the next generation and the old one is removed
+    - appends are fsynced once per group-commit window
+      (Configuration.group_commit_window) instead of once per record
+    - processes sharing the records folder take the <blog id>.lock file
+      lock around appends and compactions; records appended by others
+      are picked up by scanning only the headers past the known end of
+      the segment, and a new generation triggers a full rescan
+    """
+
+    # op, code, payload length
+    _HEADER = struct.Struct(">cqI")
+    _PUT = b"P"
+    _DELETE = b"D"
+
+    def __init__(self, blog, autosave=True):
+        cfg = Configuration()
+        self.autosave = autosave
+        self.path = cfg.__class__.records_path
+        self.ext = cfg.__class__.records_extension
+        self.compact_ratio = cfg.__class__.segment_compact_ratio
+        self.compact_min_bytes = cfg.__class__.segment_compact_min_bytes
+        self.blog = blog
+
+        # code -> (payload offset, payload length) of the live record
+        self._index = {}
+        # bytes taken by records that are no longer live
+        self._dead_bytes = 0
+        self._size = 0
+
+        # code counter
+        self._next_code = 1
+        # new number on every change of the posts
+        self.generation = next_generation()
+
+        self._commit = GroupCommit(self._sync)
+        # inside a batch: the state to go back to on rollback
+        self._batch = None
+
+        self._generation = 0
+        self._file = self._segment_name(0)
+
+        self._lock = file_lock(os.path.join(self.path, f"{self.blog.id}.lock"))
+        with self._lock:
+            existing = self._existing_segments()
+            if existing:
+                self._generation, self._file = existing[-1]
+                # older generations are left behind by an interrupted compaction
+                for _, old in existing[:-1]:
+                    os.remove(old)
+                self._scan()
+            else:
+                self._import_pickle()
+        self._checked_at = time.monotonic()
+
+    # ---------- internal helpers ----------
+
+    def _segment_name(self, generation):
+        return os.path.join(self.path, f"{self.blog.id}.{generation}.seg{self.ext}")
+
+    def _existing_segments(self):
+        """Return (generation, path) of this blog's segments, oldest first."""
+        prefix = f"{self.blog.id}."
+        suffix = f".seg{self.ext}"
+        found = []
+        for name in glob.glob(os.path.join(glob.escape(self.path), f"{prefix}*{suffix}")):
+            middle = os.path.basename(name)[len(prefix):-len(suffix)]
+            if middle.isdigit():
+                found.append((int(middle), name))
+        found.sort()
+        return found
+
+    @timed
+    def _import_pickle(self):
+        """Seed a new segment from a .dat file written by PostDAOPickle."""
+        legacy = os.path.join(self.path, f"{self.blog.id}{self.ext}")
+        if not os.path.exists(legacy):
+            return
+        try:
+            with open(legacy, "rb") as f:
+                content = pickle.load(f)
+                count_io(read=f.tell(), opens=1)
+        except Exception:
+            return
+        if isinstance(content, list):
+            posts = sorted((p for p in content if isinstance(p, Post)), key=lambda p: p.code)
+            self._append([(self._PUT, p.code, pickle.dumps(p)) for p in posts])
+            self._next_code = max((p.code for p in posts), default=0) + 1
+
+    @timed
+    def _scan(self, offset=0):
+        """Rebuild the code index by walking the record headers from offset on."""
+        size = os.path.getsize(self._file)
+        headers = 0
+        corrupt = False
+        with open(self._file, "rb") as f:
+            f.seek(offset)
+            while offset + self._HEADER.size <= size:
+                op, code, length = self._HEADER.unpack(f.read(self._HEADER.size))
+                headers += 1
+                payload_offset = offset + self._HEADER.size
+                if payload_offset + length > size:
+                    # torn record at the end of the file
+                    break
+                if op == self._PUT:
+                    self._retire(code)
+                    self._index[code] = (payload_offset, length)
+                elif op == self._DELETE:
+                    self._retire(code)
+                    self._dead_bytes += self._HEADER.size
+                else:
+                    # a damaged record with more of the file behind it
+                    corrupt = True
+                    break
+                f.seek(length, os.SEEK_CUR)
+                offset = payload_offset + length
+        # the scan only reads the headers
+        count_io(read=headers * self._HEADER.size, opens=1)
+
+        if corrupt:
+            # keep the records read so far plus a copy of the whole file,
+            # so the records past the damage can still be recovered
+            shutil.copyfile(self._file, self._file + ".corrupt")
+        if offset < size:
+            # drop the torn tail (or the damaged part, copied above) so
+            # later appends start on a record boundary
+            with open(self._file, "r+b") as f:
+                f.truncate(offset)
+        self._size = offset
+        self._next_code = max(self._index, default=0) + 1
+
+    def _retire(self, code):
+        """Account for the live record of code becoming dead."""
+        old = self._index.pop(code, None)
+        if old is not None:
+            self._dead_bytes += self._HEADER.size + old[1]
+
+    @timed
+    def _append(self, records):
+        """Append (op, code, payload) records and index the puts."""
+        os.makedirs(self.path, exist_ok=True)
+        chunks = []
+        for op, code, payload in records:
+            chunks.append(self._HEADER.pack(op, code, len(payload)))
+            chunks.append(payload)
+        data = b"".join(chunks)
+        with open(self._file, "ab") as f:
+            f.write(data)
+        count_io(written=len(data), opens=1)
+
+        # only index the records once they are safely on disk
+        offset = self._size
+        for op, code, payload in records:
+            self._retire(code)
+            if op == self._PUT:
+                self._index[code] = (offset + self._HEADER.size, len(payload))
+            else:
+                self._dead_bytes += self._HEADER.size
+            offset += self._HEADER.size + len(payload)
+        self._size = offset
+
+    # ---------- other processes ----------
+
+    def _catch_up(self):
+        """Index what other processes appended or compacted; the caller holds the file lock."""
+        self._checked_at = time.monotonic()
+        existing = self._existing_segments()
+        if not existing:
+            return
+        generation, name = existing[-1]
+        if name == self._file:
+            size = os.path.getsize(name)
+            if size == self._size:
+                return
+            if size > self._size:
+                self._scan(self._size)
+                self.generation = next_generation()
+                return
+        # compacted into a new generation, or cut back: read it from the start
+        self._generation, self._file = generation, name
+        self._index = {}
+        self._dead_bytes = 0
+        self._scan()
+        self.generation = next_generation()
+
+    def _refresh(self):
+        if self._batch is None:
+            with self._lock:
+                self._catch_up()
+
+    def _check(self):
+        # reads look at the segment at most every change_check_interval seconds
+        if time.monotonic() - self._checked_at >= Configuration.change_check_interval:
+            self._refresh()
+
+    def _open(self):
+        try:
+            return open(self._file, "rb")
+        except FileNotFoundError:
+            # another process compacted it into a new generation
+            with self._lock:
+                self._catch_up()
+            return open(self._file, "rb")
+
+    @contextmanager
+    def locked(self):
+        # writes: appends land right after the records other processes
+        # wrote, and codes are handed out from the latest index
+        with self._commit.lock, self._lock:
+            self._refresh()
+            yield
+
+    @timed
+    def _sync(self):
+        fsync_file(self._file)
+        return True
+
+    def flush(self):
+        """fsync appends that are still waiting for their group-commit window."""
+        return self._commit.flush_now()
+
+    def busy(self):
+        return self._batch is not None
+
+    def _persist(self, records):
+        """Append records, then schedule the fsync and a possible compaction."""
+        with self._commit.lock, self._lock:
+            self._append(records)
+            self.generation = next_generation()
+            if self._batch is None:
+                self._commit.request()
+                self._maybe_compact()
+
+    @timed
+    def _read(self, code):
+        if code not in self._index:
+            return None
+        with self._open() as f:
+            location = self._index.get(code)
+            if location is None:
+                return None
+            offset, length = location
+            count_io(read=length, opens=1)
+            f.seek(offset)
+            return pickle.loads(f.read(length))
+
+    def _iter_posts(self, reverse=False):
+        """Yield live posts in code order, reading each body from disk."""
+        if not self._index:
+            return
+        count_io(opens=1)
+        with self._open() as f:
+            for code in sorted(self._index, reverse=reverse):
+                offset, length = self._index[code]
+                f.seek(offset)
+                count_io(read=length)
+                yield pickle.loads(f.read(length))
+
+    # ---------- batches ----------
+
+    def begin(self):
+        """
+        Start a batch. Records are still appended as they come, but the
+        fsync and any compaction wait for commit(); rollback() cuts the
+        segment back to where the batch started. The file lock is held
+        until then, so no other process appends in between.
+        """
+        with self._commit.lock:
+            self._commit.flush_now()
+            self._lock.acquire()
+            self._catch_up()
+            self._batch = (self._size, dict(self._index), self._dead_bytes, self._next_code)
+
+    def commit(self):
+        with self._commit.lock:
+            try:
+                start_size = self._batch[0]
+                self._batch = None
+                if self._size != start_size:
+                    self._commit.request()
+                    self._maybe_compact()
+                return True
+            finally:
+                self._lock.release()
+
+    def rollback(self):
+        with self._commit.lock:
+            try:
+                size, self._index, self._dead_bytes, self._next_code = self._batch
+                self._batch = None
+                if self._size != size:
+                    with open(self._file, "r+b") as f:
+                        f.truncate(size)
+                    self._size = size
+                    self.generation = next_generation()
+            finally:
+                self._lock.release()
+
+    def _maybe_compact(self):
+        if self._size >= self.compact_min_bytes and self._dead_bytes > self._size * self.compact_ratio:
+            self.compact()
+
+    def compact(self):
+        """Copy live records into a new generation and drop the old segment."""
+        with self._commit.lock, self._lock:
+            if os.path.exists(self._file):
+                self._compact()
+
+    @timed
+    def _compact(self):
+        new_file = self._segment_name(self._generation + 1)
+        tmp_file = new_file + ".tmp"
+        new_index = {}
+        offset = 0
+        with open(self._file, "rb") as src, open(tmp_file, "wb") as dst:
+            for code in sorted(self._index):
+                old_offset, length = self._index[code]
+                src.seek(old_offset)
+                payload = src.read(length)
+                dst.write(self._HEADER.pack(self._PUT, code, length))
+                dst.write(payload)
+                new_index[code] = (offset + self._HEADER.size, length)
+                offset += self._HEADER.size + length
+        count_io(read=offset, written=offset, opens=2)
+        fsync_file(tmp_file)
+        os.replace(tmp_file, new_file)
+        os.remove(self._file)
+
+        self._generation += 1
+        self._file = new_file
+        self._index = new_index
+        self._size = offset
+        self._dead_bytes = 0
+
+    # ---------- DAO operations ----------
+
+    @timed
+    def search_post(self, key):
+        """Return post with given code, or None if it does not exist."""
+        self._check()
+        return self._read(key)
+
+    @timed
+    def create_post(self, post):
+        """Create a new post. Returns the post on success."""
+        if not isinstance(post, Post):
+            return None
+
+        with self.locked():
+            if not getattr(post, "code", None):
+                post.code = self._next_code
+                self._next_code += 1
+            elif post.code >= self._next_code:
+                self._next_code = post.code + 1
+
+            try:
+                self._persist([(self._PUT, post.code, pickle.dumps(post))])
+            except Exception:
+                return None
+        return post
+
+    @timed
+    def create_posts(self, posts):
+        """Create several posts with a single append. Returns the created posts."""
+        created = []
+        with self.locked():
+            next_code = self._next_code
+            for post in posts:
+                if not isinstance(post, Post):
+                    continue
+                if not getattr(post, "code", None):
+                    post.code = next_code
+                    next_code += 1
+                elif post.code >= next_code:
+                    next_code = post.code + 1
+                created.append(post)
+            if not created:
+                return created
+
+            try:
+                self._persist([(self._PUT, p.code, pickle.dumps(p)) for p in created])
+            except Exception:
+                return []
+            self._next_code = next_code
+        return created
+
+    @timed
+    def retrieve_posts(self, search_string):
+        """
+        Return posts whose title or text contain search_string
+        (case-insensitive), ordered by code ASCENDING.
+        """
+        self._check()
+        key = (search_string or "").lower()
+        return [p for p in self._iter_posts() if key in p.title.lower() or key in p.text.lower()]
+
+    @timed
+    def update_post(self, key, new_title, new_text):
+        """Update title/text of a post. Returns True if updated."""
+        with self.locked():
+            post = self._read(key)
+            if post is None:
+                return False
+            post.update_post(new_title, new_text)
+            try:
+                self._persist([(self._PUT, key, pickle.dumps(post))])
+            except Exception:
+                return False
+        return True
+
+    @timed
+    def delete_post(self, key):
+        """Delete post with given code. Returns True if deleted."""
+        with self.locked():
+            if key not in self._index:
+                return False
+            self._persist([(self._DELETE, key, b"")])
+        return True
+
+    @timed
+    def list_posts(self):
+        """Return all posts for the blog sorted by code ASC."""
+        self._check()
+        return list(self._iter_posts())
+
+    def iter_posts(self, reverse=False):
+        """Iterate over the posts by code (DESC if reverse)."""
+        self._check()
+        return self._iter_posts(reverse)
+
+    def count_posts(self):
+        self._check()
+        return len(self._index)
+
+    def iter_post_entries(self, search_string=None, after=None, reverse=False):
+        """Yield (code, post) by code past code `after`, reading bodies lazily."""
+        self._check()
+        key = (search_string or "").lower()
+        codes = sorted(self._index, reverse=reverse)
+        if after is not None:
+            codes = [c for c in codes if (c < after if reverse else c > after)]
+        for code in codes:
+            p = self._read(code)
+            if p is None:
+                # deleted by another process that compacted the segment
+                continue
+            if not key or key in p.title.lower() or key in p.text.lower():
+                yield code, p
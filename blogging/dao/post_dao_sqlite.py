@@ -0,0 +1,208 @@
+import sqlite3
+from datetime import datetime
+
+from blogging.dao.page import check_window, decode_cursor, make_page
+from blogging.dao.post_dao import PostDAO
+from blogging.dao.sqlite_store import get_store
+from blogging.post import Post
+from blogging.stats import timed
+
+
+class PostDAOSQLite(PostDAO):
+    """
+    Post DAO backed by the posts table of Configuration.sqlite_file.
+
+    Posts are keyed by (blog_id, code), so every operation reads or
+    writes only the rows of this blog, and only the rows it needs.
+    """
+
+    _COLUMNS = "code, title, text, creation, updated"
+    # rows fetched at a time by iter_posts
+    _BATCH = 500
+
+    def __init__(self, blog, autosave=True):
+        self.autosave = autosave
+        self.blog = blog
+        self.store = get_store()
+
+        # code counter
+        row = self.store.query_one("SELECT MAX(code) FROM posts WHERE blog_id = ?", (self.blog.id,))
+        self._next_code = (row[0] or 0) + 1
+        # the code counter to go back to if a batch rolls back
+        self._batch_next_code = None
+
+    @property
+    def generation(self):
+        # any write to the database counts as a change
+        return self.store.generation
+
+    # ---------- internal helpers ----------
+
+    @staticmethod
+    def _to_post(row):
+        return Post(row[0], row[1], row[2],
+                    datetime.fromisoformat(row[3]), datetime.fromisoformat(row[4]))
+
+    def _insert(self, post):
+        self.store.execute(
+            "INSERT INTO posts (blog_id, code, title, text, creation, updated) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.blog.id, post.code, post.title, post.text,
+             post.creation.isoformat(), post.update.isoformat()))
+
+    # ---------- batches ----------
+
+    def begin(self):
+        self.store.begin()
+        self._batch_next_code = self._next_code
+
+    def commit(self):
+        self.store.end(True)
+        return True
+
+    def rollback(self):
+        self.store.end(False)
+        self._next_code = self._batch_next_code
+
+    # ---------- DAO operations ----------
+
+    @timed
+    def search_post(self, key):
+        """Return post with given code, or None if it does not exist."""
+        row = self.store.query_one(
+            f"SELECT {self._COLUMNS} FROM posts WHERE blog_id = ? AND code = ?", (self.blog.id, key))
+        return self._to_post(row) if row else None
+
+    @timed
+    def create_post(self, post):
+        """Create a new post. Returns the post on success."""
+        if not isinstance(post, Post):
+            return None
+
+        new_code = not getattr(post, "code", None)
+        if new_code:
+            post.code = self._next_code
+            self._next_code += 1
+        elif post.code >= self._next_code:
+            self._next_code = post.code + 1
+
+        try:
+            try:
+                self._insert(post)
+            except sqlite3.IntegrityError:
+                if not new_code:
+                    raise
+                # another process sharing the database took the code
+                row = self.store.query_one("SELECT MAX(code) FROM posts WHERE blog_id = ?", (self.blog.id,))
+                post.code = (row[0] or 0) + 1
+                self._next_code = post.code + 1
+                self._insert(post)
+        except Exception:
+            return None
+        return post
+
+    @timed
+    def create_posts(self, posts):
+        """Create several posts in one transaction. Returns the created posts."""
+        created = []
+        next_code = self._next_code
+        for post in posts:
+            if not isinstance(post, Post):
+                continue
+            if not getattr(post, "code", None):
+                post.code = next_code
+                next_code += 1
+            elif post.code >= next_code:
+                next_code = post.code + 1
+            created.append(post)
+        if not created:
+            return created
+
+        try:
+            self.store.execute_many(
+                "INSERT INTO posts (blog_id, code, title, text, creation, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.blog.id, p.code, p.title, p.text, p.creation.isoformat(), p.update.isoformat())
+                 for p in created])
+        except Exception:
+            return []
+        self._next_code = next_code
+        return created
+
+    @timed
+    def retrieve_posts(self, search_string):
+        """
+        Return posts whose title or text contain search_string
+        (case-insensitive), ordered by code ASCENDING.
+        """
+        key = (search_string or "").lower()
+        rows = self.store.query(
+            f"SELECT {self._COLUMNS} FROM posts WHERE blog_id = ? "
+            "AND (contains_ci(title, ?) OR contains_ci(text, ?)) ORDER BY code",
+            (self.blog.id, key, key))
+        return [self._to_post(r) for r in rows]
+
+    @timed
+    def update_post(self, key, new_title, new_text):
+        """Update title/text of a post. Returns True if updated."""
+        post = self.search_post(key)
+        if post is None:
+            return False
+        post.update_post(new_title, new_text)
+        self.store.execute(
+            "UPDATE posts SET title = ?, text = ?, updated = ? WHERE blog_id = ? AND code = ?",
+            (post.title, post.text, post.update.isoformat(), self.blog.id, key))
+        return True
+
+    @timed
+    def delete_post(self, key):
+        """Delete post with given code. Returns True if deleted."""
+        return self.store.execute(
+            "DELETE FROM posts WHERE blog_id = ? AND code = ?", (self.blog.id, key)) > 0
+
+    @timed
+    def list_posts(self):
+        """Return all posts for the blog sorted by code ASC."""
+        rows = self.store.query(
+            f"SELECT {self._COLUMNS} FROM posts WHERE blog_id = ? ORDER BY code", (self.blog.id,))
+        return [self._to_post(r) for r in rows]
+
+    def iter_posts(self, reverse=False):
+        """Iterate over the posts by code (DESC if reverse), _BATCH rows at a time."""
+        order, compare = ("DESC", "<") if reverse else ("ASC", ">")
+        sql = (f"SELECT {self._COLUMNS} FROM posts WHERE blog_id = ? AND code {compare} ? "
+               f"ORDER BY code {order} LIMIT ?")
+        rows = self.store.query(
+            f"SELECT {self._COLUMNS} FROM posts WHERE blog_id = ? ORDER BY code {order} LIMIT ?",
+            (self.blog.id, self._BATCH))
+        while rows:
+            for r in rows:
+                yield self._to_post(r)
+            if len(rows) < self._BATCH:
+                return
+            rows = self.store.query(sql, (self.blog.id, rows[-1][0], self._BATCH))
+
+    @timed
+    def posts_page(self, search_string=None, offset=0, limit=None, cursor=None, reverse=False):
+        """One page of list/retrieve results; sqlite skips and limits the rows."""
+        scope = ["posts", search_string or "", reverse]
+        after = decode_cursor(cursor, scope)
+        check_window(offset, limit)
+
+        sql = f"SELECT {self._COLUMNS} FROM posts WHERE blog_id = ?"
+        params = [self.blog.id]
+        if search_string:
+            key = search_string.lower()
+            sql += " AND (contains_ci(title, ?) OR contains_ci(text, ?))"
+            params += [key, key]
+        if after is not None:
+            sql += " AND code < ?" if reverse else " AND code > ?"
+            params.append(after)
+        sql += " ORDER BY code DESC" if reverse else " ORDER BY code"
+        # one extra row tells whether there is a next page
+        sql += " LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit + 1, offset]
+
+        rows = self.store.query(sql, params)
+        return make_page(((r[0], self._to_post(r)) for r in rows), 0, limit, scope)
+
+    def count_posts(self):
+        return self.store.query_one("SELECT COUNT(*) FROM posts WHERE blog_id = ?", (self.blog.id,))[0]
@@ -0,0 +1,165 @@
+import bisect
+import re
+
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lower-case word tokens of text."""
+    return _TOKEN.findall(text.lower())
+
+
+def _grams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def token_trigrams(token):
+    """Trigrams of token padded with NULs, so its start and end show up as grams too."""
+    return _grams("\0" + token + "\0")
+
+
+class PostTextIndex:
+    """
+    Inverted index of one blog's posts: token -> sorted list of post codes.
+
+    candidates(query) narrows a case-insensitive substring search down to
+    the posts that can possibly match, which the caller then verifies:
+
+    - every word of the query that is surrounded by other characters of
+      the query must appear as a whole token of the post (dict lookup)
+    - the first / last word of the query may be the end / start of a
+      longer token, and a query that is a single word may sit anywhere
+      inside a token; those are looked up in the vocabulary: prefixes by
+      bisecting the sorted vocabulary, suffixes and inner substrings
+      through a trigram index over the vocabulary (only single-word
+      queries shorter than three letters and one-letter suffixes still
+      walk the whole vocabulary)
+
+    A query without any word characters returns None (scan everything).
+    """
+
+    def __init__(self):
+        self._postings = {}
+        # code -> tokens of that post, to unindex it after its text changed
+        self._doc_tokens = {}
+        self._vocabulary = []
+        # trigram -> tokens of the vocabulary containing it
+        self._token_grams = {}
+
+    # ---------- maintenance ----------
+
+    def add(self, post):
+        tokens = frozenset(tokenize(post.title)) | frozenset(tokenize(post.text))
+        self.add_tokens(post.code, tokens)
+
+    def add_tokens(self, code, tokens):
+        self.remove(code)
+        self._doc_tokens[code] = tokens
+        for token in tokens:
+            codes = self._postings.get(token)
+            if codes is None:
+                self._postings[token] = [code]
+                bisect.insort(self._vocabulary, token)
+                for gram in token_trigrams(token):
+                    self._token_grams.setdefault(gram, set()).add(token)
+            elif code > codes[-1]:
+                codes.append(code)
+            else:
+                bisect.insort(codes, code)
+
+    def remove(self, code):
+        tokens = self._doc_tokens.pop(code, None)
+        if tokens is None:
+            return
+        for token in tokens:
+            codes = self._postings[token]
+            i = bisect.bisect_left(codes, code)
+            if i < len(codes) and codes[i] == code:
+                del codes[i]
+            if not codes:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+                for gram in token_trigrams(token):
+                    tokens = self._token_grams[gram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._token_grams[gram]
+
+    def update(self, post):
+        self.add(post)
+
+    # ---------- persistence ----------
+
+    def state(self):
+        """Picklable contents of the index."""
+        return {code: tuple(tokens) for code, tokens in self._doc_tokens.items()}
+
+    @classmethod
+    def from_state(cls, state):
+        index = cls()
+        for code, tokens in state.items():
+            index.add_tokens(code, frozenset(tokens))
+        return index
+
+    @classmethod
+    def build(cls, posts):
+        index = cls()
+        for post in posts:
+            index.add(post)
+        return index
+
+    # ---------- queries ----------
+
+    def _prefixed(self, prefix):
+        i = bisect.bisect_left(self._vocabulary, prefix)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(prefix):
+            yield self._vocabulary[i]
+            i += 1
+
+    def _containing(self, grams, test):
+        """Vocabulary tokens having every gram in grams and passing test."""
+        if not grams:
+            # too short to have a trigram
+            return (t for t in self._vocabulary if test(t))
+        sets = []
+        for gram in grams:
+            tokens = self._token_grams.get(gram)
+            if tokens is None:
+                return ()
+            sets.append(tokens)
+        sets.sort(key=len)
+        return (t for t in sets[0] if all(t in other for other in sets[1:]) and test(t))
+
+    def _codes_for(self, word, left_open, right_open):
+        if not left_open and not right_open:
+            return set(self._postings.get(word, ()))
+        if right_open and not left_open:
+            tokens = self._prefixed(word)
+        elif left_open and not right_open:
+            tokens = self._containing(_grams(word + "\0"), lambda t: t.endswith(word))
+        else:
+            tokens = self._containing(_grams(word), lambda t: word in t)
+        codes = set()
+        for token in tokens:
+            codes.update(self._postings[token])
+        return codes
+
+    def candidates(self, query):
+        """
+        Return a sorted list of codes that may contain query (lower-cased),
+        or None if the query has no words and every post must be checked.
+        """
+        words = list(_TOKEN.finditer(query))
+        if not words:
+            return None
+
+        # most selective words first, so the intersection shrinks quickly
+        words.sort(key=lambda m: (m.start() == 0 or m.end() == len(query), -len(m.group())))
+        result = None
+        for m in words:
+            codes = self._codes_for(m.group(), m.start() == 0, m.end() == len(query))
+            result = codes if result is None else result & codes
+            if not result:
+                return []
+        return sorted(result)
@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import threading
+
+from blogging.configuration import Configuration
+from blogging.dao.generation import next_generation
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blogs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id, name, url, email
+);
+CREATE INDEX IF NOT EXISTS blogs_id ON blogs (id);
+CREATE INDEX IF NOT EXISTS blogs_name ON blogs (name);
+CREATE INDEX IF NOT EXISTS blogs_url ON blogs (url);
+CREATE TABLE IF NOT EXISTS posts (
+    blog_id,
+    code INTEGER NOT NULL,
+    title, text, creation, updated,
+    PRIMARY KEY (blog_id, code)
+) WITHOUT ROWID;
+"""
+# blogs.id/name/url are declared without a type on purpose: untyped
+# columns apply no affinity, so 1234 and "1234" stay different keys, the
+# same as with == in the JSON DAO
+
+
+def _contains(haystack, needle):
+    """Case-insensitive substring test with Python's str.lower()."""
+    if haystack is None:
+        return False
+    return needle in str(haystack).lower()
+
+
+class SQLiteStore:
+    """
+    One shared connection to the blogs database.
+
+    The connection runs in WAL mode so other processes can keep reading
+    while this one writes. Every statement goes through the store lock,
+    which lets DAOs be used from worker threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            dir_name = os.path.dirname(path)
+            if dir_name:
+                os.makedirs(dir_name, exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.create_function("contains_ci", 2, _contains, deterministic=True)
+        self.conn.executescript(_SCHEMA)
+        # changes whenever a statement modifies the database, here or
+        # (seen through PRAGMA data_version) in another process
+        self._generation = next_generation()
+        self._data_version = self._read_data_version()
+        # open batches (see begin()) and whether one of them failed
+        self._batches = 0
+        self._failed = False
+
+    def _read_data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    @property
+    def generation(self):
+        with self.lock:
+            version = self._read_data_version()
+            if version != self._data_version:
+                self._data_version = version
+                self._generation = next_generation()
+            return self._generation
+
+    @generation.setter
+    def generation(self, value):
+        self._generation = value
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def execute(self, sql, params=()):
+        """Run one statement in its own transaction; returns the row count."""
+        with self.lock:
+            count = self._write(self.conn.execute, sql, params)
+            if count:
+                self.generation = next_generation()
+            return count
+
+    def execute_many(self, sql, rows):
+        """Run one statement for every row in a single transaction."""
+        with self.lock:
+            count = self._write(self.conn.executemany, sql, rows)
+            if count:
+                self.generation = next_generation()
+            return count
+
+    def _write(self, run, sql, params):
+        if self._batches:
+            # part of the batch's transaction, committed by end()
+            return run(sql, params).rowcount
+        with self.conn:
+            return run(sql, params).rowcount
+
+    def begin(self):
+        """
+        Open a batch: statements join one transaction until the last open
+        batch ends. DAOs sharing the store share the transaction.
+        """
+        with self.lock:
+            self._batches += 1
+
+    def end(self, commit):
+        """Close a batch; the transaction is rolled back if any batch failed."""
+        with self.lock:
+            self._failed = self._failed or not commit
+            self._batches -= 1
+            if self._batches:
+                return
+            failed, self._failed = self._failed, False
+            if failed:
+                self.conn.rollback()
+                self.generation = next_generation()
+            else:
+                self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=None):
+    """Return the shared store for path (Configuration.sqlite_file by default)."""
+    path = os.path.abspath(path or Configuration.sqlite_file)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SQLiteStore(path)
+        return store
+
+
+def close_stores():
+    """Close every shared connection (used by tests and at shutdown)."""
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
@@ -0,0 +1,105 @@
+import bisect
+from array import array
+
+
+def blog_fields(blog):
+    """The lower-cased values retrieve_blogs searches in."""
+    return (str(blog.id).lower(), blog.name.lower(), blog.url.lower(), blog.email.lower())
+
+
+def blog_trigrams(blog):
+    """
+    Trigrams of the searchable fields of blog. The fields are joined with
+    NUL separators, so even one- and two-character fields show up inside
+    some trigram; grams spanning a separator only ever add candidates.
+    """
+    text = "\0" + "\0".join(blog_fields(blog)) + "\0"
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Trigram index over the searchable fields of the blogs in a catalog.
+
+    Each trigram maps to a sorted array of the sequence numbers of the
+    blogs containing it. candidates(query) returns the blogs that contain
+    every trigram of the query, a superset of the real matches that the
+    caller verifies with a plain substring test:
+
+    - queries of 3+ characters intersect the postings of their trigrams,
+      starting from the rarest one
+    - shorter queries take the union of the postings of every trigram
+      that contains them
+    """
+
+    def __init__(self):
+        self._postings = {}
+
+    # ---------- maintenance ----------
+
+    def add(self, seq, blog):
+        for gram in blog_trigrams(blog):
+            seqs = self._postings.get(gram)
+            if seqs is None:
+                self._postings[gram] = array("q", [seq])
+            elif seq > seqs[-1]:
+                seqs.append(seq)
+            else:
+                bisect.insort(seqs, seq)
+
+    def remove(self, seq, blog):
+        for gram in blog_trigrams(blog):
+            seqs = self._postings.get(gram)
+            if seqs is None:
+                continue
+            i = bisect.bisect_left(seqs, seq)
+            if i < len(seqs) and seqs[i] == seq:
+                del seqs[i]
+            if not seqs:
+                del self._postings[gram]
+
+    def replace(self, seq, old_blog, new_blog):
+        self.remove(seq, old_blog)
+        self.add(seq, new_blog)
+
+    @classmethod
+    def build(cls, items):
+        """Index (seq, blog) pairs given in increasing seq order."""
+        postings = {}
+        for seq, blog in items:
+            for gram in blog_trigrams(blog):
+                seqs = postings.get(gram)
+                if seqs is None:
+                    postings[gram] = [seq]
+                else:
+                    seqs.append(seq)
+        # plain lists while appending, compact arrays once built
+        index = cls()
+        index._postings = {gram: array("q", seqs) for gram, seqs in postings.items()}
+        return index
+
+    # ---------- queries ----------
+
+    @staticmethod
+    def _contains(seqs, seq):
+        i = bisect.bisect_left(seqs, seq)
+        return i < len(seqs) and seqs[i] == seq
+
+    def candidates(self, query):
+        """Sorted sequence numbers of the blogs that may contain query."""
+        if len(query) < 3:
+            found = set()
+            for gram, seqs in self._postings.items():
+                if query in gram:
+                    found.update(seqs)
+            return sorted(found)
+
+        postings = []
+        for i in range(len(query) - 2):
+            seqs = self._postings.get(query[i:i + 3])
+            if seqs is None:
+                return []
+            postings.append(seqs)
+        postings.sort(key=len)
+        rarest, others = postings[0], postings[1:]
+        return [seq for seq in rarest if all(self._contains(o, seq) for o in others)]
@@ -1,7 +1,7 @@
 # blogging/gui/dashboard_gui.py
 # main dashboard after logging in: blogs + posts
 
-from PyQt6.QtCore import Qt, pyqtSignal, QAbstractTableModel, QModelIndex
+from PyQt6.QtCore import Qt, pyqtSignal, QAbstractTableModel, QModelIndex, QTimer
 from PyQt6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -15,38 +15,130 @@ from PyQt6.QtWidgets import (
     QFormLayout,
     QPlainTextEdit,
     QMessageBox,
+    QCheckBox,
 )
 
+from blogging.configuration import Configuration
 from blogging.exception.illegal_access_exception import IllegalAccessException
-from blogging.exception.illegal_operation_exception import IllegalOperationException
 from blogging.exception.no_current_blog_exception import NoCurrentBlogException
+from blogging.gui.search_cache import SearchCache, blog_matches, narrow, post_matches
+from blogging.gui.worker import Worker
 
 
-# ---------- helper table model for blogs ----------
+# ---------- helper table models ----------
 
-class BlogTableModel(QAbstractTableModel):
-    def __init__(self, blogs=None):
+class PagedTableModel(QAbstractTableModel):
+    """
+    Table whose rows can arrive one page at a time: set_pages() shows the
+    first Page and the view asks for the following ones (canFetchMore /
+    fetchMore) only when it is scrolled down to them.
+
+    - the next page is fetched through submit (Worker.submit) and its rows
+      are inserted when the result comes back; one fetch at a time
+    - a failed fetch stops paging and is passed to on_error
+    """
+
+    headers = []
+
+    def __init__(self, items=None, submit=None, on_error=None):
         super().__init__()
-        self._blogs = blogs or []  # list of Blog objects
+        self._rows = [self._to_row(item) for item in items or []]
+        self._submit = submit
+        self._on_error = on_error
+        # paged mode: fetch_page(cursor) returns the Page after cursor
+        self._fetch_page = None
+        self._next_cursor = None
+        # token of the page fetch on its way, None if there is none
+        self._fetching = None
+
+    def _to_row(self, item):
+        # what is kept for each item of a page
+        return item
+
+    def _cell(self, row, col):
+        return None
 
-    def set_blogs(self, blogs):
+    def set_items(self, items):
+        self.beginResetModel()
+        self._rows = [self._to_row(item) for item in items or []]
+        self._fetch_page = None
+        self._next_cursor = None
+        # a page still being fetched belongs to the old rows
+        self._fetching = None
+        self.endResetModel()
+
+    def set_pages(self, first_page, fetch_page):
         self.beginResetModel()
-        self._blogs = blogs or []
+        self._rows = [self._to_row(item) for item in first_page.items]
+        self._fetch_page = fetch_page
+        self._next_cursor = first_page.next_cursor
+        self._fetching = None
         self.endResetModel()
 
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._next_cursor is not None and self._fetching is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        token = self._fetching = object()
+
+        def done(page):
+            if self._fetching is not token:
+                # the rows were replaced meanwhile
+                return
+            self._fetching = None
+            self._next_cursor = page.next_cursor
+            if not page.items:
+                return
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(page.items) - 1)
+            self._rows.extend(self._to_row(item) for item in page.items)
+            self.endInsertRows()
+
+        def failed(e):
+            if self._fetching is not token:
+                return
+            # e.g. logged out meanwhile: stop paging, keep what is shown
+            self._fetching = None
+            self._next_cursor = None
+            if self._on_error is not None:
+                self._on_error(e)
+
+        self._submit(self._fetch_page, self._next_cursor, on_result=done, on_error=failed)
+
     def rowCount(self, parent=QModelIndex()):
-        return len(self._blogs)
+        return 0 if parent.isValid() else len(self._rows)
 
     def columnCount(self, parent=QModelIndex()):
-        # id, name, url, email
-        return 4
+        return len(self.headers)
 
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
             return None
+        return self._cell(self._rows[index.row()], index.column())
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            if 0 <= section < len(self.headers):
+                return self.headers[section]
+        return None
+
+    def row_at(self, row):
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+
+class BlogTableModel(PagedTableModel):
+    headers = ["ID", "Name", "URL", "Email"]
 
-        blog = self._blogs[index.row()]
-        col = index.column()
+    def set_blogs(self, blogs):
+        self.set_items(blogs)
+
+    def _cell(self, blog, col):
         if col == 0:
             return str(blog.id)
         elif col == 1:
@@ -57,20 +149,37 @@ class BlogTableModel(QAbstractTableModel):
             return blog.email
         return None
 
-    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
-        if role != Qt.ItemDataRole.DisplayRole:
-            return None
-        if orientation == Qt.Orientation.Horizontal:
-            headers = ["ID", "Name", "URL", "Email"]
-            if 0 <= section < len(headers):
-                return headers[section]
-        return None
-
     def blog_at(self, row):
-        if 0 <= row < len(self._blogs):
-            return self._blogs[row]
+        return self.row_at(row)
+
+
+class PostTableModel(PagedTableModel):
+    """
+    Posts of the current blog. Rows only keep the code, title, update time
+    and a one-line preview; the full text of a post is loaded when its
+    row is selected.
+    """
+
+    headers = ["Code", "Title", "Updated", "Text"]
+    preview_length = 80
+
+    def _to_row(self, post):
+        preview = " ".join(post.text[:self.preview_length + 1].split())
+        if len(preview) > self.preview_length:
+            preview = preview[:self.preview_length - 3] + "..."
+        return (post.code, post.title, post.update.strftime("%Y-%m-%d %H:%M"), preview)
+
+    def _cell(self, row, col):
+        if col == 0:
+            return str(row[0])
+        if 0 < col < len(row):
+            return row[col]
         return None
 
+    def code_at(self, row):
+        found = self.row_at(row)
+        return found[0] if found else None
+
 
 # ---------- main Dashboard widget ----------
 
@@ -85,7 +194,14 @@ class Dashboard(QWidget):
         self.current_blog_id = None
         self.current_blog_name = None
 
-        self.blogs_model = BlogTableModel([])
+        # controller calls run here, off the event loop
+        self.worker = Worker(self)
+
+        self.blogs_model = BlogTableModel([], submit=self.worker.submit, on_error=self._on_error)
+        self.posts_model = PostTableModel([], submit=self.worker.submit, on_error=self._on_error)
+        self._post_text_request = None
+        # recent blog / post search results
+        self.search_cache = SearchCache()
 
         main_layout = QVBoxLayout()
         self.setLayout(main_layout)
@@ -118,13 +234,73 @@ class Dashboard(QWidget):
         self._build_post_tab()
         self.tabs.setTabEnabled(1, False)  # posts tab disabled first
 
+        # performance statistics tab
+        self.stats_tab = QWidget()
+        self.tabs.addTab(self.stats_tab, "Stats")
+        self._build_stats_tab()
+        self.tabs.currentChanged.connect(self._on_tab_changed)
+
     # ---------- logout ----------
 
     def _do_logout(self):
         # controller.logout is actually called by BloggingGUI.logout_gui,
-        # we just emit the signal here
+        # we just emit the signal here, once queued calls are dropped and
+        # the running one is done
+        self.worker.cancel_all()
+        self.worker.wait()
         self.clicked_logout.emit()
 
+    # ---------- background calls ----------
+
+    def _run(self, fn, *args, on_result=None, channel=None, **kwargs):
+        # run a controller call on the worker; errors end up in _on_error
+        return self.worker.submit(fn, *args, on_result=on_result, on_error=self._on_error,
+                                  channel=channel, **kwargs)
+
+    def _debounce_timer(self, slot):
+        # single-shot timer that every start() pushes back again
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setInterval(Configuration.search_debounce_ms)
+        timer.timeout.connect(slot)
+        return timer
+
+    def _search(self, scope, query, generation, fetch, matches, show, channel):
+        """
+        Show the results of query: straight from the cache, by filtering
+        the cached results of a shorter query it contains, or by running
+        fetch(). All of it runs on the worker, which is the only thread
+        that reads the DAOs (generation() included) and the cache;
+        generation() returns None while there is nothing loaded to ask.
+        """
+        def search():
+            current = generation()
+            results = None
+            if current is not None:
+                results = self.search_cache.get(scope, query, current)
+                if results is not None:
+                    return results
+                base = self.search_cache.base_for(scope, query, current)
+                if base is not None:
+                    results = narrow(base, query, matches)
+            if results is None:
+                results = fetch()
+                # a search may load or reload what it looks at
+                current = generation()
+            if current is not None:
+                self.search_cache.put(scope, query, current, results)
+            return results
+
+        self._run(search, on_result=show, channel=channel)
+
+    def _on_error(self, e):
+        if isinstance(e, IllegalAccessException):
+            self._show_error("You must login first.")
+        elif isinstance(e, NoCurrentBlogException):
+            self._show_error("You must first select a current blog.")
+        else:
+            self._show_error(str(e))
+
     # ---------- BLOG TAB BUILD + HANDLERS ----------
 
     def _build_blog_tab(self):
@@ -137,6 +313,9 @@ class Dashboard(QWidget):
         self.blog_search_edit = QLineEdit()
         self.blog_search_edit.setPlaceholderText("id, name, url, or email")
         search_row.addWidget(self.blog_search_edit)
+        # search as you type, once typing pauses
+        self.blog_search_timer = self._debounce_timer(self._retrieve_blogs)
+        self.blog_search_edit.textChanged.connect(self.blog_search_timer.start)
 
         self.btn_retrieve_blogs = QPushButton("Retrieve blogs")
         self.btn_retrieve_blogs.clicked.connect(self._retrieve_blogs)
@@ -218,26 +397,32 @@ class Dashboard(QWidget):
         row = index_list[0].row()
         return self.blogs_model.blog_at(row)
 
+    @staticmethod
+    def _more_hint(page):
+        return " (scroll for more)" if page.next_cursor is not None else ""
+
     def _list_blogs(self):
-        try:
-            blogs = self.controller.list_blogs()
-            self.blogs_model.set_blogs(blogs)
-            self.blog_msg.setText(f"Listed {len(blogs)} blog(s).")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except Exception as e:
-            self._show_error(str(e))
+        def show(page):
+            self.blogs_model.set_pages(page, lambda cursor: self.controller.list_blogs_page(
+                limit=Configuration.page_size, cursor=cursor))
+            self.blog_msg.setText(f"Listed {len(page)} blog(s){self._more_hint(page)}.")
+
+        self._run(self.controller.list_blogs_page, limit=Configuration.page_size,
+                  on_result=show, channel="blogs")
 
     def _retrieve_blogs(self):
+        self.blog_search_timer.stop()
         key = self.blog_search_edit.text().strip()
-        try:
-            blogs = self.controller.retrieve_blogs(key)
+        if not key:
+            self._list_blogs()
+            return
+
+        def show(blogs):
             self.blogs_model.set_blogs(blogs)
             self.blog_msg.setText(f"Retrieved {len(blogs)} blog(s).")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._search(("blogs",), key.lower(), lambda: self.controller.blog_dao.generation,
+                     lambda: self.controller.retrieve_blogs(key), blog_matches, show, "blogs")
 
     def _load_selected_blog_into_form(self):
         blog = self._get_selected_blog()
@@ -258,19 +443,17 @@ class Dashboard(QWidget):
             self._show_error("No blog selected in the table.")
             return
 
-        try:
-            self.controller.set_current_blog(blog.id)
+        def done(_):
             self.current_blog_id = blog.id
             self.current_blog_name = blog.name
             self.current_blog_label.setText(f"Current blog: {blog.id} - {blog.name}")
             self.tabs.setTabEnabled(1, True)  # enable posts tab
+            # the post table still shows the previous blog's posts
+            self.posts_model.set_items([])
+            self.post_full_text.clear()
             self.blog_msg.setText(f"Current blog set to {blog.id}.")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except IllegalOperationException as e:
-            self._show_error(str(e))
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.set_current_blog, blog.id, on_result=done)
 
     def _create_blog(self):
         try:
@@ -287,16 +470,11 @@ class Dashboard(QWidget):
             self._show_error("Name, URL and email cannot be empty.")
             return
 
-        try:
-            self.controller.create_blog(bid, name, url, email)
+        def done(_):
             self.blog_msg.setText("Blog created.")
             self._list_blogs()
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except IllegalOperationException as e:
-            self._show_error(str(e))
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.create_blog, bid, name, url, email, on_result=done)
 
     def _update_blog(self):
         # new id from the form
@@ -316,20 +494,15 @@ class Dashboard(QWidget):
 
         old_id = self._selected_blog_id_for_update or new_id
 
-        try:
-            ok = self.controller.update_blog(old_id, new_id, name, url, email)
+        def done(ok):
             if ok:
                 self.blog_msg.setText("Blog updated.")
                 self._selected_blog_id_for_update = new_id
                 self._list_blogs()
             else:
                 self._show_error("Blog not found to update.")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except IllegalOperationException as e:
-            self._show_error(str(e))
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.update_blog, old_id, new_id, name, url, email, on_result=done)
 
     def _delete_blog(self):
         try:
@@ -338,8 +511,7 @@ class Dashboard(QWidget):
             self._show_error("Blog ID must be an integer.")
             return
 
-        try:
-            ok = self.controller.delete_blog(bid)
+        def done(ok):
             if ok:
                 self.blog_msg.setText("Blog deleted.")
                 # if we just deleted current blog, clear it
@@ -351,16 +523,8 @@ class Dashboard(QWidget):
                 self._list_blogs()
             else:
                 self._show_error("Blog not found to delete.")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except IllegalOperationException as e:
-            self._show_error(str(e))
-        except NoCurrentBlogException as e:
-            # in your A4 controller tests they may raise this when trying to
-            # delete the current blog
-            self._show_error(str(e))
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.delete_blog, bid, on_result=done)
 
     # ---------- POST TAB BUILD + HANDLERS ----------
 
@@ -378,6 +542,8 @@ class Dashboard(QWidget):
         self.post_search_edit = QLineEdit()
         self.post_search_edit.setPlaceholderText("part of title or text")
         search_row.addWidget(self.post_search_edit)
+        self.post_search_timer = self._debounce_timer(self._retrieve_posts)
+        self.post_search_edit.textChanged.connect(self.post_search_timer.start)
 
         self.btn_retrieve_posts = QPushButton("Retrieve posts")
         self.btn_retrieve_posts.clicked.connect(self._retrieve_posts)
@@ -389,10 +555,20 @@ class Dashboard(QWidget):
 
         layout.addLayout(search_row)
 
-        # QPlainTextEdit to show posts (list / retrieve)
-        self.posts_display = QPlainTextEdit()
-        self.posts_display.setReadOnly(True)
-        layout.addWidget(self.posts_display)
+        # table of posts (list / retrieve), filled page by page
+        self.post_table = QTableView()
+        self.post_table.setModel(self.posts_model)
+        self.post_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.post_table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        self.post_table.horizontalHeader().setStretchLastSection(True)
+        self.post_table.selectionModel().currentRowChanged.connect(self._show_selected_post)
+        layout.addWidget(self.post_table)
+
+        # full text of the selected post
+        self.post_full_text = QPlainTextEdit()
+        self.post_full_text.setReadOnly(True)
+        self.post_full_text.setPlaceholderText("Select a post to read it.")
+        layout.addWidget(self.post_full_text)
 
         # group box for creating posts
         create_group = QGroupBox("Create new post")
@@ -451,49 +627,65 @@ class Dashboard(QWidget):
         self.post_msg = QLabel("")
         layout.addWidget(self.post_msg)
 
-    def _refresh_posts_display(self, posts):
-        # helper: show list of Post objects in the QPlainTextEdit
-        lines = []
-        for p in posts:
-            lines.append(f"Code: {p.code}")
-            lines.append(f"Title: {p.title}")
-            lines.append("Text:")
-            lines.append(p.text)
-            lines.append("-" * 40)
-        self.posts_display.setPlainText("\n".join(lines))
+    def _refresh_posts_display(self, page, fetch_page):
+        # helper: show the first page of posts; the table fetches the rest
+        self.posts_model.set_pages(page, fetch_page)
+        self.post_full_text.clear()
+
+    def _show_selected_post(self, current, previous=None):
+        # only the selected post's full text is loaded
+        code = self.posts_model.code_at(current.row())
+        if code is None:
+            self.worker.cancel(self._post_text_request)
+            self.post_full_text.clear()
+            return
+
+        def show(post):
+            if post is None:
+                self.post_full_text.setPlainText("(this post no longer exists)")
+                return
+            self.post_full_text.setPlainText(f"{post.title}\n\n{post.text}")
+            self.update_code_edit.setText(str(post.code))
+            self.delete_code_edit.setText(str(post.code))
+
+        self._post_text_request = self._run(self.controller.search_post, code,
+                                            on_result=show, channel="post_text")
+
+    def _update_post_blog_label(self):
+        if self.current_blog_name:
+            self.post_blog_label.setText(
+                f"Posts for current blog: {self.current_blog_id} - {self.current_blog_name}"
+            )
 
     def _list_posts(self):
-        try:
-            posts = self.controller.list_posts()
-            self._refresh_posts_display(posts)
-            self.post_msg.setText(f"Listed {len(posts)} post(s).")
-            if self.current_blog_name:
-                self.post_blog_label.setText(
-                    f"Posts for current blog: {self.current_blog_id} - {self.current_blog_name}"
-                )
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except NoCurrentBlogException:
-            self._show_error("You must first select a current blog.")
-        except Exception as e:
-            self._show_error(str(e))
+        def show(page):
+            self._refresh_posts_display(page, lambda cursor: self.controller.list_posts_page(
+                limit=Configuration.page_size, cursor=cursor))
+            self.post_msg.setText(f"Listed {len(page)} post(s){self._more_hint(page)}.")
+            self._update_post_blog_label()
+
+        self._run(self.controller.list_posts_page, limit=Configuration.page_size,
+                  on_result=show, channel="posts")
 
     def _retrieve_posts(self):
+        self.post_search_timer.stop()
         key = self.post_search_edit.text().strip()
-        try:
-            posts = self.controller.retrieve_posts(key)
-            self._refresh_posts_display(posts)
+        if not key:
+            self._list_posts()
+            return
+
+        def show(posts):
+            self.posts_model.set_items(posts)
+            self.post_full_text.clear()
             self.post_msg.setText(f"Retrieved {len(posts)} post(s).")
-            if self.current_blog_name:
-                self.post_blog_label.setText(
-                    f"Posts for current blog: {self.current_blog_id} - {self.current_blog_name}"
-                )
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except NoCurrentBlogException:
-            self._show_error("You must first select a current blog.")
-        except Exception as e:
-            self._show_error(str(e))
+            self._update_post_blog_label()
+
+        blog = self.controller.current_blog
+        scope = ("posts", blog.id if blog is not None else None)
+        # the cache is only asked once the blog's posts are loaded
+        generation = lambda: blog.posts_generation() if blog is not None else None
+        self._search(scope, key.lower(), generation, lambda: self.controller.retrieve_posts(key),
+                     post_matches, show, "posts")
 
     def _create_post(self):
         title = self.post_title_edit.text().strip()
@@ -503,19 +695,14 @@ class Dashboard(QWidget):
             self._show_error("Title and text must not be empty.")
             return
 
-        try:
-            p = self.controller.create_post(title, text)
+        def done(p):
             self.post_msg.setText(f"Post created with code {p.code}.")
             self.post_title_edit.clear()
             self.post_text_edit.clear()
             # refresh list to show new post
             self._list_posts()
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except NoCurrentBlogException:
-            self._show_error("You must first select a current blog.")
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.create_post, title, text, on_result=done)
 
     def _update_post(self):
         try:
@@ -531,19 +718,14 @@ class Dashboard(QWidget):
             self._show_error("New title and text must not be empty.")
             return
 
-        try:
-            ok = self.controller.update_post(code, title, text)
+        def done(ok):
             if ok:
                 self.post_msg.setText("Post updated.")
                 self._list_posts()
             else:
                 self._show_error("Post not found to update.")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except NoCurrentBlogException:
-            self._show_error("You must first select a current blog.")
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.update_post, code, title, text, on_result=done)
 
     def _delete_post(self):
         try:
@@ -552,19 +734,65 @@ class Dashboard(QWidget):
             self._show_error("Post code must be an integer.")
             return
 
-        try:
-            ok = self.controller.delete_post(code)
+        def done(ok):
             if ok:
                 self.post_msg.setText("Post deleted.")
                 self._list_posts()
             else:
                 self._show_error("Post not found to delete.")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except NoCurrentBlogException:
-            self._show_error("You must first select a current blog.")
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.delete_post, code, on_result=done)
+
+    # ---------- STATS TAB BUILD + HANDLERS ----------
+
+    def _build_stats_tab(self):
+        layout = QVBoxLayout()
+        self.stats_tab.setLayout(layout)
+
+        row = QHBoxLayout()
+        self.stats_enabled_box = QCheckBox("Collect statistics")
+        self.stats_enabled_box.setChecked(self.controller.stats_enabled())
+        self.stats_enabled_box.toggled.connect(self._toggle_stats)
+        row.addWidget(self.stats_enabled_box)
+        row.addStretch()
+
+        self.btn_refresh_stats = QPushButton("Refresh")
+        self.btn_refresh_stats.clicked.connect(self._refresh_stats)
+        row.addWidget(self.btn_refresh_stats)
+
+        self.btn_reset_stats = QPushButton("Reset")
+        self.btn_reset_stats.clicked.connect(self._reset_stats)
+        row.addWidget(self.btn_reset_stats)
+        layout.addLayout(row)
+
+        # fixed-width text so the report's columns line up
+        self.stats_text = QPlainTextEdit()
+        self.stats_text.setReadOnly(True)
+        self.stats_text.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        font = self.stats_text.font()
+        font.setFamily("monospace")
+        font.setStyleHint(font.StyleHint.Monospace)
+        self.stats_text.setFont(font)
+        layout.addWidget(self.stats_text)
+
+    def _on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.stats_tab:
+            self._refresh_stats()
+
+    def _toggle_stats(self, checked):
+        self._run(self.controller.collect_stats, checked, on_result=lambda _: self._refresh_stats())
+
+    def _reset_stats(self):
+        self._run(self.controller.reset_stats, on_result=lambda _: self._refresh_stats())
+
+    def _refresh_stats(self):
+        def done(report):
+            cache = self.search_cache
+            self.stats_text.setPlainText(
+                f"{report}\n\nsearch cache: {cache.hits} hits, {cache.narrowed} narrowed, "
+                f"{cache.misses} misses")
+
+        self._run(self.controller.stats_report, on_result=done, channel="stats")
 
     # ---------- helpers ----------
 
@@ -0,0 +1,87 @@
+# blogging/gui/search_cache.py
+# recent search results of the dashboard
+
+from collections import OrderedDict
+
+from blogging.dao.trigram_index import blog_fields
+
+
+def blog_matches(blog, query):
+    # same test as the blog DAOs' retrieve_blogs (query is lower-case)
+    return any(query in value for value in blog_fields(blog))
+
+
+def post_matches(post, query):
+    # same test as the post DAOs' retrieve_posts (query is lower-case)
+    return query in post.title.lower() or query in post.text.lower()
+
+
+class SearchCache:
+    """
+    LRU cache of search results, keyed by (scope, query).
+
+    - scope names what was searched, e.g. ("blogs",) or ("posts", blog id)
+    - every entry remembers the DAO generation it was computed at; an
+      entry whose DAO has changed since is never returned
+    - queries are case-insensitive substrings, so the results for a
+      query are a subset of the results for any shorter query it
+      contains; narrow() answers such a query by filtering those results
+      instead of searching again
+    """
+
+    def __init__(self, max_entries=32, max_results=50000):
+        self.max_entries = max_entries
+        # result lists longer than this are not kept
+        self.max_results = max_results
+        # (scope, query) -> (generation, results)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.narrowed = 0
+        self.misses = 0
+
+    def get(self, scope, query, generation):
+        """Cached results of query, or None."""
+        key = (scope, query)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != generation:
+            if entry is not None:
+                del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def base_for(self, scope, query, generation):
+        """
+        Cached results of the longest query contained in query (these
+        include every result of query), or None.
+        """
+        best = None
+        for (entry_scope, cached_query), (entry_generation, results) in self._entries.items():
+            if (entry_scope == scope and entry_generation == generation and cached_query
+                    and cached_query in query
+                    and (best is None or len(cached_query) > len(best[0]))):
+                best = (cached_query, results)
+        if best is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end((scope, best[0]))
+        self.narrowed += 1
+        return best[1]
+
+    def put(self, scope, query, generation, results):
+        if len(results) > self.max_results:
+            return
+        key = (scope, query)
+        self._entries[key] = (generation, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def narrow(results, query, matches):
+    """Keep the results that match query, in their order."""
+    return [item for item in results if matches(item, query)]
@@ -0,0 +1,137 @@
+# blogging/gui/worker.py
+# runs controller calls off the Qt event loop
+
+import itertools
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+
+class WorkerSignals(QObject):
+    # request id, result / exception; emitted from the pool thread and
+    # delivered on the thread the Worker lives in (the GUI thread)
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, object)
+
+
+class ControllerTask(QRunnable):
+    """One controller call, run on a QThreadPool thread."""
+
+    def __init__(self, request_id, fn, args, kwargs, signals):
+        super().__init__()
+        self.request_id = request_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = signals
+        self.cancelled = threading.Event()
+        # the Worker keeps track of the task; Qt must not delete it
+        self.setAutoDelete(False)
+
+    def run(self):
+        if self.cancelled.is_set():
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.signals.failed.emit(self.request_id, e)
+            return
+        if not self.cancelled.is_set():
+            self.signals.finished.emit(self.request_id, result)
+
+
+class Worker(QObject):
+    """
+    Runs controller calls on a QThreadPool so the window keeps repainting
+    while the DAOs read and write files.
+
+    - submit() queues fn(*args, **kwargs) and returns a request id; its
+      result or exception is handed to on_result / on_error on the GUI
+      thread
+    - requests run one at a time, in the order they were submitted,
+      because the controller and its DAOs are not meant to be used from
+      several threads at once
+    - requests on the same channel (e.g. "blog_search") replace each
+      other: submitting one cancels the earlier ones, so only the latest
+      search ever reaches the screen
+    - cancel() / cancel_all() drop requests; a request that is already
+      running finishes, but its result is discarded
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+        self.signals = WorkerSignals()
+        self.signals.finished.connect(self._on_finished)
+        self.signals.failed.connect(self._on_failed)
+
+        self._ids = itertools.count(1)
+        # request id -> (task, on_result, on_error, channel)
+        self._requests = {}
+        # channel -> id of the latest request on it
+        self._latest = {}
+
+    def submit(self, fn, *args, on_result=None, on_error=None, channel=None, **kwargs):
+        request_id = next(self._ids)
+        if channel is not None:
+            previous = self._latest.get(channel)
+            if previous is not None:
+                self.cancel(previous)
+            self._latest[channel] = request_id
+
+        task = ControllerTask(request_id, fn, args, kwargs, self.signals)
+        self._requests[request_id] = (task, on_result, on_error, channel)
+        self.pool.start(task)
+        return request_id
+
+    def cancel(self, request_id):
+        request = self._requests.pop(request_id, None)
+        if request is None:
+            return False
+        task, _, _, channel = request
+        task.cancelled.set()
+        # take it off the queue if it has not started yet
+        self.pool.tryTake(task)
+        if channel is not None and self._latest.get(channel) == request_id:
+            del self._latest[channel]
+        return True
+
+    def cancel_channel(self, channel):
+        request_id = self._latest.get(channel)
+        return request_id is not None and self.cancel(request_id)
+
+    def cancel_all(self):
+        for request_id in list(self._requests):
+            self.cancel(request_id)
+
+    def pending(self):
+        return len(self._requests)
+
+    def wait(self, msecs=-1):
+        """Block until the running request (if any) is done."""
+        return self.pool.waitForDone(msecs)
+
+    def _finish(self, request_id):
+        request = self._requests.pop(request_id, None)
+        if request is None:
+            # cancelled after it had started running
+            return None
+        channel = request[3]
+        if channel is not None and self._latest.get(channel) == request_id:
+            del self._latest[channel]
+        return request
+
+    @pyqtSlot(int, object)
+    def _on_finished(self, request_id, result):
+        request = self._finish(request_id)
+        if request is not None and request[1] is not None:
+            request[1](result)
+
+    @pyqtSlot(int, object)
+    def _on_failed(self, request_id, error):
+        request = self._finish(request_id)
+        if request is not None and request[2] is not None:
+            request[2](error)
@@ -1,8 +1,28 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_micros(moment):
+    """Microseconds from 1970-01-01 to a (naive) datetime."""
+    return (moment.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+
+
+def _from_micros(micros):
+    return _EPOCH + timedelta(microseconds=micros)
 
 
 class Post:
-    """Represents a single blog post."""
+    """
+    Represents a single blog post.
+
+    Timestamps are kept as integer microseconds since 1970-01-01 and only
+    turned into datetime objects when creation / update are read.
+    """
+
+    __slots__ = ("code", "title", "text", "_creation", "_update")
 
     def __init__(self, code, title, text, creation=None, update=None):
         """
@@ -40,15 +60,45 @@ class Post:
             return True
         return False
 
+    @property
+    def creation(self):
+        return _from_micros(self._creation)
+
+    @creation.setter
+    def creation(self, moment):
+        self._creation = _to_micros(moment)
+
+    @property
+    def update(self):
+        return _from_micros(self._update)
+
+    @update.setter
+    def update(self, moment):
+        self._update = _to_micros(moment)
+
+    def __getstate__(self):
+        return (self.code, self.title, self.text, self._creation, self._update)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            # posts pickled before __slots__ carry their __dict__
+            self.code = state["code"]
+            self.title = state["title"]
+            self.text = state["text"]
+            self.creation = state["creation"]
+            self.update = state["update"]
+        else:
+            self.code, self.title, self.text, self._creation, self._update = state
+
     def __eq__(self, other):
-        """Compare two Post objects for equality."""
+        """Compare two Post objects for equality (timestamps to the second)."""
         if isinstance(other, Post):
             return (
                 self.code == other.code and
                 self.title == other.title and
                 self.text == other.text and
-                int(self.creation.strftime("%Y%m%d%H%M%S")) == int(other.creation.strftime("%Y%m%d%H%M%S")) and
-                int(self.update.strftime("%Y%m%d%H%M%S")) == int(other.update.strftime("%Y%m%d%H%M%S"))
+                self._creation // 1000000 == other._creation // 1000000 and
+                self._update // 1000000 == other._update // 1000000
             )
         return False
 
@@ -0,0 +1,172 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from blogging.configuration import Configuration
+
+# cProfile, tracemalloc and linecache are imported by the Profiler:
+# python -m blogging imports this module on every start to read the
+# options, and must stay quick to start when profiling is off
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of all other threads every `interval`
+    seconds and counts them in the collapsed format flame graph tools
+    read: one line per stack, outermost frame first, frames separated by
+    ';', followed by the number of samples.
+
+    cProfile only sees the thread it was enabled on; the sampler also
+    covers the GUI's worker thread.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own:
+                    self.counts[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """
+    Runs cProfile and tracemalloc (and optionally a StackSampler) around
+    a session and writes, next to each other in out_dir:
+
+    - <name>-<time>.pstats: the cProfile statistics (pstats.Stats reads them)
+    - <name>-<time>-alloc.txt: the top allocation sites still holding memory
+    - <name>-<time>-stacks.txt: the collapsed stacks, if stacks is set
+    """
+
+    def __init__(self, name, out_dir=None, stacks=False, top=None, interval=None):
+        self.name = name
+        self.out_dir = out_dir or Configuration.profile_dir
+        self.top = Configuration.profile_top_allocations if top is None else top
+        self.sampler = None
+        if stacks:
+            self.sampler = StackSampler(Configuration.profile_sample_interval if interval is None else interval)
+        import cProfile
+        self.profile = cProfile.Profile()
+        self.paths = []
+
+    def start(self):
+        import tracemalloc
+        tracemalloc.start()
+        if self.sampler is not None:
+            self.sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        """Stop profiling, write the reports and return their paths."""
+        import tracemalloc
+        self.profile.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        prefix = os.path.join(self.out_dir, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+        self.paths = [prefix + ".pstats", prefix + "-alloc.txt"]
+        self.profile.dump_stats(self.paths[0])
+        self._write_allocations(snapshot, current, peak, self.paths[1])
+        if self.sampler is not None:
+            self.paths.append(prefix + "-stacks.txt")
+            self.sampler.write(self.paths[2])
+        return self.paths
+
+    def _write_allocations(self, snapshot, current, peak, path):
+        import linecache
+        import tracemalloc
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        stats = snapshot.statistics("lineno")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"traced memory: {current / 1024:.1f} KiB current, {peak / 1024:.1f} KiB peak\n")
+            f.write(f"top {self.top} allocation sites:\n")
+            for i, stat in enumerate(stats[:self.top], 1):
+                frame = stat.traceback[0]
+                f.write(f"\n#{i}: {frame.filename}:{frame.lineno}: "
+                        f"{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                line = linecache.getline(frame.filename, frame.lineno).strip()
+                if line:
+                    f.write(f"    {line}\n")
+
+
+def profile_options(argv, environ=None):
+    """
+    Take the profiling options out of argv.
+
+    --profile[=DIR] or the BLOGGING_PROFILE environment variable (1 or a
+    directory) turn profiling on; --profile-stacks or
+    BLOGGING_PROFILE_STACKS=1 also record collapsed stacks.
+    Returns (remaining arguments, options), options being None when
+    profiling is off and a dict of Profiler arguments otherwise.
+    """
+    environ = os.environ if environ is None else environ
+    enabled = environ.get("BLOGGING_PROFILE", "") not in ("", "0")
+    out_dir = None if environ.get("BLOGGING_PROFILE", "") in ("", "0", "1") else environ["BLOGGING_PROFILE"]
+    stacks = environ.get("BLOGGING_PROFILE_STACKS", "") not in ("", "0")
+
+    remaining = []
+    for arg in argv:
+        if arg == "--profile":
+            enabled = True
+        elif arg.startswith("--profile="):
+            enabled = True
+            out_dir = arg.split("=", 1)[1] or None
+        elif arg == "--profile-stacks":
+            enabled = stacks = True
+        else:
+            remaining.append(arg)
+
+    if not enabled:
+        return remaining, None
+    return remaining, {"out_dir": out_dir, "stacks": stacks}
+
+
+def run_profiled(name, fn, out_dir=None, stacks=False):
+    """Run fn() under a Profiler; the reports are written however fn ends."""
+    profiler = Profiler(name, out_dir=out_dir, stacks=stacks)
+    profiler.start()
+    try:
+        return fn()
+    finally:
+        for path in profiler.stop():
+            print(f"profile written to {path}", file=sys.stderr)
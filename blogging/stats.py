@@ -0,0 +1,186 @@
+import functools
+import threading
+import time
+
+from blogging.configuration import Configuration
+
+
+class OperationStats:
+    """
+    Counters of one operation:
+
+    - calls, errors and total / min / max latency
+    - a latency histogram with power-of-two microsecond buckets
+      (bucket b counts calls that took less than 2**b microseconds)
+    - bytes read / written and files opened while the operation ran,
+      including the I/O of everything it called
+    """
+
+    __slots__ = ("calls", "errors", "total_us", "min_us", "max_us", "buckets",
+                 "bytes_read", "bytes_written", "opens")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+        self.buckets = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.opens = 0
+
+    def add_call(self, us, failed):
+        self.calls += 1
+        if failed:
+            self.errors += 1
+        self.total_us += us
+        if self.min_us is None or us < self.min_us:
+            self.min_us = us
+        if us > self.max_us:
+            self.max_us = us
+        bucket = us.bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile_us(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls."""
+        if not self.calls:
+            return 0
+        wanted = fraction * self.calls
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= wanted:
+                return min(2 ** bucket, self.max_us)
+        return self.max_us
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": self.total_us / 1000,
+            "mean_us": self.total_us / self.calls if self.calls else 0,
+            "min_us": self.min_us or 0,
+            "max_us": self.max_us,
+            "p50_us": self.percentile_us(0.5),
+            "p95_us": self.percentile_us(0.95),
+            "p99_us": self.percentile_us(0.99),
+            "histogram": {f"<{2 ** b}us": n for b, n in sorted(self.buckets.items())},
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "opens": self.opens,
+        }
+
+
+class Stats:
+    """
+    Process-wide performance counters, off unless Configuration.collect_stats
+    is set or enable() is called.
+
+    Operations are recorded by the @timed decorator and file I/O by
+    count_io(); while collection is off both return right after checking
+    one flag.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._ops = {}
+        # per thread: stack of [operation name, bytes read, bytes written, opens]
+        self._local = threading.local()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._ops = {}
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, name):
+        frame = [name, 0, 0, 0]
+        self._stack().append(frame)
+        return frame
+
+    def _exit(self, frame, us, failed):
+        stack = self._stack()
+        if stack and stack[-1] is frame:
+            stack.pop()
+        with self._lock:
+            op = self._ops.get(frame[0])
+            if op is None:
+                op = self._ops[frame[0]] = OperationStats()
+            op.add_call(us, failed)
+            op.bytes_read += frame[1]
+            op.bytes_written += frame[2]
+            op.opens += frame[3]
+
+    def count_io(self, read=0, written=0, opens=0):
+        """Charge I/O to every operation running on this thread."""
+        if not self.enabled:
+            return
+        stack = self._stack()
+        for frame in stack:
+            frame[1] += read
+            frame[2] += written
+            frame[3] += opens
+        with self._lock:
+            op = self._ops.get("io")
+            if op is None:
+                op = self._ops["io"] = OperationStats()
+            op.bytes_read += read
+            op.bytes_written += written
+            op.opens += opens
+
+    def snapshot(self):
+        """operation name -> dict of its counters."""
+        with self._lock:
+            return {name: op.as_dict() for name, op in sorted(self._ops.items())}
+
+    def report(self):
+        """The counters as a text table."""
+        rows = self.snapshot()
+        if not rows:
+            return "No statistics recorded." if self.enabled else "Statistics collection is off."
+        lines = [f"{'operation':<34}{'calls':>8}{'mean us':>10}{'p95 us':>9}{'max us':>9}"
+                 f"{'read':>11}{'written':>11}{'opens':>7}"]
+        for name, op in rows.items():
+            lines.append(f"{name:<34}{op['calls']:>8}{op['mean_us']:>10.0f}{op['p95_us']:>9}{op['max_us']:>9}"
+                         f"{op['bytes_read']:>11}{op['bytes_written']:>11}{op['opens']:>7}")
+        return "\n".join(lines)
+
+
+STATS = Stats(Configuration.collect_stats)
+
+
+def timed(fn):
+    """Record calls, latency and I/O of fn under its qualified name."""
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not STATS.enabled:
+            return fn(*args, **kwargs)
+        frame = STATS._enter(name)
+        start = time.perf_counter_ns()
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            STATS._exit(frame, (time.perf_counter_ns() - start) // 1000, failed)
+
+    return wrapper
+
+
+def count_io(read=0, written=0, opens=0):
+    STATS.count_io(read, written, opens)
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+import unittest
+
+from blogging.async_controller import AsyncController
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.exception.illegal_operation_exception import IllegalOperationException
+from blogging.exception.no_current_blog_exception import NoCurrentBlogException
+from blogging.stats import STATS
+from tests.scratch_store import ScratchStoreTest
+
+
+class AsyncControllerTest(ScratchStoreTest):
+
+    collect_stats = True
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    #The async operations behave like the controller's
+    def test_operations(self):
+        async def scenario():
+            async with AsyncController() as c:
+                await c.login("user", "123456")
+                await c.create_blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com")
+                await c.create_blog(2222222222, "Long Trip", "long_trip", "long.trip@gmail.com")
+                self.assertEqual("Long Trip", (await c.search_blog(2222222222)).name)
+                self.assertEqual([2222222222], [b.id for b in await c.retrieve_blogs("trip")])
+                self.assertEqual(1, len(await c.list_blogs_page(limit=1)))
+
+                with self.assertRaises(NoCurrentBlogException):
+                    await c.create_post("Title", "text")
+                await c.set_current_blog(1111111111)
+                await asyncio.gather(*(c.create_post("Post %d" % i, "text %d" % i) for i in range(5)))
+                self.assertEqual([5, 4, 3, 2, 1], [p.code for p in await c.list_posts()])
+                self.assertTrue(await c.update_post(1, "Edited", "edited"))
+                self.assertTrue(await c.delete_post(2))
+                self.assertEqual(["Edited"], [p.title for p in await c.retrieve_posts("edited")])
+
+                with self.assertRaises(IllegalOperationException):
+                    await c.delete_blog(1111111111)
+                self.assertTrue(await c.delete_blog(2222222222))
+                lines = [line async for line in c.export()]
+                self.assertEqual(1 + 4, len(lines))
+                self.assertEqual("blog", json.loads(lines[0])["type"])
+                await c.logout()
+
+        self.run_async(scenario())
+        controller = Controller()
+        controller.login("user", "123456")
+        controller.set_current_blog(1111111111)
+        self.assertEqual(4, len(controller.list_posts()))
+
+    #Calls run off the event loop thread
+    def test_calls_leave_the_loop(self):
+        threads = []
+
+        async def scenario():
+            async with AsyncController() as c:
+                await c.login("user", "123456")
+                original = c.controller.list_blogs
+
+                def list_blogs():
+                    threads.append(threading.current_thread())
+                    return original()
+
+                c.controller.list_blogs = list_blogs
+                await c.list_blogs()
+
+        self.run_async(scenario())
+        self.assertEqual(1, len(threads))
+        self.assertIsNot(threading.main_thread(), threads[0])
+
+    #Concurrent reads of one blog's posts share a single load of its file
+    def test_loads_coalesce(self):
+        controller = Controller()
+        controller.login("user", "123456")
+        controller.create_blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com")
+        controller.set_current_blog(1111111111)
+        for i in range(3):
+            controller.create_post("Post %d" % i, "text %d" % i)
+
+        async def scenario():
+            async with AsyncController() as c:
+                await c.login("user", "123456")
+                await c.set_current_blog(1111111111)
+                STATS.reset()
+                results = await asyncio.gather(*(c.list_posts() for _ in range(8)))
+                self.assertTrue(all(len(posts) == 3 for posts in results))
+                self.assertEqual(1, STATS.snapshot()["PostDAOPickle._load"]["calls"])
+                self.assertEqual({}, c._loads)
+
+        self.run_async(scenario())
+
+    #A failing async batch rolls back
+    def test_batch(self):
+        async def scenario():
+            async with AsyncController() as c:
+                await c.login("user", "123456")
+                await c.create_blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com")
+                with self.assertRaises(RuntimeError):
+                    async with c.batch():
+                        await c.create_blog(2222222222, "Long Trip", "long_trip", "long.trip@gmail.com")
+                        raise RuntimeError("stop")
+                self.assertEqual([1111111111], [b.id for b in await c.list_blogs()])
+                async with c.batch():
+                    await c.create_blog(3333333333, "Side Road", "side_road", "side.road@gmail.com")
+                self.assertEqual([1111111111, 3333333333], [b.id for b in await c.list_blogs()])
+
+        self.run_async(scenario())
+
+    #Calls of other tasks may run while an export is read, between its chunks
+    def test_export_interleaved(self):
+        Configuration.export_batch_size = 2
+        # segments are walked through their index, which the calls change
+        Configuration.post_storage = "segment"
+
+        async def scenario():
+            async with AsyncController() as c:
+                await c.login("user", "123456")
+                for id in (1111111111, 2222222222):
+                    await c.create_blog(id, "Blog %d" % id, "url_%d" % id, "%d@mail" % id)
+                    await c.set_current_blog(id)
+                    for i in range(5):
+                        await c.create_post("Post %d" % i, "text %d" % i)
+                await c.set_current_blog(1111111111)
+
+                records = []
+                async for line in c.export():
+                    records.append(json.loads(line))
+                    n = len(records)
+                    if n <= 6:
+                        await asyncio.gather(c.create_post("Extra %d" % n, "extra"),
+                                             c.create_blog(3333330000 + n, "Extra %d" % n, "extra_%d" % n, "x@mail"))
+                    if n == 4:
+                        await c.delete_post(5)
+                return records
+
+        records = self.run_async(scenario())
+        blogs = [r["id"] for r in records if r["type"] == "blog"]
+        self.assertEqual([1111111111, 2222222222], blogs[:2])
+        # the posts of the second blog were not touched
+        second = [r["title"] for r in records if r["type"] == "post" and r["blog_id"] == 2222222222]
+        self.assertEqual(["Post %d" % i for i in range(5)], second)
+        codes = [r["code"] for r in records if r["type"] == "post" and r["blog_id"] == 1111111111]
+        self.assertEqual(sorted(set(codes)), codes, "each post once, by code")
+        self.assertEqual([1, 2, 3], codes[:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import os
+import unittest
+
+from blogging.controller import Controller
+from blogging.dao.sqlite_store import close_stores
+from blogging.exception.illegal_operation_exception import IllegalOperationException
+from blogging.stats import STATS
+from tests.scratch_store import ScratchStoreTest
+
+
+class BatchTest(ScratchStoreTest):
+
+    backend = "json"
+    post_storage = "pickle"
+    blogs_journal = True
+    collect_stats = True
+
+    def setUp(self):
+        super().setUp()
+        self.controller = Controller()
+        self.controller.login("user", "123456")
+        self.controller.create_blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com")
+        self.controller.create_blog(2222222222, "Long Trip", "long_trip", "long.trip@gmail.com")
+        self.controller.create_blog(3333333333, "Side Road", "side_road", "side.road@gmail.com")
+        self.controller.set_current_blog(1111111111)
+        self.controller.create_post("First", "first post")
+        self.controller.create_post("Second", "second post")
+
+    def state(self, controller):
+        # everything a user can see: blogs in order, current blog's posts
+        blogs = [(b.id, b.name, b.url, b.email) for b in controller.list_blogs()]
+        posts = [(p.code, p.title, p.text, p.update) for p in controller.list_posts()]
+        return blogs, posts
+
+    def reopened(self):
+        close_stores()
+        controller = Controller()
+        controller.login("user", "123456")
+        controller.set_current_blog(1111111111)
+        return controller
+
+    def writes(self):
+        # flushes of the file engines in use
+        names = ("BlogDAOJSON._flush", "PostDAOPickle._flush", "PostDAOSegment._sync")
+        stats = STATS.snapshot()
+        return {name: stats[name]["calls"] for name in names if name in stats}
+
+    def edit(self, controller):
+        controller.create_blog(4444444444, "New Blog", "new_blog", "new.blog@gmail.com")
+        controller.update_blog(2222222222, 2222222223, "Longer Trip", "longer_trip", "longer.trip@gmail.com")
+        controller.delete_blog(3333333333)
+        for i in range(10):
+            controller.create_post("Post %d" % i, "text %d" % i)
+        controller.update_post(1, "First, edited", "edited")
+        controller.delete_post(2)
+
+    #A batch writes each touched file once and the result is persisted
+    def test_commit(self):
+        STATS.reset()
+        with self.controller.batch():
+            self.edit(self.controller)
+        expected = self.state(self.controller)
+
+        self.assertEqual(["Short Journey", "Longer Trip", "New Blog"], [b[1] for b in expected[0]])
+        self.assertEqual(11, len(expected[1]))
+        if self.backend == "json":
+            writes = self.writes()
+            self.assertEqual(1, writes["BlogDAOJSON._flush"])
+            self.assertEqual(1, writes.get("PostDAOPickle._flush", writes.get("PostDAOSegment._sync")))
+        self.assertEqual(expected, self.state(self.reopened()))
+
+    #An exception undoes the batch in memory and on disk
+    def test_rollback(self):
+        self.controller.retrieve_blogs("trip")
+        self.controller.retrieve_posts("post")
+        before = self.state(self.controller)
+
+        with self.assertRaises(RuntimeError):
+            with self.controller.batch():
+                self.edit(self.controller)
+                self.controller.set_current_blog(4444444444)
+                raise RuntimeError("stop")
+
+        self.assertEqual(1111111111, self.controller.current_blog.id)
+        self.assertEqual(before, self.state(self.controller))
+        # lookups and searches see the old data again
+        self.assertIsNone(self.controller.search_blog(4444444444))
+        self.assertEqual("Side Road", self.controller.search_blog(3333333333).name)
+        self.assertEqual([2222222222], [b.id for b in self.controller.retrieve_blogs("trip")])
+        self.assertEqual(["First", "Second"], [p.title for p in self.controller.retrieve_posts("post")])
+        self.assertEqual(before, self.state(self.reopened()))
+
+        # new posts continue from the old codes
+        self.assertEqual(3, self.controller.create_post("Third", "third post").code)
+
+    #A controller error inside the block rolls back the earlier changes too
+    def test_rollback_on_controller_error(self):
+        before = self.state(self.controller)
+        with self.assertRaises(IllegalOperationException):
+            with self.controller.batch():
+                self.controller.create_post("Lost", "lost")
+                self.controller.create_blog(1111111111, "Duplicate", "dup", "dup@gmail.com")
+        self.assertEqual(before, self.state(self.controller))
+
+    #Nested batches are part of the outer one
+    def test_nested(self):
+        with self.assertRaises(RuntimeError):
+            with self.controller.batch():
+                with self.controller.batch():
+                    self.controller.create_post("Inner", "inner")
+                self.controller.create_post("Outer", "outer")
+                raise RuntimeError("stop")
+        self.assertEqual(["Second", "First"], [p.title for p in self.controller.list_posts()])
+
+        with self.controller.batch():
+            with self.controller.batch():
+                self.controller.create_post("Inner", "inner")
+        self.assertEqual("Inner", self.reopened().list_posts()[0].title)
+
+    #A failed write at commit is raised once every other DAO has ended its batch
+    def test_failed_commit(self):
+        if self.backend != "json" or self.post_storage != "pickle":
+            self.skipTest("needs the pickle engine")
+        first = self.controller.current_blog.post_dao
+        with self.assertRaises(OSError):
+            with self.controller.batch():
+                self.controller.create_post("Unwritten", "unwritten")
+                self.controller.set_current_blog(2222222222)
+                self.controller.create_post("Written", "written")
+                # a folder where the .dat file goes makes its write fail
+                os.remove(first._file)
+                os.makedirs(first._file)
+        second = self.controller.current_blog.post_dao
+
+        self.assertFalse(first.busy())
+        self.assertFalse(second.busy())
+        self.assertEqual(["Written"], [p.title for p in self.reopened().search_blog(2222222222).post_dao.list_posts()])
+        # the failed changes are still in memory and written once possible
+        os.rmdir(first._file)
+        self.assertTrue(first.flush())
+        self.assertEqual(["Unwritten", "Second", "First"], [p.title for p in self.reopened().list_posts()])
+
+
+class SnapshotBatchTest(BatchTest):
+
+    blogs_journal = False
+
+
+class SegmentBatchTest(BatchTest):
+
+    post_storage = "segment"
+
+
+class SQLiteBatchTest(BatchTest):
+
+    backend = "sqlite"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks import compare, suite
+from benchmarks.catalog import generate_blogs, generate_posts
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    #Catalogs are the same for the same seed
+    def test_catalog_is_deterministic(self):
+        self.assertEqual(list(generate_blogs(20, seed=4)), list(generate_blogs(20, seed=4)))
+        self.assertEqual(list(generate_posts(20, seed=4)), list(generate_posts(20, seed=4)))
+        self.assertEqual(20, len({b[0] for b in generate_blogs(20)}), "blog ids are unique")
+
+    #A small run times every operation and can be compared with itself
+    def test_small_run(self):
+        output = os.path.join(self.tmp_dir, "results.json")
+        suite.main(["--sizes", "30", "--posts", "10", "--lookups", "10", "--no-fsync", "--output", output])
+        with open(output, encoding="utf-8") as f:
+            report = json.load(f)
+        results = report["results"]
+
+        ops = {(r["op"], r["autosave"]) for r in results}
+        for op in ("create_blog", "search_blog", "retrieve_blogs", "create_post", "retrieve_posts", "list_posts"):
+            self.assertIn((op, False), ops)
+            self.assertIn((op, True), ops)
+        self.assertIn(("cold_start", True), ops)
+        self.assertEqual([("cold_start", False)], [(s["op"], s["autosave"]) for s in report["skipped"]])
+
+        rows = compare.compare(compare.load(output), compare.load(output))
+        self.assertEqual(len(results), len(rows))
+        self.assertTrue(all(row[3] == 1.0 for row in rows if row[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
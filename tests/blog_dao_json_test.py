@@ -0,0 +1,155 @@
+import os
+import random
+import unittest
+
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.dao.blog_dao_json import BlogDAOJSON
+from tests.scratch_store import ScratchStoreTest
+
+
+class BlogDAOJSONTest(ScratchStoreTest):
+
+    blogs_journal = True
+
+    def journal_lines(self, dao):
+        with open(dao.journal_path, "r", encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    #Mutations are appended to the journal and blogs.json is left alone
+    def test_mutations_append_to_journal(self):
+        dao = BlogDAOJSON(True)
+        snapshot_size = os.path.getsize(dao.file_path)
+
+        dao.create_blog(Blog(1, "One", "one", "one@mail"))
+        dao.create_blog(Blog(2, "Two", "two", "two@mail"))
+        dao.update_blog(1, 3, "Three", "three", "three@mail")
+        dao.delete_blog(2)
+
+        self.assertEqual(snapshot_size, os.path.getsize(dao.file_path), "blogs.json should not be rewritten")
+        self.assertEqual(5, len(self.journal_lines(dao)), "journal should hold a header plus one line per mutation")
+
+    #Reloading replays the journal on top of the snapshot
+    def test_reload_replays_journal(self):
+        dao = BlogDAOJSON(True)
+        dao.create_blog(Blog(1, "One", "one", "one@mail"))
+        dao.create_blog(Blog(2, "Two", "two", "two@mail"))
+        dao.update_blog(1, 3, "Three", "three", "three@mail")
+        dao.delete_blog(2)
+
+        reloaded = BlogDAOJSON(True)
+        self.assertEqual([Blog(3, "Three", "three", "three@mail")], reloaded.list_blogs())
+
+    #Reaching the threshold folds the journal into a new snapshot
+    def test_compaction_at_threshold(self):
+        Configuration.journal_compact_threshold = 3
+        dao = BlogDAOJSON(True)
+        for i in range(1, 5):
+            dao.create_blog(Blog(i, f"Blog {i}", f"blog_{i}", f"blog{i}@mail"))
+
+        self.assertEqual(2, len(self.journal_lines(dao)), "journal should restart after compaction")
+        reloaded = BlogDAOJSON(True)
+        self.assertEqual([1, 2, 3, 4], [b.id for b in reloaded.list_blogs()])
+
+    #A journal whose snapshot was replaced is not replayed again
+    def test_stale_journal_is_ignored(self):
+        dao = BlogDAOJSON(True)
+        dao.create_blog(Blog(1, "One", "one", "one@mail"))
+        os.remove(dao.file_path)
+
+        reloaded = BlogDAOJSON(True)
+        self.assertEqual([], reloaded.list_blogs(), "journal without its snapshot must be discarded")
+
+    #A torn last line is skipped instead of losing the whole journal
+    def test_torn_journal_line(self):
+        dao = BlogDAOJSON(True)
+        dao.create_blog(Blog(1, "One", "one", "one@mail"))
+        with open(dao.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"op": "create", "blog": {"id": 2, "na')
+
+        reloaded = BlogDAOJSON(True)
+        self.assertEqual([1], [b.id for b in reloaded.list_blogs()])
+
+    #Lookups by id, name and url follow creates, updates and deletes
+    def test_index_lookups(self):
+        dao = BlogDAOJSON(False)
+        one = Blog(1, "One", "one", "one@mail")
+        dao.create_blog(one)
+        dao.create_blog(Blog(2, "Two", "two", "two@mail"))
+
+        self.assertEqual(one, dao.search_blog(1))
+        self.assertEqual(one, dao.search_blog("One"))
+        self.assertEqual(one, dao.search_blog("one"))
+
+        dao.update_blog(1, 5, "Five", "five", "five@mail")
+        self.assertIsNone(dao.search_blog(1), "old id should no longer be indexed")
+        self.assertIsNone(dao.search_blog("One"), "old name should no longer be indexed")
+        self.assertEqual(5, dao.search_blog("five").id)
+        self.assertEqual([5, 2], [b.id for b in dao.list_blogs()], "updated blog keeps its position")
+
+        dao.delete_blog(5)
+        self.assertIsNone(dao.search_blog(5))
+        self.assertIsNone(dao.search_blog([]), "unhashable keys never match")
+
+    #When several blogs match, the earliest one in the list wins
+    def test_index_keeps_first_match(self):
+        dao = BlogDAOJSON(False)
+        dao.create_blog(Blog(1, "Shared", "a", "a@mail"))
+        dao.create_blog(Blog(2, "b", "Shared", "b@mail"))
+        self.assertEqual(1, dao.search_blog("Shared").id)
+
+        dao.delete_blog(1)
+        self.assertEqual(2, dao.search_blog("Shared").id)
+
+    #Indexes are rebuilt when loading from disk
+    def test_index_after_reload(self):
+        dao = BlogDAOJSON(True)
+        dao.create_blog(Blog(1, "One", "one", "one@mail"))
+        dao.compact()
+
+        reloaded = BlogDAOJSON(True)
+        self.assertEqual(1, reloaded.search_blog("one").id)
+
+    #Every change gives the DAO a new generation, lookups do not
+    def test_generation_changes_on_mutation(self):
+        dao = BlogDAOJSON(False)
+        seen = {dao.generation}
+        dao.create_blog(Blog(1, "One", "one", "one@mail"))
+        seen.add(dao.generation)
+        dao.retrieve_blogs("one")
+        self.assertIn(dao.generation, seen)
+        dao.update_blog(1, 2, "Two", "two", "two@mail")
+        seen.add(dao.generation)
+        dao.delete_blog(2)
+        seen.add(dao.generation)
+        dao.delete_blog(2)
+        self.assertIn(dao.generation, seen, "a failed delete changes nothing")
+        self.assertEqual(4, len(seen))
+
+    #Trigram search returns the same blogs, in the same order, as a full scan
+    def test_retrieve_matches_full_scan(self):
+        rng = random.Random(3)
+        words = ["Short", "Long", "Journey", "Trip", "Boring", "Café", "ab", "x"]
+        dao = BlogDAOJSON(False)
+        for i in range(80):
+            name = " ".join(rng.choice(words) for _ in range(2))
+            dao.create_blog(Blog(1111110000 + i, name, name.lower().replace(" ", "_"), f"{name[:2]}@gmail.com"))
+
+        def full_scan(s):
+            s = s.lower()
+            return [b.id for b in dao.list_blogs()
+                    if s in str(b.id).lower() or s in b.name.lower() or s in b.url.lower() or s in b.email.lower()]
+
+        queries = ["journey", "JOURNEY", "rt j", "g_t", "café", "ab", "x", "1111110042", "00", "gmail", "nothing"]
+        for q in queries:
+            self.assertEqual(full_scan(q), [b.id for b in dao.retrieve_blogs(q)], q)
+
+        dao.update_blog(1111110003, 1111110003, "Brand New", "brand_new", "new@mail")
+        dao.delete_blog(1111110004)
+        dao.create_blog(Blog(1111119999, "Journey End", "journey_end", "end@gmail.com"))
+        for q in queries + ["brand", "new@"]:
+            self.assertEqual(full_scan(q), [b.id for b in dao.retrieve_blogs(q)], q)
+
+
+if __name__ == '__main__':
+    unittest.main()
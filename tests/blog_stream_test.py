@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+from blogging.blog import Blog
+from blogging.dao.blog_encoder import BlogEncoder
+from blogging.dao.blog_stream import BlogStream, iter_blogs
+
+
+class BlogStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "blogs.json")
+        self.blogs = [
+            Blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com"),
+            Blog(7, "Café ☕ Blog", "cafe", "café@mail"),
+            Blog(1111112000, "Long Trip", "long_trip", "long.trip@gmail.com"),
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write(self, text):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    #Small chunks still yield every blog, including split multi-byte characters
+    def test_small_chunks(self):
+        self.write(json.dumps(self.blogs, cls=BlogEncoder, indent=2, ensure_ascii=False))
+        for chunk_size in (1, 3, 7, 64 * 1024):
+            self.assertEqual(self.blogs, list(iter_blogs(self.path, chunk_size)))
+
+    #The stream is lazy: blogs come out before the file is fully read
+    def test_is_lazy(self):
+        self.write(json.dumps(self.blogs, cls=BlogEncoder))
+        stream = iter(BlogStream(self.path, chunk_size=16))
+        self.assertEqual(self.blogs[0], next(stream))
+
+    #crc covers the raw bytes of the whole file
+    def test_crc(self):
+        self.write(json.dumps(self.blogs, cls=BlogEncoder, indent=2) + "\n")
+        stream = BlogStream(self.path, chunk_size=5)
+        list(stream)
+        with open(self.path, "rb") as f:
+            self.assertEqual(zlib.crc32(f.read()), stream.crc)
+
+    #Empty arrays, single objects and entries that are not blogs
+    def test_other_shapes(self):
+        self.write("  [ ]  ")
+        self.assertEqual([], list(iter_blogs(self.path)))
+
+        self.write(json.dumps(self.blogs[0], cls=BlogEncoder))
+        self.assertEqual([self.blogs[0]], list(iter_blogs(self.path, 4)))
+
+        self.write('[12345, {"other": 1}, ' + json.dumps(self.blogs[2], cls=BlogEncoder) + "]")
+        self.assertEqual([self.blogs[2]], list(iter_blogs(self.path, 2)))
+
+    #Malformed input raises ValueError after the blogs read so far
+    def test_malformed(self):
+        self.write(json.dumps(self.blogs[:1], cls=BlogEncoder)[:-1] + ', {"id": ')
+        found = []
+        with self.assertRaises(ValueError):
+            for blog in iter_blogs(self.path, 8):
+                found.append(blog)
+        self.assertEqual(self.blogs[:1], found)
+
+        self.write("")
+        with self.assertRaises(ValueError):
+            list(iter_blogs(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
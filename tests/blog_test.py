@@ -59,6 +59,13 @@ class BlogTest(unittest.TestCase):
         example_blog = Blog(1234, "Test Name", "test_url", "test@email")
         self.assertTrue(self.blog.__eq__(example_blog), "Blogs with same attributes should be equal")
 
+    #Post storage is only opened the first time posts are used
+    def test_posts_load_lazily(self):
+        lazy_blog = Blog(4321, "Lazy", "lazy_url", "lazy@email")
+        self.assertFalse(lazy_blog.posts_loaded(), "constructing a blog should not open its posts")
+        lazy_blog.list_posts()
+        self.assertTrue(lazy_blog.posts_loaded(), "listing posts should open them")
+
     #Tests that __str__ output contains blog attributes
     def test_str(self):
         example_output = self.blog.__str__()
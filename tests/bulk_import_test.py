@@ -0,0 +1,142 @@
+import os
+import unittest
+
+from blogging.bulk_import import read_csv, read_jsonl, read_records, to_post
+from blogging.controller import Controller
+from blogging.exception.illegal_operation_exception import IllegalOperationException
+from blogging.exception.no_current_blog_exception import NoCurrentBlogException
+from blogging.stats import STATS
+from tests.scratch_store import ScratchStoreTest
+
+
+class BulkImportTest(ScratchStoreTest):
+
+    backend = "json"
+    post_storage = "pickle"
+    collect_stats = True
+
+    def setUp(self):
+        super().setUp()
+        self.controller = Controller()
+        self.controller.login("user", "123456")
+
+    def write_file(self, name, text):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    #CSV and JSON Lines files are read one record at a time
+    def test_readers(self):
+        csv_path = self.write_file("blogs.csv", "id,name,url,email\n1,One,one,one@mail\n2,\"Two, too\",two,two@mail\n")
+        self.assertEqual([{"id": "1", "name": "One", "url": "one", "email": "one@mail"},
+                          {"id": "2", "name": "Two, too", "url": "two", "email": "two@mail"}],
+                         list(read_records(csv_path)))
+        jsonl_path = self.write_file("posts.jsonl", '{"title": "A", "text": "a"}\n\n{"title": "B"}\n')
+        self.assertEqual([{"title": "A", "text": "a"}, {"title": "B"}], list(read_jsonl(jsonl_path)))
+
+        bad_path = self.write_file("bad.jsonl", '{"title": "A"}\n[1]\n')
+        with self.assertRaises(ValueError):
+            list(read_jsonl(bad_path))
+        with self.assertRaises(ValueError):
+            read_records(os.path.join(self.tmp_dir, "blogs.xml"))
+        self.assertEqual([], list(read_csv(self.write_file("empty.csv", ""))))
+
+    #Blogs are validated and stored one chunk at a time
+    def test_import_blogs(self):
+        records = ({"id": str(1111110000 + i), "name": "Blog %d" % i, "url": "blog_%d" % i, "email": "b%d@mail" % i}
+                   for i in range(25))
+        self.assertEqual(25, self.controller.import_blogs(records, chunk_size=10))
+        self.assertEqual(25, len(self.controller.list_blogs()))
+        self.assertEqual("Blog 24", self.controller.search_blog(1111110024).name)
+        self.assertEqual(3, self.calls(type(self.controller.blog_dao).__name__ + ".create_blogs"))
+
+        # a bad record stops the import; the records before it are kept
+        with self.assertRaises(IllegalOperationException):
+            self.controller.import_blogs([
+                {"id": "2222220000", "name": "New", "url": "new", "email": "new@mail"},
+                {"id": "1111110003", "name": "Dup", "url": "dup", "email": "dup@mail"},
+            ])
+        self.assertIsNotNone(self.controller.search_blog(2222220000))
+        with self.assertRaises(IllegalOperationException):
+            self.controller.import_blogs([{"id": "x", "name": "Bad", "url": "bad", "email": "bad@mail"}])
+        with self.assertRaises(IllegalOperationException):
+            self.controller.import_blogs([{"id": "3", "name": "No url", "email": "bad@mail"}])
+
+        # the import was persisted
+        self.assertEqual(26, len(Controller().blog_dao.list_blogs()))
+
+    #Posts get codes in bulk and each blog is written once
+    def test_import_posts(self):
+        self.controller.create_blog(1111111111, "First", "first", "first@mail")
+        self.controller.create_blog(2222222222, "Second", "second", "second@mail")
+        self.controller.set_current_blog(1111111111)
+        self.controller.create_post("Existing", "post")
+
+        records = [{"title": "Post %d" % i, "text": "text %d" % i,
+                    "blog_id": "2222222222" if i % 2 else ""} for i in range(10)]
+        records.append({"title": "Dated", "text": "", "creation": "2020-01-02T03:04:05", "blog_id": 2222222222})
+        STATS.reset()
+        self.assertEqual(11, self.controller.import_posts(iter(records)))
+
+        self.assertEqual([6, 5, 4, 3, 2, 1], [p.code for p in self.controller.list_posts()])
+        dao_name = type(self.controller.current_blog.post_dao).__name__
+        self.assertEqual(2, self.calls(dao_name + ".create_posts"), "one bulk insert per blog")
+        self.assertEqual(0, self.calls(dao_name + ".create_post"))
+        second = self.controller.search_blog(2222222222)
+        self.assertEqual(list(range(1, 7)), [p.code for p in second.post_dao.list_posts()])
+        self.assertEqual(2020, second.post_dao.search_post(6).creation.year)
+        # the text index follows the import
+        self.assertEqual(["Post 4"], [p.title for p in self.controller.retrieve_posts("text 4")])
+
+        with self.assertRaises(IllegalOperationException):
+            self.controller.import_posts([{"title": "Lost", "blog_id": "3333333333"}])
+        with self.assertRaises(IllegalOperationException):
+            self.controller.import_posts([{"text": "no title"}])
+
+    #A chunk whose write failed is not stored a second time
+    def test_failed_chunk(self):
+        if self.backend != "json" or self.post_storage != "pickle":
+            self.skipTest("needs the file engines")
+        self.controller.create_blog(1111111111, "First", "first", "first@mail")
+        self.controller.set_current_blog(1111111111)
+        self.controller.create_post("Existing", "post")
+        # folders where the files go make the writes fail
+        dao = self.controller.current_blog.post_dao
+        os.remove(dao._file)
+        os.makedirs(dao._file)
+        STATS.reset()
+
+        records = [{"title": "Post %d" % i, "text": "text %d" % i} for i in range(3)]
+        with self.assertRaises(IllegalOperationException):
+            self.controller.import_posts(records, chunk_size=2)
+        self.assertEqual(1, self.calls("PostDAOPickle.create_posts"))
+
+        journal = self.controller.blog_dao.journal_path
+        os.remove(journal)
+        os.makedirs(journal)
+        records = ({"id": str(2222220000 + i), "name": "Blog %d" % i, "url": "blog_%d" % i, "email": "b%d@mail" % i}
+                   for i in range(3))
+        with self.assertRaises(OSError):
+            self.controller.import_blogs(records, chunk_size=2)
+        self.assertEqual(1, self.calls("BlogDAOJSON.create_blogs"))
+
+    #Posts without a blog id need a current blog
+    def test_import_posts_needs_current_blog(self):
+        with self.assertRaises(NoCurrentBlogException):
+            self.controller.import_posts([{"title": "A", "text": "a"}])
+        self.assertEqual("A", to_post({"title": " A ", "text": None}).title)
+
+
+class SegmentBulkImportTest(BulkImportTest):
+
+    post_storage = "segment"
+
+
+class SQLiteBulkImportTest(BulkImportTest):
+
+    backend = "sqlite"
+
+
+if __name__ == '__main__':
+    unittest.main()
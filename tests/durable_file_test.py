@@ -0,0 +1,99 @@
+import os
+import time
+import unittest
+
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.dao.blog_dao_json import BlogDAOJSON
+from blogging.dao.durable_file import GroupCommit, atomic_write
+from blogging.dao.post_dao_pickle import PostDAOPickle
+from blogging.post import Post
+from tests.scratch_store import ScratchStoreTest
+
+
+class DurableFileTest(ScratchStoreTest):
+
+    #atomic_write replaces the file and leaves no temp file behind
+    def test_atomic_write(self):
+        path = os.path.join(self.tmp_dir, "sub", "data.bin")
+        atomic_write(path, b"first")
+        atomic_write(path, b"second")
+        with open(path, "rb") as f:
+            self.assertEqual(b"second", f.read())
+        self.assertEqual(["data.bin"], os.listdir(os.path.dirname(path)))
+
+    #Without a window every request flushes right away
+    def test_immediate_commit(self):
+        flushes = []
+        commit = GroupCommit(lambda: flushes.append(1) or True, 0)
+        self.assertTrue(commit.request())
+        self.assertTrue(commit.request())
+        self.assertEqual(2, len(flushes))
+
+    #Requests inside the window are merged into one flush
+    def test_group_commit(self):
+        flushes = []
+        commit = GroupCommit(lambda: flushes.append(1) or True, 0.05)
+        for _ in range(10):
+            commit.request()
+        self.assertEqual(0, len(flushes), "flush should wait for the window")
+        time.sleep(0.2)
+        self.assertEqual(1, len(flushes), "a burst should be flushed once")
+
+    #flush_now runs a pending flush straight away
+    def test_flush_now(self):
+        flushes = []
+        commit = GroupCommit(lambda: flushes.append(1) or True, 60)
+        commit.request()
+        commit.flush_now()
+        self.assertEqual(1, len(flushes))
+        self.assertFalse(commit.pending())
+
+    #A burst of blog mutations reaches the journal in one append
+    def test_blog_dao_group_commit(self):
+        Configuration.group_commit_window = 60
+        dao = BlogDAOJSON(True)
+        for i in range(5):
+            dao.create_blog(Blog(i, f"Blog {i}", f"blog_{i}", f"blog{i}@mail"))
+        self.assertEqual([], BlogDAOJSON(True).list_blogs(), "nothing is written before the flush")
+
+        dao.flush()
+        self.assertEqual(5, len(BlogDAOJSON(True).list_blogs()))
+
+    #A failed deferred write is reported by flush() and kept for the next one
+    def test_failed_post_write(self):
+        Configuration.group_commit_window = 60
+        dao = PostDAOPickle(Blog(1234, "Test Name", "test_url", "test@email"))
+        dao.create_post(Post(0, "Title", "Text"))
+        # a folder where the .dat file goes makes the rename fail
+        os.makedirs(dao._file)
+
+        self.assertFalse(dao.flush())
+        self.assertIsInstance(dao.write_error, OSError)
+        os.rmdir(dao._file)
+        self.assertTrue(dao.flush())
+        self.assertIsNone(dao.write_error)
+        self.assertEqual(["Title"], [p.title for p in PostDAOPickle(dao.blog).list_posts()])
+
+    #A failed deferred blog write is reported by flush() and written with the next one
+    def test_failed_blog_write(self):
+        Configuration.group_commit_window = 60
+        Configuration.blogs_journal = False
+        dao = BlogDAOJSON(True)
+        dao.create_blog(Blog(1, "Blog 1", "blog_1", "blog1@mail"))
+        self.assertTrue(dao.flush())
+        # a folder where the temp file goes makes the write fail
+        tmp_path = f"{dao.file_path}.{os.getpid()}.tmp"
+        os.makedirs(tmp_path)
+
+        dao.create_blog(Blog(2, "Blog 2", "blog_2", "blog2@mail"))
+        self.assertFalse(dao.flush())
+        self.assertIsInstance(dao.write_error, OSError)
+        os.rmdir(tmp_path)
+        dao.create_blog(Blog(3, "Blog 3", "blog_3", "blog3@mail"))
+        self.assertTrue(dao.flush())
+        self.assertIsNone(dao.write_error)
+        self.assertEqual([1, 2, 3], [b.id for b in BlogDAOJSON(True).list_blogs()])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import unittest
+
+from blogging.controller import Controller
+from blogging.exception.illegal_access_exception import IllegalAccessException
+from tests.scratch_store import ScratchStoreTest
+
+
+class ExportTest(ScratchStoreTest):
+
+    backend = "json"
+
+    # several pages of blogs
+    settings = {"export_batch_size": 2}
+
+    def setUp(self):
+        super().setUp()
+        controller = Controller()
+        controller.login("user", "123456")
+        for i in range(1, 6):
+            controller.create_blog(1111110000 + i, "Blog %d" % i, "blog_%d" % i, "b%d@mail" % i)
+            controller.set_current_blog(1111110000 + i)
+            for j in range(i):
+                controller.create_post("Title %d.%d" % (i, j), "Text ü %d" % j)
+
+        # a fresh controller, so no blog has its posts open
+        self.controller = Controller()
+        self.controller.login("user", "123456")
+
+    #Every blog is followed by its posts, one JSON object per line
+    def test_export(self):
+        lines = list(self.controller.export())
+        self.assertTrue(all(line.endswith("\n") and line.count("\n") == 1 for line in lines))
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(5 + 15, len(records))
+
+        self.assertEqual({"type": "blog", "id": 1111110001, "name": "Blog 1", "url": "blog_1", "email": "b1@mail"},
+                         records[0])
+        self.assertEqual("post", records[1]["type"])
+        self.assertEqual((1111110001, 1, "Title 1.0", "Text ü 0"),
+                         (records[1]["blog_id"], records[1]["code"], records[1]["title"], records[1]["text"]))
+        self.assertEqual([1111110000 + i for i in range(1, 6)], [r["id"] for r in records if r["type"] == "blog"])
+        self.assertEqual([1, 2, 3], [r["code"] for r in records if r.get("blog_id") == 1111110003])
+
+    #Posts are read blog by blog and let go of afterwards
+    def test_export_unloads_posts(self):
+        self.controller.set_current_blog(1111110002)
+        current = self.controller.current_blog
+        current.post_dao
+
+        for _ in self.controller.export():
+            pass
+        blogs = self.controller.list_blogs()
+        self.assertFalse(any(b.posts_loaded() for b in blogs if b is not current))
+        self.assertIs(current, self.controller.current_blog)
+        self.assertTrue(current.posts_loaded(), "the current blog keeps its posts")
+
+    #The exported posts can be imported again
+    def test_round_trip(self):
+        lines = list(self.controller.export())
+        self.controller.create_blog(2222222222, "Copy", "copy", "copy@mail")
+        posts = []
+        for line in lines:
+            record = json.loads(line)
+            if record["type"] == "post" and record["blog_id"] == 1111110004:
+                record["blog_id"] = 2222222222
+                posts.append(record)
+        self.assertEqual(4, self.controller.import_posts(posts))
+        self.controller.set_current_blog(2222222222)
+        self.assertEqual(["Title 4.3", "Title 4.2", "Title 4.1", "Title 4.0"],
+                         [p.title for p in self.controller.list_posts()])
+
+    #Exporting needs a login
+    def test_export_needs_login(self):
+        self.controller.logout()
+        with self.assertRaises(IllegalAccessException):
+            self.controller.export()
+
+
+class SQLiteExportTest(ExportTest):
+
+    backend = "sqlite"
+
+    def setUp(self):
+        super().setUp()
+        # several batches of posts
+        from blogging.dao.post_dao_sqlite import PostDAOSQLite
+        self.old_batch = PostDAOSQLite._BATCH
+        PostDAOSQLite._BATCH = 2
+
+    def tearDown(self):
+        from blogging.dao.post_dao_sqlite import PostDAOSQLite
+        PostDAOSQLite._BATCH = self.old_batch
+        super().tearDown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+from blogging.controller import Controller
+from blogging.dao.page import decode_cursor, encode_cursor
+from blogging.exception.illegal_operation_exception import IllegalOperationException
+from tests.scratch_store import ScratchStoreTest
+
+
+class PagingTest(ScratchStoreTest):
+
+    backend = "json"
+    settings = {"autosave": False}
+
+    def setUp(self):
+        super().setUp()
+        self.controller = Controller()
+        self.controller.login("user", "123456")
+        for i in range(1, 8):
+            name = "Journey %d" % i if i % 2 else "Trip %d" % i
+            self.controller.create_blog(1111110000 + i, name, "blog_%d" % i, "blog%d@gmail.com" % i)
+        self.controller.set_current_blog(1111110001)
+        for i in range(1, 8):
+            self.controller.create_post("Title %d" % i, "journey" if i % 2 else "trip")
+
+    def collect(self, fetch, limit):
+        # follow the cursors and return the pages' contents
+        pages = []
+        page = fetch(None, limit)
+        pages.append(list(page))
+        while page.next_cursor is not None:
+            page = fetch(page.next_cursor, limit)
+            pages.append(list(page))
+        return pages
+
+    #Following cursors walks the whole listing in order, one page at a time
+    def test_cursor_pages_match_full_listing(self):
+        c = self.controller
+        fetchers = [
+            (c.list_blogs, lambda cur, n: c.list_blogs_page(limit=n, cursor=cur)),
+            (lambda: c.retrieve_blogs("journey"), lambda cur, n: c.retrieve_blogs_page("journey", limit=n, cursor=cur)),
+            (c.list_posts, lambda cur, n: c.list_posts_page(limit=n, cursor=cur)),
+            (lambda: c.retrieve_posts("trip"), lambda cur, n: c.retrieve_posts_page("trip", limit=n, cursor=cur)),
+        ]
+        for full, fetch in fetchers:
+            expected = full()
+            pages = self.collect(fetch, 3)
+            self.assertTrue(all(len(p) <= 3 for p in pages))
+            self.assertEqual(expected, [item for page in pages for item in page])
+            self.assertEqual(expected, list(fetch(None, None)), "no limit returns everything")
+
+    #Offsets skip entries and the last page has no cursor
+    def test_offset_and_last_page(self):
+        page = self.controller.list_posts_page(offset=2, limit=2)
+        self.assertEqual([5, 4], [p.code for p in page])
+        self.assertIsNotNone(page.next_cursor)
+
+        page = self.controller.list_posts_page(limit=2, cursor=page.next_cursor)
+        self.assertEqual([3, 2], [p.code for p in page])
+
+        page = self.controller.list_posts_page(offset=5, limit=2)
+        self.assertEqual([2, 1], [p.code for p in page])
+        self.assertIsNone(page.next_cursor)
+
+    #A page stays valid when entries before the cursor are removed
+    def test_cursor_survives_deletes(self):
+        page = self.controller.list_blogs_page(limit=3)
+        self.controller.delete_blog(1111110002)
+        page = self.controller.list_blogs_page(limit=3, cursor=page.next_cursor)
+        self.assertEqual([1111110004, 1111110005, 1111110006], [b.id for b in page])
+
+    #Blogs put back by a rolled-back batch are paged in their old place
+    def test_cursor_after_rollback(self):
+        page = self.controller.list_blogs_page(limit=2)
+        with self.assertRaises(IllegalOperationException):
+            with self.controller.batch():
+                self.controller.delete_blog(1111110003)
+                self.controller.delete_blog(1111110006)
+                raise IllegalOperationException()
+        page = self.controller.list_blogs_page(limit=3, cursor=page.next_cursor)
+        self.assertEqual([1111110003, 1111110004, 1111110005], [b.id for b in page])
+
+    #Malformed cursors and cursors from another listing are refused
+    def test_invalid_cursor(self):
+        page = self.controller.list_blogs_page(limit=2)
+        with self.assertRaises(IllegalOperationException):
+            self.controller.list_blogs_page(limit=2, cursor="not a cursor")
+        with self.assertRaises(IllegalOperationException):
+            self.controller.retrieve_blogs_page("trip", limit=2, cursor=page.next_cursor)
+        with self.assertRaises(IllegalOperationException):
+            self.controller.list_posts_page(limit=0)
+        with self.assertRaises(IllegalOperationException):
+            self.controller.list_posts_page(offset=-1)
+
+    #Cursors round-trip their position and refuse other scopes
+    def test_cursor_encoding(self):
+        cursor = encode_cursor(42, ["posts", "trip", True])
+        self.assertEqual(42, decode_cursor(cursor, ["posts", "trip", True]))
+        self.assertIsNone(decode_cursor(None, ["posts", "trip", True]))
+        with self.assertRaises(ValueError):
+            decode_cursor(cursor, ["posts", "trip", False])
+
+
+class SQLitePagingTest(PagingTest):
+
+    backend = "sqlite"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao.post_collection_cache import POST_CACHE
+from blogging.dao.post_dao_factory import create_post_dao
+from tests.scratch_store import ScratchStoreTest
+
+
+class PostCollectionCacheTest(ScratchStoreTest):
+
+    post_storage = "pickle"
+    settings = {"post_cache_max_blogs": 2, "post_cache_max_posts": 0}
+
+    def setUp(self):
+        super().setUp()
+        POST_CACHE.clear()
+
+        self.controller = Controller()
+        self.controller.login("user", "123456")
+        self.ids = [1111111111, 2222222222, 3333333333]
+        for id in self.ids:
+            self.controller.create_blog(id, "Blog %d" % id, "url_%d" % id, "%d@mail" % id)
+            self.controller.set_current_blog(id)
+            for i in range(3):
+                self.controller.create_post("Post %d" % i, "text %d" % i)
+        self.controller.unset_current_blog()
+        POST_CACHE.clear()
+        POST_CACHE.reset()
+
+    def tearDown(self):
+        POST_CACHE.clear()
+        POST_CACHE.reset()
+
+    def blog(self, id):
+        return self.controller.search_blog(id)
+
+    def use(self, id):
+        self.controller.set_current_blog(id)
+        return [p.title for p in self.controller.list_posts()]
+
+    #Past max_blogs, the least recently used blog's posts are unloaded and read again on use
+    def test_blog_budget(self):
+        self.use(self.ids[0])
+        self.use(self.ids[1])
+        self.use(self.ids[0])
+        self.use(self.ids[2])
+        self.assertTrue(self.blog(self.ids[0]).posts_loaded())
+        self.assertFalse(self.blog(self.ids[1]).posts_loaded())
+        self.assertEqual(1, POST_CACHE.evictions)
+        self.assertEqual(2, len(POST_CACHE))
+
+        self.assertEqual(["Post 2", "Post 1", "Post 0"], self.use(self.ids[1]))
+        stats = self.controller.post_cache_stats()
+        self.assertEqual(4, stats["misses"])
+        self.assertLess(0, stats["hits"])
+        self.assertEqual(2, stats["evictions"])
+
+    #Past max_posts, blogs are unloaded until the loaded posts fit
+    def test_post_budget(self):
+        if self.post_storage != "pickle":
+            self.skipTest("only the pickle engine keeps posts in memory")
+        Configuration.post_cache_max_blogs = 0
+        Configuration.post_cache_max_posts = 5
+        self.use(self.ids[0])
+        self.use(self.ids[1])
+        self.assertFalse(self.blog(self.ids[0]).posts_loaded())
+        self.assertEqual(3, POST_CACHE.stats()["posts"])
+
+    #Changes still waiting to be written are flushed before a blog is unloaded
+    def test_flush_before_eviction(self):
+        Configuration.group_commit_window = 3600
+        self.controller.set_current_blog(self.ids[0])
+        self.controller.create_post("Unsaved", "waiting for the window")
+        self.use(self.ids[1])
+        self.use(self.ids[2])
+        self.assertFalse(self.blog(self.ids[0]).posts_loaded())
+
+        posts = create_post_dao(self.blog(self.ids[0]), True).list_posts()
+        self.assertEqual("Unsaved", posts[-1].title)
+        self.assertEqual(["Unsaved", "Post 2", "Post 1", "Post 0"], self.use(self.ids[0]))
+
+    #A blog with an open batch stays loaded, so the batch can still commit or roll back
+    def test_batch_keeps_blog(self):
+        with self.assertRaises(RuntimeError):
+            with self.controller.batch():
+                self.controller.set_current_blog(self.ids[0])
+                self.controller.create_post("Lost", "lost")
+                self.use(self.ids[1])
+                self.use(self.ids[2])
+                self.assertTrue(self.blog(self.ids[0]).posts_loaded())
+                raise RuntimeError("stop")
+        self.assertEqual(["Post 2", "Post 1", "Post 0"], self.use(self.ids[0]))
+
+    #The counters are part of the statistics report and reset with it
+    def test_report(self):
+        self.use(self.ids[0])
+        self.assertIn("post cache: ", self.controller.stats_report())
+        self.controller.reset_stats()
+        self.assertEqual(0, POST_CACHE.misses)
+        self.assertEqual(1, len(POST_CACHE))
+
+    #Asking for the posts' generation neither loads them nor counts as a use
+    def test_posts_generation(self):
+        blog = self.blog(self.ids[0])
+        self.assertIsNone(blog.posts_generation())
+        self.assertFalse(blog.posts_loaded())
+        self.use(self.ids[0])
+        POST_CACHE.reset()
+        self.assertEqual(blog.post_dao.generation, blog.posts_generation())
+        self.assertEqual(1, POST_CACHE.hits, "only the post_dao access is a hit")
+
+
+class SegmentPostCollectionCacheTest(PostCollectionCacheTest):
+
+    post_storage = "segment"
+
+
+if __name__ == '__main__':
+    unittest.main()
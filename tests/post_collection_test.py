@@ -0,0 +1,42 @@
+import unittest
+from datetime import datetime
+
+from blogging.dao.post_collection import PostCollection
+from blogging.post import Post
+
+
+class PostCollectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.posts = PostCollection()
+        for code in (1, 2, 4):
+            self.posts.add(Post(code, f"Title {code}", "Text", datetime(2025, 4, 30), datetime(2025, 4, 30)))
+
+    def codes(self, reverse=False):
+        return [p.code for p in self.posts.iter_posts(reverse)]
+
+    #Posts come out ordered by code in both directions
+    def test_iteration_order(self):
+        self.posts.add(Post(3, "Late", "Text"))
+        self.assertEqual([1, 2, 3, 4], self.codes())
+        self.assertEqual([4, 3, 2, 1], self.codes(reverse=True))
+        self.assertEqual(4, len(self.posts))
+        self.assertEqual(4, self.posts.max_code())
+
+    #Lookups by code follow adds, replacements and removals
+    def test_lookup_and_remove(self):
+        self.assertEqual("Title 2", self.posts.get(2).title)
+        self.posts.add(Post(2, "Replaced", "Text"))
+        self.assertEqual("Replaced", self.posts.get(2).title)
+        self.assertEqual([1, 2, 4], self.codes(), "replacing a post should not duplicate its code")
+
+        self.assertEqual(2, self.posts.remove(2).code)
+        self.assertIsNone(self.posts.remove(2))
+        self.assertIsNone(self.posts.get(2))
+        self.assertNotIn(2, self.posts)
+        self.assertIsNone(self.posts.get([]), "unhashable keys never match")
+        self.assertEqual([4, 1], self.codes(reverse=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
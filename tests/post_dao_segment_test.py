@@ -0,0 +1,116 @@
+import os
+import pickle
+import unittest
+
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.dao.post_dao_segment import PostDAOSegment
+from blogging.post import Post
+from tests.scratch_store import ScratchStoreTest
+
+
+class PostDAOSegmentTest(ScratchStoreTest):
+
+    def setUp(self):
+        super().setUp()
+        Configuration.records_path = self.tmp_dir
+        self.blog = Blog(1234, "Test Name", "test_url", "test@email")
+
+    def add_posts(self, dao, count):
+        for i in range(count):
+            dao.create_post(Post(0, f"Title {i}", f"Text of post {i}"))
+
+    #Posts survive reopening the segment
+    def test_reopen(self):
+        dao = PostDAOSegment(self.blog)
+        self.add_posts(dao, 3)
+        dao.update_post(2, "Changed", "Changed text")
+        dao.delete_post(1)
+
+        reopened = PostDAOSegment(self.blog)
+        self.assertEqual([2, 3], [p.code for p in reopened.list_posts()])
+        self.assertEqual("Changed", reopened.search_post(2).title)
+        self.assertIsNone(reopened.search_post(1))
+        self.assertEqual(4, reopened.create_post(Post(0, "New", "New text")).code)
+
+    #Mutations only append to the segment
+    def test_mutations_append(self):
+        dao = PostDAOSegment(self.blog)
+        self.add_posts(dao, 2)
+        size = os.path.getsize(dao._file)
+        dao.delete_post(1)
+        self.assertEqual(size + PostDAOSegment._HEADER.size, os.path.getsize(dao._file))
+
+    #Retrieve keeps the case-insensitive substring semantics
+    def test_retrieve(self):
+        dao = PostDAOSegment(self.blog)
+        dao.create_post(Post(0, "Starting my journey", "Once upon a time"))
+        dao.create_post(Post(0, "Second step", "Before one could think"))
+        dao.create_post(Post(0, "Finishing my JOURNEY", "End of story"))
+        self.assertEqual([1, 3], [p.code for p in dao.retrieve_posts("journey")])
+
+    #Dead space past the threshold triggers compaction into a new generation
+    def test_compaction(self):
+        Configuration.segment_compact_min_bytes = 0
+        dao = PostDAOSegment(self.blog)
+        self.add_posts(dao, 4)
+        for code in (1, 2, 3):
+            dao.delete_post(code)
+
+        self.assertGreater(dao._generation, 0, "segment should have been compacted")
+        self.assertEqual(1, len(dao._existing_segments()), "old generations are removed")
+        reopened = PostDAOSegment(self.blog)
+        self.assertEqual([4], [p.code for p in reopened.list_posts()])
+
+    #Posts another process deletes and compacts away during a listing are skipped
+    def test_compacted_while_listing(self):
+        dao = PostDAOSegment(self.blog)
+        self.add_posts(dao, 3)
+        entries = dao.iter_post_entries()
+        self.assertEqual(1, next(entries)[0])
+
+        other = PostDAOSegment(self.blog)
+        other.delete_post(2)
+        other.compact()
+        self.assertEqual([3], [code for code, _ in entries])
+
+    #A torn record at the end of the segment is dropped on open
+    def test_torn_tail(self):
+        dao = PostDAOSegment(self.blog)
+        self.add_posts(dao, 2)
+        with open(dao._file, "ab") as f:
+            f.write(PostDAOSegment._HEADER.pack(b"P", 3, 100) + b"partial")
+
+        reopened = PostDAOSegment(self.blog)
+        self.assertEqual([1, 2], [p.code for p in reopened.list_posts()])
+        reopened.create_post(Post(0, "After", "After the tear"))
+        self.assertEqual([1, 2, 3], [p.code for p in PostDAOSegment(self.blog).list_posts()])
+
+    #A damaged record in the middle keeps a copy of the whole file before it is cut
+    def test_damaged_record(self):
+        dao = PostDAOSegment(self.blog)
+        self.add_posts(dao, 3)
+        first_end = dao._index[1][0] + dao._index[1][1]
+        with open(dao._file, "r+b") as f:
+            f.seek(first_end)
+            f.write(b"X")
+        with open(dao._file, "rb") as f:
+            original = f.read()
+
+        reopened = PostDAOSegment(self.blog)
+        self.assertEqual([1], [p.code for p in reopened.list_posts()])
+        with open(dao._file + ".corrupt", "rb") as f:
+            self.assertEqual(original, f.read())
+
+    #Posts of an existing pickle .dat file are imported into a new segment
+    def test_imports_pickle_file(self):
+        with open(os.path.join(self.tmp_dir, "1234.dat"), "wb") as f:
+            pickle.dump([Post(1, "Old", "Old text"), Post(2, "Older", "Older text")], f)
+
+        dao = PostDAOSegment(self.blog)
+        self.assertEqual([1, 2], [p.code for p in dao.list_posts()])
+        self.assertEqual(3, dao.create_post(Post(0, "New", "New text")).code)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from blogging.post import Post
 from datetime import datetime
@@ -32,6 +33,25 @@ class PostTest(unittest.TestCase):
         example_post = Post(1, "Test Title", "Test Text", datetime(2025, 4, 30, 12, 30), datetime(2025, 4, 30, 12, 45))
         self.assertTrue(self.post.__eq__(example_post), "Posts with same attributes should be equal")
 
+    #Timestamps are compared to the second, microseconds are ignored
+    def test_post_eq_second_resolution(self):
+        close_post = Post(1, "Test Title", "Test Text", datetime(2025, 4, 30, 12, 30, 0, 999999), datetime(2025, 4, 30, 12, 45, 0, 1))
+        later_post = Post(1, "Test Title", "Test Text", datetime(2025, 4, 30, 12, 30, 1), datetime(2025, 4, 30, 12, 45))
+        self.assertEqual(self.post, close_post, "posts within the same second should be equal")
+        self.assertNotEqual(self.post, later_post, "posts a second apart should differ")
+
+    #Posts survive pickling, including ones pickled with the old dict state
+    def test_post_pickle(self):
+        self.assertFalse(hasattr(self.post, "__dict__"), "posts should use slots")
+        copy = pickle.loads(pickle.dumps(self.post))
+        self.assertEqual(self.post, copy)
+        self.assertEqual(self.post.update, copy.update)
+
+        legacy = Post.__new__(Post)
+        legacy.__setstate__({"code": 1, "title": "Test Title", "text": "Test Text",
+                             "creation": datetime(2025, 4, 30, 12, 30), "update": datetime(2025, 4, 30, 12, 45)})
+        self.assertEqual(self.post, legacy)
+
     #Tests output contain proper text and title
     def test_post_str(self):
         example_output = self.post.__str__()
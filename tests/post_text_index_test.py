@@ -0,0 +1,98 @@
+import os
+import random
+import unittest
+
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.dao.post_dao_pickle import PostDAOPickle
+from blogging.dao.post_text_index import PostTextIndex
+from blogging.post import Post
+from tests.scratch_store import ScratchStoreTest
+
+
+class PostTextIndexTest(ScratchStoreTest):
+
+    def setUp(self):
+        super().setUp()
+        Configuration.records_path = self.tmp_dir
+        self.blog = Blog(1234, "Test Name", "test_url", "test@email")
+
+    def brute_force(self, posts, query):
+        q = query.lower()
+        return [p.code for p in posts if q in p.title.lower() or q in p.text.lower()]
+
+    #Index search gives exactly the substring results of a full scan
+    def test_matches_substring_semantics(self):
+        rng = random.Random(7)
+        words = ["journey", "Journeys", "trip", "storm", "stroke", "kid", "once", "upon", "a", "time", "end"]
+        posts = []
+        for code in range(1, 60):
+            title = " ".join(rng.choice(words) for _ in range(3))
+            text = ",\n".join(" ".join(rng.choice(words) for _ in range(5)) for _ in range(2))
+            posts.append(Post(code, title, text))
+        dao = PostDAOPickle(self.blog, False)
+        for p in posts:
+            dao.create_post(p)
+
+        queries = ["journey", "JOURNEY", "ourn", "rney", "storm stroke", "m str", "kid,\nonce",
+                   "a", "e ", ", ", "zzz", "time end", " upon "]
+        for q in queries:
+            self.assertEqual(self.brute_force(posts, q), [p.code for p in dao.retrieve_posts(q)], q)
+
+        dao.update_post(3, "Brand new title", "Nothing else")
+        dao.delete_post(4)
+        posts = [p for p in posts if p.code != 4]
+        for q in queries + ["brand", "nothing else"]:
+            self.assertEqual(self.brute_force(posts, q), [p.code for p in dao.retrieve_posts(q)], q)
+
+    #Word queries only touch the posts that contain the word
+    def test_candidates(self):
+        index = PostTextIndex.build([
+            Post(1, "Starting my journey", "Once upon a time"),
+            Post(2, "Second step", "Before one could think"),
+            Post(3, "Continuing my journey", "Along the way"),
+        ])
+        self.assertEqual([1, 3], index.candidates("my journey"))
+        self.assertEqual([2], index.candidates("think"))
+        self.assertEqual([], index.candidates("travel"))
+        self.assertIsNone(index.candidates("..."))
+
+    #Single words inside or at the end of tokens are found through the vocabulary trigrams
+    def test_inner_and_suffix_words(self):
+        index = PostTextIndex.build([
+            Post(1, "Starting my journey", "Once upon a time"),
+            Post(2, "Second step", "Before one could think"),
+            Post(3, "Journeys", "Along the way"),
+        ])
+        self.assertEqual([1, 3], index.candidates("ourne"))
+        self.assertEqual([1, 3], index.candidates("rney"))
+        self.assertEqual([3], index.candidates("neys"))
+        self.assertEqual([1, 2], index.candidates("e o"))
+        self.assertEqual([1, 3], index.candidates("y"))
+        self.assertEqual([], index.candidates("rnez"))
+
+        index.remove(3)
+        self.assertEqual([1], index.candidates("ourne"))
+        self.assertEqual([], index.candidates("neys"))
+
+    #The index is saved next to the .dat file and dropped when it goes stale
+    def test_persisted_index(self):
+        dao = PostDAOPickle(self.blog)
+        dao.create_post(Post(0, "Starting my journey", "Once upon a time"))
+        dao.retrieve_posts("journey")
+        index_file = os.path.join(self.tmp_dir, "1234.idx.dat")
+        self.assertTrue(os.path.exists(index_file))
+
+        dao.create_post(Post(0, "Finishing my journey", "End of story"))
+        reopened = PostDAOPickle(self.blog)
+        self.assertEqual([1, 2], [p.code for p in reopened.retrieve_posts("journey")])
+
+        # a writer that never built the index removes the old one
+        writer = PostDAOPickle(self.blog)
+        writer.delete_post(1)
+        self.assertFalse(os.path.exists(index_file))
+        self.assertEqual([2], [p.code for p in PostDAOPickle(self.blog).retrieve_posts("journey")])
+
+
+if __name__ == '__main__':
+    unittest.main()
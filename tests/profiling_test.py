@@ -0,0 +1,75 @@
+import os
+import pstats
+import shutil
+import tempfile
+import time
+import unittest
+
+from blogging.profiling import Profiler, profile_options, run_profiled
+
+
+def busy(seconds):
+    # allocate and spin long enough for the sampler to look a few times
+    end = time.perf_counter() + seconds
+    blocks = []
+    while time.perf_counter() < end:
+        blocks.append(bytearray(1024))
+    return blocks
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    #The options are taken out of the arguments, the environment turns profiling on too
+    def test_profile_options(self):
+        self.assertEqual((["cli"], None), profile_options(["cli"], {}))
+        self.assertEqual((["cli"], {"out_dir": None, "stacks": False}), profile_options(["cli", "--profile"], {}))
+        self.assertEqual((["gui"], {"out_dir": "out", "stacks": True}),
+                         profile_options(["--profile=out", "gui", "--profile-stacks"], {}))
+        self.assertEqual((["cli"], {"out_dir": None, "stacks": False}), profile_options(["cli"], {"BLOGGING_PROFILE": "1"}))
+        self.assertEqual((["cli"], {"out_dir": "dir", "stacks": True}),
+                         profile_options(["cli"], {"BLOGGING_PROFILE": "dir", "BLOGGING_PROFILE_STACKS": "1"}))
+        self.assertEqual((["cli"], None), profile_options(["cli"], {"BLOGGING_PROFILE": "0"}))
+
+    #A profiled run writes readable pstats, an allocation report and collapsed stacks
+    def test_reports(self):
+        profiler = Profiler("test", out_dir=self.tmp_dir, stacks=True, top=5, interval=0.001)
+        profiler.start()
+        blocks = busy(0.1)
+        paths = profiler.stop()
+        del blocks
+
+        self.assertEqual(3, len(paths))
+        self.assertTrue(all(os.path.dirname(p) == self.tmp_dir for p in paths))
+        functions = [func for _, _, func in pstats.Stats(paths[0]).stats]
+        self.assertIn("busy", functions)
+
+        with open(paths[1], encoding="utf-8") as f:
+            report = f.read()
+        self.assertTrue(report.startswith("traced memory:"))
+        self.assertIn("profiling_test.py", report)
+
+        with open(paths[2], encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+        self.assertTrue(any("profiling_test.py:busy" in line for line in lines))
+
+    #Reports are written even when the session ends with an exception
+    def test_run_profiled_on_error(self):
+        def session():
+            raise SystemExit()
+
+        with self.assertRaises(SystemExit):
+            run_profiled("cli", session, out_dir=self.tmp_dir)
+        self.assertEqual(2, len(os.listdir(self.tmp_dir)))
+
+
+if __name__ == '__main__':
+    unittest.main()
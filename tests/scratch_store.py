@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from blogging.configuration import Configuration
+from blogging.dao.sqlite_store import close_stores
+from blogging.stats import STATS
+
+
+def _restore_configuration(old):
+    for name, value in old.items():
+        setattr(Configuration, name, value)
+
+
+def _restore_stats(enabled):
+    STATS.reset()
+    STATS.enabled = enabled
+
+
+class ScratchStoreTest(unittest.TestCase):
+    """
+    Base class of the tests that read and write blogs and posts.
+
+    - every test gets its own scratch folder (self.tmp_dir) holding
+      blogs_file, records_path and sqlite_file, with autosave on, so
+      real data is never touched
+    - Configuration is put back as it was after every test, so a test
+      may change any setting; settings are the ones every test of the
+      class starts with, and backend, post_storage and blogs_journal
+      pick the engines when they are given
+    - with collect_stats, statistics are collected from zero
+    - shared sqlite connections are closed after every test
+    """
+
+    backend = None
+    post_storage = None
+    blogs_journal = None
+    settings = {}
+    collect_stats = False
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # cleanups run last first: close the stores, restore, then delete
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.addCleanup(_restore_configuration,
+                        {name: value for name, value in vars(Configuration).items() if not name.startswith("__")})
+        self.addCleanup(close_stores)
+
+        Configuration.autosave = True
+        Configuration.blogs_file = os.path.join(self.tmp_dir, "blogs.json")
+        Configuration.records_path = os.path.join(self.tmp_dir, "records")
+        Configuration.sqlite_file = os.path.join(self.tmp_dir, "blogs.db")
+        if self.backend is not None:
+            Configuration.storage_backend = self.backend
+        if self.post_storage is not None:
+            Configuration.post_storage = self.post_storage
+        if self.blogs_journal is not None:
+            Configuration.blogs_journal = self.blogs_journal
+        for name, value in self.settings.items():
+            setattr(Configuration, name, value)
+
+        if self.collect_stats:
+            self.addCleanup(_restore_stats, STATS.enabled)
+            STATS.reset()
+            STATS.enable()
+
+    def calls(self, name):
+        # how often the timed operation name ran
+        return STATS.snapshot().get(name, {}).get("calls", 0)
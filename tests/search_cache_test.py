@@ -0,0 +1,44 @@
+import unittest
+
+from blogging.blog import Blog
+from blogging.gui.search_cache import SearchCache, blog_matches, narrow
+
+
+class SearchCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SearchCache(max_entries=2)
+        self.blogs = [Blog(1, "Short Journey", "short_journey", "sj@mail"),
+                      Blog(2, "Long Trip", "long_trip", "lt@mail"),
+                      Blog(3, "Journal", "journal", "j@mail")]
+
+    #Entries are only returned for the generation they were made at
+    def test_generation_invalidates(self):
+        self.cache.put(("blogs",), "jour", 1, self.blogs[::2])
+        self.assertEqual(self.blogs[::2], self.cache.get(("blogs",), "jour", 1))
+        self.assertIsNone(self.cache.get(("blogs",), "jour", 2))
+        self.assertIsNone(self.cache.get(("blogs",), "jour", 1), "stale entries are dropped")
+        self.assertIsNone(self.cache.get(("posts", 1), "jour", 1), "scopes do not mix")
+
+    #A longer query is answered from the longest cached query it contains
+    def test_narrowing(self):
+        self.cache.put(("blogs",), "j", 1, self.blogs)
+        self.cache.put(("blogs",), "jour", 1, self.blogs[::2])
+        base = self.cache.base_for(("blogs",), "journey", 1)
+        self.assertEqual(self.blogs[::2], base)
+        self.assertEqual([self.blogs[0]], narrow(base, "journey", blog_matches))
+        self.assertIsNone(self.cache.base_for(("blogs",), "trip", 1))
+        self.assertIsNone(self.cache.base_for(("blogs",), "journey", 2))
+
+    #The least recently used entry is evicted first
+    def test_lru_eviction(self):
+        self.cache.put(("blogs",), "a", 1, [])
+        self.cache.put(("blogs",), "b", 1, [])
+        self.cache.get(("blogs",), "a", 1)
+        self.cache.put(("blogs",), "c", 1, [])
+        self.assertIsNotNone(self.cache.get(("blogs",), "a", 1))
+        self.assertIsNone(self.cache.get(("blogs",), "b", 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+import unittest
+
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao.blog_dao_json import BlogDAOJSON
+from blogging.dao.post_dao_factory import create_post_dao
+from blogging.dao.sqlite_store import close_stores
+from blogging.exception.illegal_operation_exception import IllegalOperationException
+from blogging.post import Post
+from blogging.stats import STATS
+from tests.scratch_store import ScratchStoreTest
+
+
+def _write_posts(blog_id, count):
+    # runs in a child process
+    controller = Controller()
+    controller.login("user", "123456")
+    controller.set_current_blog(blog_id)
+    for i in range(count):
+        controller.create_post("Post %d from %d" % (i, os.getpid()), "text")
+    controller.create_blog(os.getpid(), "Blog %d" % os.getpid(), "url", "mail")
+
+
+class SharedStoreTest(ScratchStoreTest):
+
+    backend = "json"
+    post_storage = "pickle"
+    blogs_journal = True
+    settings = {"change_check_interval": 0}
+    collect_stats = True
+
+    #Each DAO sees the blogs the other one wrote, and neither write is lost
+    def test_blogs(self):
+        if self.backend != "json":
+            self.skipTest("sqlite shares one connection per process")
+        a = BlogDAOJSON()
+        b = BlogDAOJSON()
+        a.create_blog(Blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com"))
+        self.assertEqual("Short Journey", b.search_blog(1111111111).name)
+        b.create_blog(Blog(2222222222, "Long Trip", "long_trip", "long.trip@gmail.com"))
+        a.update_blog(2222222222, 2222222222, "Longer Trip", "long_trip", "long.trip@gmail.com")
+        b.delete_blog(1111111111)
+
+        expected = [(2222222222, "Longer Trip")]
+        self.assertEqual(expected, [(x.id, x.name) for x in a.list_blogs()])
+        self.assertEqual(expected, [(x.id, x.name) for x in b.list_blogs()])
+        self.assertEqual(expected, [(x.id, x.name) for x in BlogDAOJSON().list_blogs()])
+
+    #Only what changed is read again
+    def test_incremental_reload(self):
+        if self.backend != "json":
+            self.skipTest("sqlite shares one connection per process")
+        a = BlogDAOJSON()
+        b = BlogDAOJSON()
+        a.create_blog(Blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com"))
+        kept = b.search_blog(1111111111)
+        STATS.reset()
+
+        b.list_blogs()
+        self.assertEqual(0, self.calls("BlogDAOJSON._load"), "nothing changed")
+        a.create_blog(Blog(2222222222, "Long Trip", "long_trip", "long.trip@gmail.com"))
+        self.assertEqual(2, b.count_blogs())
+        if self.blogs_journal:
+            # only the new journal record is read
+            self.assertEqual(0, self.calls("BlogDAOJSON._load"))
+            self.assertLessEqual(1, self.calls("BlogDAOJSON._read_journal_tail"))
+        else:
+            self.assertEqual(1, self.calls("BlogDAOJSON._load"))
+        # an unchanged blog keeps its object (and any posts it has open)
+        self.assertIs(kept, b.search_blog(1111111111))
+
+    #Reads look for changes at most every change_check_interval seconds; writes always do
+    def test_check_interval(self):
+        if self.backend != "json":
+            self.skipTest("sqlite shares one connection per process")
+        Configuration.change_check_interval = 3600
+        a = BlogDAOJSON()
+        b = BlogDAOJSON()
+        a.create_blog(Blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com"))
+        self.assertEqual(0, b.count_blogs())
+        b.create_blog(Blog(2222222222, "Long Trip", "long_trip", "long.trip@gmail.com"))
+        self.assertEqual([1111111111, 2222222222], [x.id for x in b.list_blogs()])
+
+    #The controller's duplicate check sees other writers' blogs
+    def test_controller_duplicate(self):
+        a = Controller()
+        b = Controller()
+        a.login("user", "123456")
+        b.login("user", "123456")
+        a.create_blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com")
+        with self.assertRaises(IllegalOperationException):
+            b.create_blog(1111111111, "Duplicate", "dup", "dup@gmail.com")
+
+    #Posts written through two DAOs of the same blog get distinct codes and are all kept
+    def test_posts(self):
+        if self.backend != "json":
+            self.skipTest("sqlite shares one connection per process")
+        blog = Blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com")
+        a = create_post_dao(blog, True)
+        b = create_post_dao(blog, True)
+        a.create_post(Post(None, "First", "first post"))
+        b.create_post(Post(None, "Second", "second post"))
+        a.create_post(Post(None, "Third", "third post"))
+        self.assertTrue(b.update_post(1, "First, edited", "edited"))
+        self.assertTrue(a.delete_post(3))
+
+        expected = [(1, "First, edited"), (2, "Second")]
+        self.assertEqual(expected, [(p.code, p.title) for p in a.list_posts()])
+        self.assertEqual(expected, [(p.code, p.title) for p in b.list_posts()])
+        self.assertEqual(["First, edited"], [p.title for p in b.retrieve_posts("edited")])
+        self.assertEqual(expected, [(p.code, p.title) for p in create_post_dao(blog, True).list_posts()])
+
+    #Post files are only read again once another writer changed them
+    def test_posts_reload(self):
+        if self.backend != "json":
+            self.skipTest("sqlite shares one connection per process")
+        blog = Blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com")
+        a = create_post_dao(blog, True)
+        b = create_post_dao(blog, True)
+        for i in range(3):
+            a.create_post(Post(None, "Post %d" % i, "text %d" % i))
+        b.list_posts()
+        STATS.reset()
+
+        b.list_posts()
+        a.create_post(Post(None, "Post 3", "text 3"))
+        self.assertEqual(4, b.count_posts())
+        if self.post_storage == "pickle":
+            self.assertEqual(1, self.calls("PostDAOPickle._load"))
+        else:
+            # one scan of the appended record only
+            self.assertEqual(1, self.calls("PostDAOSegment._scan"))
+            self.assertEqual(0, self.calls("PostDAOSegment._import_pickle"))
+
+    #Processes writing the same blog at the same time lose nothing
+    def test_processes(self):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            self.skipTest("needs fork")
+        controller = Controller()
+        controller.login("user", "123456")
+        controller.create_blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com")
+        # connections must not be shared with the children
+        close_stores()
+
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=_write_posts, args=(1111111111, 20)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual([0, 0, 0], [w.exitcode for w in workers])
+
+        controller = Controller()
+        controller.login("user", "123456")
+        self.assertEqual(4, len(controller.list_blogs()))
+        controller.set_current_blog(1111111111)
+        self.assertEqual(list(range(60, 0, -1)), [p.code for p in controller.list_posts()])
+
+
+class SnapshotSharedStoreTest(SharedStoreTest):
+
+    blogs_journal = False
+
+
+class SegmentSharedStoreTest(SharedStoreTest):
+
+    post_storage = "segment"
+
+
+class SQLiteSharedStoreTest(SharedStoreTest):
+
+    backend = "sqlite"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import unittest
+
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao.blog_dao_sqlite import BlogDAOSQLite
+from blogging.dao.post_dao_sqlite import PostDAOSQLite
+from blogging.dao.sqlite_store import close_stores, get_store
+from blogging.post import Post
+from tests.scratch_store import ScratchStoreTest
+
+
+class SQLiteDAOTest(ScratchStoreTest):
+
+    backend = "sqlite"
+
+    def reopen(self):
+        # drop the shared connection so the next DAO reads the file again
+        close_stores()
+        controller = Controller()
+        controller.login("user", "123456")
+        return controller
+
+    #The database runs in WAL mode
+    def test_wal_mode(self):
+        BlogDAOSQLite(True)
+        self.assertEqual("wal", get_store().query_one("PRAGMA journal_mode")[0])
+
+    #Blogs keep their order and lookups after reopening
+    def test_blogs(self):
+        controller = self.reopen()
+        controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+        controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+        controller.create_blog(1111112000, "Long Trip", "long_trip", "long.trip@gmail.com")
+        controller.update_blog(1111114444, 1111118888, "Short Travel", "short_travel", "short.travel@gmail.com")
+        controller.delete_blog(1111115555)
+
+        controller = self.reopen()
+        self.assertEqual([1111118888, 1111112000], [b.id for b in controller.list_blogs()])
+        self.assertEqual(1111112000, controller.search_blog(1111112000).id)
+        self.assertEqual(1111118888, controller.blog_dao.search_blog("short_travel").id)
+        self.assertIsNone(controller.blog_dao.search_blog("1111112000"), "ids only match with the same type")
+        self.assertEqual([1111112000], [b.id for b in controller.retrieve_blogs("TRIP")])
+
+    #Posts are stored per blog and survive reopening
+    def test_posts(self):
+        controller = self.reopen()
+        controller.create_blog(1, "One", "one", "one@mail")
+        controller.create_blog(2, "Two", "two", "two@mail")
+        controller.set_current_blog(1)
+        controller.create_post("Starting my journey", "Once upon a time")
+        controller.create_post("Second step", "Before one could think")
+        controller.create_post("Finishing my journey", "End of story")
+        controller.update_post(2, "Second step", "A storm stroke")
+        controller.delete_post(3)
+
+        controller = self.reopen()
+        controller.set_current_blog(1)
+        self.assertEqual([2, 1], [p.code for p in controller.list_posts()])
+        self.assertEqual("A storm stroke", controller.search_post(2).text)
+        self.assertEqual([1], [p.code for p in controller.retrieve_posts("JOURNEY")])
+        self.assertEqual(3, controller.create_post("Next", "Next text").code, "codes continue after the highest stored one")
+
+        controller.unset_current_blog()
+        controller.set_current_blog(2)
+        self.assertEqual([], controller.list_posts(), "posts belong to their own blog")
+
+    #Without autosave the blog DAO keeps everything in memory
+    def test_no_autosave(self):
+        dao = BlogDAOSQLite(False)
+        dao.create_blog(Blog(1, "One", "one", "one@mail"))
+        self.assertFalse(os.path.exists(Configuration.sqlite_file))
+        self.assertEqual(1, dao.count_blogs())
+
+    #Timestamps round-trip through the posts table
+    def test_post_timestamps(self):
+        blog = Blog(1, "One", "one", "one@mail")
+        dao = PostDAOSQLite(blog)
+        post = dao.create_post(Post(0, "Title", "Text"))
+        self.assertEqual(post, dao.search_post(post.code))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+from benchmarks.startup import ENTRY_POINTS, forbidden_imports, import_profile
+
+
+class StartupTest(unittest.TestCase):
+
+    #The CLI entry point never loads PyQt6
+    def test_cli_does_not_import_qt(self):
+        modules = import_profile(ENTRY_POINTS["cli"])
+        names = [m[0] for m in modules]
+        self.assertIn("blogging.cli.blogging_cli", names)
+        self.assertEqual([], forbidden_imports(modules, ("PyQt6",)))
+
+    #Storage engines that are not configured are not imported
+    def test_unused_backends_are_not_imported(self):
+        modules = import_profile("from blogging.controller import Controller; Controller(False)")
+        names = {m[0] for m in modules}
+        self.assertNotIn("blogging.dao.blog_dao_sqlite", names)
+        self.assertNotIn("sqlite3", names)
+        self.assertNotIn("blogging.dao.post_dao_segment", names)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.stats import STATS, OperationStats, count_io, timed
+from tests.scratch_store import ScratchStoreTest
+
+
+@timed
+def outer_op():
+    count_io(read=10, opens=1)
+    inner_op()
+
+
+@timed
+def inner_op():
+    count_io(written=5, opens=1)
+
+
+@timed
+def failing_op():
+    raise ValueError("boom")
+
+
+class StatsTest(ScratchStoreTest):
+
+    collect_stats = True
+
+    #I/O is charged to every operation running, innermost to outermost
+    def test_nested_io(self):
+        outer_op()
+        outer_op()
+        stats = STATS.snapshot()
+        outer = stats["outer_op"]
+        inner = stats["inner_op"]
+        self.assertEqual(2, outer["calls"])
+        self.assertEqual((20, 10, 4), (outer["bytes_read"], outer["bytes_written"], outer["opens"]))
+        self.assertEqual((0, 10, 2), (inner["bytes_read"], inner["bytes_written"], inner["opens"]))
+        self.assertEqual((20, 10, 4), (stats["io"]["bytes_read"], stats["io"]["bytes_written"], stats["io"]["opens"]))
+
+    #Exceptions are counted and passed on
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            failing_op()
+        self.assertEqual(1, STATS.snapshot()["failing_op"]["errors"])
+
+    #Nothing is recorded while collection is off
+    def test_disabled(self):
+        STATS.disable()
+        outer_op()
+        self.assertEqual({}, STATS.snapshot())
+        self.assertEqual("Statistics collection is off.", STATS.report())
+
+    #Percentiles come from the power-of-two histogram
+    def test_histogram(self):
+        op = OperationStats()
+        for us in [1, 2, 3, 100, 1000]:
+            op.add_call(us, False)
+        self.assertEqual(5, op.calls)
+        self.assertEqual(4, op.percentile_us(0.5))
+        self.assertEqual(1000, op.percentile_us(0.99))
+        self.assertEqual(1, op.as_dict()["min_us"])
+        self.assertEqual(5, sum(op.as_dict()["histogram"].values()))
+
+    #Controller and DAO operations report their latency and file I/O
+    def test_controller_stats(self):
+        Configuration.autosave = True
+        controller = Controller()
+        controller.login("user", "123456")
+        controller.create_blog(1111111111, "Short Journey", "short_journey", "short.journey@gmail.com")
+        controller.set_current_blog(1111111111)
+        controller.create_post("Title", "text")
+        controller.search_blog(1111111111)
+
+        stats = controller.stats()
+        self.assertEqual(1, stats["Controller.create_blog"]["calls"])
+        self.assertEqual(1, stats["Controller.search_blog"]["calls"])
+        self.assertGreater(stats["Controller.create_blog"]["bytes_written"], 0)
+        self.assertGreater(stats["PostDAOPickle._write"]["bytes_written"], 0)
+        self.assertEqual(0, stats["Controller.search_blog"]["opens"])
+        self.assertIn("Controller.create_post", controller.stats_report())
+
+        controller.reset_stats()
+        self.assertEqual({}, controller.stats())
+
+
+if __name__ == '__main__':
+    unittest.main()